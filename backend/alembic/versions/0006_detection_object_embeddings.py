@@ -0,0 +1,119 @@
+"""move detection embeddings from aidetection.raw to a binary column
+
+Revision ID: 0006_detection_object_embeddings
+Revises: 0005_location_photo_and_history_location
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+revision: str = "0006_detection_object_embeddings"
+down_revision: Union[str, None] = "0005_location_photo_and_history_location"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Формат совпадает с `app.services.ai.embeddings.encode_embedding`, но зафиксирован
+# здесь, чтобы миграция не зависела от будущих изменений кода.
+STORAGE_DTYPE = "<f2"
+BATCH_SIZE = 500
+
+aidetection = sa.table(
+    "aidetection",
+    sa.column("id", sa.Integer()),
+    sa.column("raw", sa.JSON()),
+)
+aidetectionobject = sa.table(
+    "aidetectionobject",
+    sa.column("id", sa.Integer()),
+    sa.column("detection_id", sa.Integer()),
+    sa.column("embedding", sa.LargeBinary()),
+)
+
+
+def _iter_detections(bind):
+    """Постранично обходит детекции, у которых есть raw."""
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(aidetection.c.id, aidetection.c.raw)
+            .where(aidetection.c.id > last_id)
+            .where(aidetection.c.raw.isnot(None))
+            .order_by(aidetection.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+
+def _object_ids(bind, detection_id: int) -> list[int]:
+    return [
+        row[0]
+        for row in bind.execute(
+            sa.select(aidetectionobject.c.id)
+            .where(aidetectionobject.c.detection_id == detection_id)
+            .order_by(aidetectionobject.c.id)
+        ).all()
+    ]
+
+
+def upgrade() -> None:
+    op.add_column("aidetectionobject", sa.Column("embedding", sa.LargeBinary(), nullable=True))
+
+    bind = op.get_bind()
+    for detection_id, raw in _iter_detections(bind):
+        objects = raw.get("objects") if isinstance(raw, dict) else None
+        if not objects or not any(isinstance(o, dict) and o.get("embedding") for o in objects):
+            continue
+        # Объекты в raw и строки aidetectionobject пишутся в одном порядке.
+        object_ids = _object_ids(bind, detection_id)
+        dims: set[int] = set()
+        new_objects = []
+        for idx, obj in enumerate(objects):
+            obj = dict(obj)
+            vector = obj.pop("embedding", None)
+            obj["has_embedding"] = bool(vector)
+            if vector and idx < len(object_ids):
+                dims.add(len(vector))
+                bind.execute(
+                    sa.update(aidetectionobject)
+                    .where(aidetectionobject.c.id == object_ids[idx])
+                    .values(embedding=np.asarray(vector, dtype=STORAGE_DTYPE).tobytes())
+                )
+            new_objects.append(obj)
+        new_raw = {**raw, "objects": new_objects}
+        if dims:
+            new_raw["embedding_ref"] = {
+                "storage": "aidetectionobject.embedding",
+                "dtype": "float16",
+                "dim": max(dims),
+            }
+        bind.execute(sa.update(aidetection).where(aidetection.c.id == detection_id).values(raw=new_raw))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for detection_id, raw in _iter_detections(bind):
+        if not isinstance(raw, dict) or "embedding_ref" not in raw:
+            continue
+        blobs = bind.execute(
+            sa.select(aidetectionobject.c.embedding)
+            .where(aidetectionobject.c.detection_id == detection_id)
+            .order_by(aidetectionobject.c.id)
+        ).scalars().all()
+        new_objects = []
+        for idx, obj in enumerate(raw.get("objects") or []):
+            obj = {k: v for k, v in obj.items() if k != "has_embedding"}
+            blob = blobs[idx] if idx < len(blobs) else None
+            obj["embedding"] = np.frombuffer(blob, dtype=STORAGE_DTYPE).astype("float32").tolist() if blob else None
+            new_objects.append(obj)
+        new_raw = {k: v for k, v in raw.items() if k != "embedding_ref"}
+        new_raw["objects"] = new_objects
+        bind.execute(sa.update(aidetection).where(aidetection.c.id == detection_id).values(raw=new_raw))
+
+    op.drop_column("aidetectionobject", "embedding")
@@ -0,0 +1,50 @@
+"""add media.latest_detection_id pointer and detection lookup indexes
+
+Revision ID: 0007_media_latest_detection
+Revises: 0006_detection_object_embeddings
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0007_media_latest_detection"
+down_revision: Union[str, None] = "0006_detection_object_embeddings"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_aidetection_media_id", "aidetection", ["media_id"])
+    op.create_index("ix_aidetectionobject_detection_id", "aidetectionobject", ["detection_id"])
+    op.create_index("ix_aidetectioncandidate_detection_object_id", "aidetectioncandidate", ["detection_object_id"])
+
+    op.add_column(
+        "media",
+        sa.Column(
+            "latest_detection_id",
+            sa.Integer(),
+            sa.ForeignKey("aidetection.id", name="fk_media_latest_detection_id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+    )
+
+    # Бэкфилл: та же семантика, что у прежнего `ORDER BY aidetection.id DESC LIMIT 1`.
+    op.execute(
+        """
+        UPDATE media
+        SET latest_detection_id = (
+            SELECT MAX(aidetection.id) FROM aidetection WHERE aidetection.media_id = media.id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("media", "latest_detection_id")
+
+    op.drop_index("ix_aidetectioncandidate_detection_object_id", table_name="aidetectioncandidate")
+    op.drop_index("ix_aidetectionobject_detection_id", table_name="aidetectionobject")
+    op.drop_index("ix_aidetection_media_id", table_name="aidetection")
@@ -0,0 +1,51 @@
+"""indexes for hot media/AI/history queries
+
+Revision ID: 0008_hot_query_indexes
+Revises: 0007_media_latest_detection
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0008_hot_query_indexes"
+down_revision: Union[str, None] = "0007_media_latest_detection"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# aidetection.media_id, aidetectionobject.detection_id и aidetectioncandidate.detection_object_id
+# проиндексированы в 0007_media_latest_detection.
+
+
+def upgrade() -> None:
+    # _hash_candidates: поиск повторной загрузки по хэшу внутри workspace.
+    op.create_index(
+        "ix_media_workspace_file_hash",
+        "media",
+        ["workspace_id", "file_hash"],
+        postgresql_where=sa.text("file_hash IS NOT NULL"),
+    )
+    op.create_index("ix_media_workspace_id", "media", ["workspace_id", "id"])
+    op.create_index("ix_media_location_id", "media", ["location_id"])
+    op.create_index("ix_item_media_media_id", "item_media", ["media_id"])
+    # list_detections: WHERE status = ? ORDER BY id.
+    op.create_index("ix_aidetection_status_id", "aidetection", ["status", "id"])
+    # upload_history: ORDER BY created_at DESC LIMIT n [AND owner_user_id = ?].
+    op.create_index("ix_mediauploadhistory_created_at", "mediauploadhistory", ["created_at"])
+    op.create_index(
+        "ix_mediauploadhistory_owner_created_at",
+        "mediauploadhistory",
+        ["owner_user_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_mediauploadhistory_owner_created_at", table_name="mediauploadhistory")
+    op.drop_index("ix_mediauploadhistory_created_at", table_name="mediauploadhistory")
+    op.drop_index("ix_aidetection_status_id", table_name="aidetection")
+    op.drop_index("ix_item_media_media_id", table_name="item_media")
+    op.drop_index("ix_media_location_id", table_name="media")
+    op.drop_index("ix_media_workspace_id", table_name="media")
+    op.drop_index("ix_media_workspace_file_hash", table_name="media")
@@ -0,0 +1,37 @@
+"""add aiinferencecache for raw detector/CLIP results
+
+Revision ID: 0009_ai_inference_cache
+Revises: 0008_hot_query_indexes
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0009_ai_inference_cache"
+down_revision: Union[str, None] = "0008_hot_query_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "aiinferencecache",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("file_hash", sa.String(length=128), nullable=False),
+        sa.Column("detector_version", sa.String(length=255), nullable=False),
+        sa.Column("clip_version", sa.String(length=255), nullable=False),
+        sa.Column("conf", sa.Numeric(5, 3), nullable=False),
+        sa.Column("objects", sa.JSON(), nullable=True),
+        sa.Column("embeddings", sa.LargeBinary(), nullable=True),
+        sa.Column("embedding_dim", sa.Integer(), nullable=True),
+        sa.Column("warnings", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("file_hash", "detector_version", "clip_version", "conf", name="uq_aiinferencecache_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("aiinferencecache")
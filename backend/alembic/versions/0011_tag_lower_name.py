@@ -0,0 +1,43 @@
+"""case-insensitive unique tag name per workspace
+
+Revision ID: 0011_tag_lower_name
+Revises: 0010_tag_unique_name
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0011_tag_lower_name"
+down_revision: Union[str, None] = "0010_tag_unique_name"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Для каждого (workspace_id, lower(name)) остаётся тег с минимальным id.
+KEEP = "SELECT workspace_id, lower(name) AS lname, MIN(id) AS id FROM tag GROUP BY workspace_id, lower(name)"
+
+
+def upgrade() -> None:
+    # «Tools» и «tools» сливаются: связи переносим на оставляемый тег, дубли удаляем.
+    op.execute(
+        f"""
+        INSERT INTO item_tags (item_id, tag_id)
+        SELECT DISTINCT it.item_id, keep.id
+        FROM item_tags it
+        JOIN tag t ON t.id = it.tag_id
+        JOIN ({KEEP}) keep ON keep.workspace_id = t.workspace_id AND keep.lname = lower(t.name)
+        WHERE t.id <> keep.id
+          AND NOT EXISTS (SELECT 1 FROM item_tags x WHERE x.item_id = it.item_id AND x.tag_id = keep.id)
+        """
+    )
+    op.execute(f"DELETE FROM item_tags WHERE tag_id NOT IN (SELECT id FROM ({KEEP}) keep)")
+    op.execute(f"DELETE FROM tag WHERE id NOT IN (SELECT id FROM ({KEEP}) keep)")
+    op.drop_constraint("uq_tag_workspace_name", "tag", type_="unique")
+    op.create_index("uq_tag_workspace_lower_name", "tag", ["workspace_id", sa.text("lower(name)")], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_tag_workspace_lower_name", table_name="tag")
+    op.create_unique_constraint("uq_tag_workspace_name", "tag", ["workspace_id", "name"])
@@ -0,0 +1,51 @@
+"""add syncchange change log for delta sync
+
+Revision ID: 0012_sync_change_log
+Revises: 0011_tag_lower_name
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0012_sync_change_log"
+down_revision: Union[str, None] = "0011_tag_lower_name"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNC_ENTITIES = ("item", "location", "media", "detection", "tag")
+
+# Уже существующие строки попадают в журнал, чтобы первый `GET /sync?since=0` отдал всё.
+BACKFILL = {
+    "item": "SELECT workspace_id, id FROM item",
+    "location": "SELECT workspace_id, id FROM location",
+    "media": "SELECT workspace_id, id FROM media",
+    "tag": "SELECT workspace_id, id FROM tag",
+    "detection": "SELECT m.workspace_id, d.id FROM aidetection d JOIN media m ON m.id = d.media_id",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "syncchange",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workspace_id", sa.Integer(), nullable=True),
+        sa.Column("entity", sa.Enum(*SYNC_ENTITIES, name="syncentity"), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("deleted", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_syncchange_workspace_id", "syncchange", ["workspace_id", "id"])
+    for entity, rows in BACKFILL.items():
+        op.execute(
+            f"INSERT INTO syncchange (workspace_id, entity, entity_id, deleted) "
+            f"SELECT src.workspace_id, '{entity}', src.id, false FROM ({rows}) src"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_syncchange_workspace_id", table_name="syncchange")
+    op.drop_table("syncchange")
+    sa.Enum(name="syncentity").drop(op.get_bind(), checkfirst=True)
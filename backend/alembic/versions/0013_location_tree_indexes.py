@@ -0,0 +1,35 @@
+"""indexes for location tree queries
+
+Revision ID: 0013_location_tree_indexes
+Revises: 0012_sync_change_log
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0013_location_tree_indexes"
+down_revision: Union[str, None] = "0012_sync_change_log"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Дерево, поддерево предметов, проверка циклов и перенос узла идут
+    # рекурсивными CTE по `parent_id`.
+    op.create_index("ix_location_parent_id", "location", ["parent_id"])
+    # Перенос узла переписывает пути потомков по префиксу `path LIKE 'old.%'`;
+    # при не-C collation обычный btree для LIKE не используется.
+    op.create_index(
+        "ix_location_path",
+        "location",
+        ["path"],
+        postgresql_ops={"path": "varchar_pattern_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_location_path", table_name="location")
+    op.drop_index("ix_location_parent_id", table_name="location")
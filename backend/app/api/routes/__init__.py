@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.routes import health, auth, items, locations, ai, media, imports, logs
+from app.api.routes import health, auth, items, locations, ai, media, imports, logs, sync
 
 
 api_router = APIRouter()
@@ -12,3 +12,4 @@ api_router.include_router(ai.router)
 api_router.include_router(media.router)
 api_router.include_router(imports.router)
 api_router.include_router(logs.router)
+api_router.include_router(sync.router)
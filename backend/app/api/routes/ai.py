@@ -32,7 +32,7 @@ from app.schemas.ai import (
     AITaskRequest,
     AIDetectionObjectUpdate,
 )
-from app.services.ai.pipeline import analyze_media
+from app.services.ai.pipeline import analyze_media, set_latest_detection
 from app.services.ai.video import analyze_video
 
 router = APIRouter(prefix="/ai", tags=["ai"])
@@ -132,6 +132,8 @@ async def request_analysis(payload: AITaskRequest, db: AsyncSession = Depends(ge
     if settings.ai_service_url:
         detection = AIDetection(media_id=payload.media_id, status=AIDetectionStatusEnum.PENDING)
         db.add(detection)
+        await db.flush()
+        await set_latest_detection(db, payload.media_id, detection.id)
         await db.commit()
         await db.refresh(detection)
         await _update_upload_history(db, detection)
@@ -211,27 +213,14 @@ async def list_detections(
     result = await db.execute(
         select(AIDetection)
         .where(AIDetection.status == status)
+        .order_by(AIDetection.id)
         .options(
             selectinload(AIDetection.media),
             selectinload(AIDetection.objects).selectinload(AIDetectionObject.candidates),
         )
     )
     detections = result.scalars().unique().all()
-    out: list[AIDetectionOut] = []
-    for det in detections:
-        out.append(
-            AIDetectionOut(
-                id=det.id,
-                media_id=det.media_id,
-                status=det.status,
-                created_at=det.created_at,
-                completed_at=det.completed_at,
-                media_path=det.media.path if det.media else None,
-                thumb_path=det.media.thumb_path if det.media else None,
-                objects=[_object_out(obj) for obj in det.objects],
-            )
-        )
-    return out
+    return [_detection_out(det) for det in detections]
 
 
 @router.post("/detections/{detection_id}/accept", response_model=AIDetectionOut)
@@ -463,7 +452,18 @@ async def _load_detection(db: AsyncSession, detection_id: int) -> AIDetectionOut
             selectinload(AIDetection.objects).selectinload(AIDetectionObject.candidates),
         )
     )
-    det = result.scalar_one()
+    return _detection_out(result.scalar_one())
+
+
+def _detection_out(det: AIDetection) -> AIDetectionOut:
+    """Сериализует детекцию с заранее загруженными `media` и `objects.candidates`.
+
+    Args:
+        det: ORM-объект AIDetection.
+
+    Returns:
+        Объект AIDetectionOut.
+    """
     return AIDetectionOut(
         id=det.id,
         media_id=det.media_id,
@@ -515,8 +515,8 @@ async def _update_upload_history(db: AsyncSession, detection: AIDetection) -> No
     """Синхронизирует `MediaUploadHistory` с актуальным состоянием AI.
 
     Обновляет запись истории загрузки медиа с текущим статусом AI,
-    summary объектов детекции и ID детекции. Используется для отслеживания
-    прогресса обработки медиа.
+    summary объектов детекции и ID детекции, а также `Media.latest_detection_id`.
+    Используется для отслеживания прогресса обработки медиа.
 
     Args:
         db: Асинхронная сессия базы данных.
@@ -530,6 +530,8 @@ async def _update_upload_history(db: AsyncSession, detection: AIDetection) -> No
     det = loaded.scalar_one_or_none()
     if det is None:
         return
+    # Указатель на свежую детекцию обновляется в той же транзакции, что и история.
+    await set_latest_detection(db, det.media_id, det.id)
     result = await db.execute(
         select(MediaUploadHistory)
         .where(MediaUploadHistory.media_id == det.media_id)
@@ -538,6 +540,7 @@ async def _update_upload_history(db: AsyncSession, detection: AIDetection) -> No
     )
     entry = result.scalar_one_or_none()
     if not entry:
+        await db.commit()
         return
     entry.ai_status = det.status.value if hasattr(det.status, "value") else str(det.status)
     entry.ai_summary = {
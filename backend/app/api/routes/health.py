@@ -1,13 +1,18 @@
 """Healthcheck-эндпоинты для сервиса и окружения."""
 
+import asyncio
 from pathlib import Path
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
 from app.core.config import settings
+from app.services.ai import inference_client
+from app.services.ai.detector import _resolve_weights_path
+from app.services.ai.warmup import model_status, preload_finished
 
 router = APIRouter(tags=["health"])
 
@@ -30,6 +35,41 @@ async def healthcheck() -> dict:
     return {"status": "ok"}
 
 
+async def _ai_models_check() -> dict:
+    """Состояние моделей: локальных (прогрев в воркере) или в общем сервисе инференса.
+
+    Если предзагрузка выключена, модели грузятся лениво и проверка считается успешной.
+    """
+    if settings.ai_inference_socket:
+        try:
+            models = await asyncio.to_thread(inference_client.ping)
+        except (inference_client.InferenceUnavailable, inference_client.InferenceTimeout) as exc:
+            return {"ok": False, "mode": "remote", "ready": False, "error": str(exc)}
+        ready = all(m.get("state") != "loading" for m in models.values())
+        return {"ok": ready, "mode": "remote", "ready": ready, "models": models}
+    models = model_status()
+    ready = not settings.ai_preload_models or preload_finished()
+    ok = not settings.ai_preload_models or all(m["state"] == "ready" for m in models.values())
+    return {"ok": ok, "mode": "local", "preload": settings.ai_preload_models, "ready": ready, "models": models}
+
+
+@router.get("/health/ready")
+async def readiness() -> JSONResponse:
+    """Readiness-check: 503, пока модели загружаются и прогреваются.
+
+    Оркестратору стоит направлять трафик только после 200, иначе первый
+    upload оплатит загрузку YOLO/CLIP внутри запроса. Модель, которая не
+    загрузилась, не блокирует готовность: пайплайн работает через fallback.
+
+    Returns:
+        JSONResponse: `{"status": "ready" | "warming_up", "ai_models": ...}`.
+    """
+    ai_models = await _ai_models_check()
+    if not ai_models["ready"]:
+        return JSONResponse({"status": "warming_up", "ai_models": ai_models}, status_code=503)
+    return JSONResponse({"status": "ready", "ai_models": ai_models})
+
+
 @router.get("/health/full")
 async def healthcheck_full(db: AsyncSession = Depends(get_db)) -> dict:
     """Проверяет БД, пути к медиа и наличие весов YOLO.
@@ -38,6 +78,7 @@ async def healthcheck_full(db: AsyncSession = Depends(get_db)) -> dict:
     - Подключение к базе данных (выполняет простой SELECT 1)
     - Существование директорий для хранения медиафайлов (public и private)
     - Наличие файла весов YOLO для AI-функциональности
+    - Состояние загрузки и прогрева моделей (`ai_models`, с таймингами)
 
     Используется для мониторинга и отладки развертывания. Если какая-либо проверка
     fails, общий статус становится "degraded", но сервис продолжает работать.
@@ -72,46 +113,18 @@ async def healthcheck_full(db: AsyncSession = Depends(get_db)) -> dict:
     }
 
     # Проверяем только наличие файла весов, не загружая модель в память.
-    if settings.ai_yolo_weights_path:
-        yolo_weights = Path(settings.ai_yolo_weights_path)
-        if not yolo_weights.is_absolute():
-            yolo_weights = Path.cwd() / yolo_weights
-        source = "AI_YOLO_WEIGHTS_PATH"
-    else:
-        yolo_weights = Path.home() / ".cache" / "ultralytics" / "assets" / "yolov8n.pt"
-        source = "default"
-    checks["ai_weights"] = {"ok": yolo_weights.exists(), "path": str(yolo_weights), "source": source}
-
-    overall = "ok" if all(c.get("ok") for c in checks.values()) else "degraded"
-    return {"status": overall, "checks": checks}
-    checks: dict[str, dict] = {}
-
-    # Проверка, что приложение вообще может открыть соединение с БД.
-    try:
-        await db.execute(text("select 1"))
-        checks["db"] = {"ok": True}
-    except Exception as exc:  # noqa: BLE001
-        checks["db"] = {"ok": False, "error": str(exc)}
-
-    # Проверка директорий, в которые backend должен сохранять файлы и превью.
-    public_path = Path(settings.media_public_path)
-    private_path = Path(settings.media_private_path)
-    checks["media_paths"] = {
-        "ok": public_path.exists() and private_path.exists(),
-        "public_exists": public_path.exists(),
-        "private_exists": private_path.exists(),
+    # Для ONNX-бэкенда путь указывает на `.onnx` рядом с `.pt`.
+    yolo_weights = _resolve_weights_path(settings.ai_detector_backend)
+    source = "AI_YOLO_WEIGHTS_PATH" if settings.ai_yolo_weights_path else "default"
+    checks["ai_weights"] = {
+        "ok": yolo_weights.exists(),
+        "path": str(yolo_weights),
+        "source": source,
+        "backend": settings.ai_detector_backend,
     }
 
-    # Проверяем только наличие файла весов, не загружая модель в память.
-    if settings.ai_yolo_weights_path:
-        yolo_weights = Path(settings.ai_yolo_weights_path)
-        if not yolo_weights.is_absolute():
-            yolo_weights = Path.cwd() / yolo_weights
-        source = "AI_YOLO_WEIGHTS_PATH"
-    else:
-        yolo_weights = Path.home() / ".cache" / "ultralytics" / "assets" / "yolov8n.pt"
-        source = "default"
-    checks["ai_weights"] = {"ok": yolo_weights.exists(), "path": str(yolo_weights), "source": source}
+    # Состояние и тайминги загрузки/прогрева моделей.
+    checks["ai_models"] = await _ai_models_check()
 
     overall = "ok" if all(c.get("ok") for c in checks.values()) else "degraded"
     return {"status": overall, "checks": checks}
@@ -9,21 +9,39 @@ import json
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, delete
+from pydantic import ValidationError
+from sqlalchemy import String, and_, func, literal, select, delete, insert, tuple_, union_all
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user, get_db
+from app.api.routes.media import _latest_detections
 from app.core.config import settings
+from app.db.change_log import record_changes
+from app.models.batch import ItemBatch
 from app.models.item import Item
+from app.models.location import Location
 from app.models.media import Media, ItemMedia
 from app.models.ai import AIDetection, AIDetectionObject
 from app.models.tag import Tag, ItemTag
-from app.schemas.item import ItemCreate, ItemOut, ItemUpdate
+from app.schemas.item import (
+    ItemBatchRequest,
+    ItemBatchResult,
+    ItemBatchRowResult,
+    ItemCreate,
+    ItemOut,
+    ItemUpdate,
+)
 from app.models.user import User
-from app.models.enums import ItemStatus
+from app.models.enums import ItemStatus, SyncEntity
 
 router = APIRouter(prefix="/items", tags=["items"])
 
+# Сколько тегов вставлять одним multi-VALUES (лимит параметров Postgres — 32767).
+TAG_INSERT_CHUNK = 1000
+# Сколько названий искать одним UNION ALL (лимит составного SELECT в SQLite — 500).
+TAG_LOOKUP_CHUNK = 500
+
 
 async def _item_tags(item_id: int, db: AsyncSession) -> list[str]:
     """Возвращает список текстовых тегов, связанных с указанным предметом.
@@ -48,6 +66,46 @@ async def _item_tags(item_id: int, db: AsyncSession) -> list[str]:
     return [r[0] for r in rows.all()]
 
 
+async def _item_tags_map(item_ids: list[int], db: AsyncSession) -> dict[int, list[str]]:
+    """Возвращает теги сразу для набора предметов одним запросом.
+
+    Args:
+        item_ids: Идентификаторы предметов.
+        db: Асинхронная сессия базы данных.
+
+    Returns:
+        Словарь `item_id -> список названий тегов`; у предметов без тегов — пустой список.
+    """
+    result: dict[int, list[str]] = {item_id: [] for item_id in item_ids}
+    if not item_ids:
+        return result
+    stmt = (
+        select(ItemTag.item_id, Tag.name)
+        .join(Tag, ItemTag.tag_id == Tag.id)
+        .where(ItemTag.item_id.in_(item_ids))
+    )
+    for item_id, name in (await db.execute(stmt)).all():
+        result[item_id].append(name)
+    return result
+
+
+async def _serialize_items(items: list[Item], db: AsyncSession) -> list[ItemOut]:
+    """Сериализует список предметов, загружая теги одним запросом на весь список.
+
+    Списки предметов (`list_items`, `search_items`, предметы локации) не должны
+    делать отдельный запрос тегов на каждую строку.
+
+    Args:
+        items: ORM-объекты предметов.
+        db: Асинхронная сессия базы данных.
+
+    Returns:
+        Список ItemOut в том же порядке.
+    """
+    tags = await _item_tags_map([item.id for item in items], db)
+    return [_item_out(item, tags[item.id]) for item in items]
+
+
 async def _serialize_item(item: Item, db: AsyncSession) -> ItemOut:
     """Собирает объект ItemOut из ORM-модели Item с нормализацией атрибутов.
 
@@ -66,7 +124,11 @@ async def _serialize_item(item: Item, db: AsyncSession) -> ItemOut:
     Returns:
         Объект ItemOut для ответа API.
     """
-    tags = await _item_tags(item.id, db)
+    return _item_out(item, await _item_tags(item.id, db))
+
+
+def _item_out(item: Item, tags: list[str]) -> ItemOut:
+    """Строит ItemOut из ORM-модели и уже загруженных тегов."""
     attrs: dict = item.attributes or {}
     # Исторически `links` могли лежать и как список, и как JSON-строка.
     # Для ответа всегда приводим к `list[str]`.
@@ -118,6 +180,74 @@ async def _serialize_item(item: Item, db: AsyncSession) -> ItemOut:
     )
 
 
+def _create_data(payload: ItemCreate) -> tuple[dict, list[str]]:
+    """Готовит поля нового предмета и список тегов из ItemCreate.
+
+    Статус, пришедший строкой, приводится к enum, а поля карточки, которые
+    физически хранятся в JSON `attributes`, переносятся туда.
+
+    Args:
+        payload: Данные для создания предмета.
+
+    Returns:
+        Кортеж из словаря полей для `Item(...)` и списка тегов.
+    """
+    data = payload.dict(exclude_none=True)
+    # На клиенте статус может приехать строкой; нормализуем в enum.
+    status = data.get("status", ItemStatus.OK)
+    if isinstance(status, str):
+        try:
+            data["status"] = ItemStatus(status)
+        except Exception:
+            data["status"] = ItemStatus.OK
+    tags = data.pop("tags", [])
+    attrs = data.get("attributes") or {}
+    links = data.pop("links", None)
+    for attr_key in ["purchase_datetime", "quantity", "manufacturer", "origin_country", "location_ids"]:
+        val = data.pop(attr_key, None)
+        if val is not None:
+            attrs[attr_key] = val
+    if links is not None:
+        attrs["links"] = list(links)
+    if attrs:
+        data["attributes"] = attrs
+    data.setdefault("workspace_id", 2)
+    return data, tags
+
+
+def _apply_update(item: Item, payload: ItemUpdate) -> list[str] | None:
+    """Применяет частичное обновление к предмету без коммита.
+
+    Args:
+        item: ORM-объект предмета.
+        payload: Данные для обновления.
+
+    Returns:
+        Новый список тегов или None, если теги не передавались.
+    """
+    data = payload.dict(exclude_unset=True)
+    tags = data.pop("tags", None)
+    existing_attrs: dict = item.attributes or {}
+    attrs = data.get("attributes") or {}
+    # Обновление attributes делаем через merge, чтобы не потерять
+    # уже сохранённые JSON-поля, которые не пришли в PATCH.
+    attrs = {**existing_attrs, **attrs}
+    # Эти поля логически относятся к карточке предмета, но физически
+    # тоже лежат внутри JSON `attributes`.
+    links = data.pop("links", None)
+    for attr_key in ["purchase_datetime", "quantity", "manufacturer", "origin_country", "location_ids"]:
+        val = data.pop(attr_key, None)
+        if val is not None:
+            attrs[attr_key] = val
+    if links is not None:
+        attrs["links"] = list(links)
+    if attrs:
+        data["attributes"] = attrs
+    for k, v in data.items():
+        setattr(item, k, v)
+    return tags
+
+
 @router.get("/", response_model=list[ItemOut])
 async def list_items(db: AsyncSession = Depends(get_db)) -> list[ItemOut]:
     """Возвращает список последних предметов в workspace.
@@ -134,7 +264,7 @@ async def list_items(db: AsyncSession = Depends(get_db)) -> list[ItemOut]:
     """
     result = await db.execute(select(Item).order_by(Item.created_at.desc()).limit(100))
     items = result.scalars().all()
-    return [await _serialize_item(item, db) for item in items]
+    return await _serialize_items(items, db)
 
 
 @router.get("/search", response_model=list[ItemOut])
@@ -169,7 +299,7 @@ async def search_items(
         stmt = stmt.where(Item.status == status)
     rows = await db.execute(stmt)
     items = rows.scalars().all()
-    return [await _serialize_item(item, db) for item in items]
+    return await _serialize_items(items, db)
 
 
 @router.post("/", response_model=ItemOut, status_code=status.HTTP_201_CREATED)
@@ -193,26 +323,7 @@ async def create_item(
     Returns:
         Созданный предмет в формате ItemOut.
     """
-    data = payload.dict(exclude_none=True)
-    # На клиенте статус может приехать строкой; нормализуем в enum.
-    status = data.get("status", ItemStatus.OK)
-    if isinstance(status, str):
-        try:
-            data["status"] = ItemStatus(status)
-        except Exception:
-            data["status"] = ItemStatus.OK
-    tags = data.pop("tags", [])
-    attrs = data.get("attributes") or {}
-    links = data.pop("links", None)
-    for attr_key in ["purchase_datetime", "quantity", "manufacturer", "origin_country", "location_ids"]:
-        val = data.pop(attr_key, None)
-        if val is not None:
-            attrs[attr_key] = val
-    if links is not None:
-        attrs["links"] = list(links)
-    if attrs:
-        data["attributes"] = attrs
-    data.setdefault("workspace_id", 2)
+    data, tags = _create_data(payload)
     item = Item(**data, owner_user_id=user.id)
     db.add(item)
     await db.commit()
@@ -223,6 +334,270 @@ async def create_item(
     return await _serialize_item(item, db)
 
 
+def _tag_names(tags: list[str] | None) -> list[str]:
+    """Чистит список тегов: обрезает пробелы, убирает пустые и точные повторы, сохраняя порядок.
+
+    Регистр здесь не сворачивается: «Tools» и «tools» сводит к одному тегу
+    база (`_ensure_tags`), тем же `lower()`, что и в уникальном индексе.
+    """
+    return list(dict.fromkeys(name for name in ((tag or "").strip() for tag in tags or []) if name))
+
+
+async def _ensure_tags(db: AsyncSession, workspace_id: int, names: list[str]) -> dict[str, int]:
+    """Находит или создаёт теги workspace и возвращает их id.
+
+    Теги уникальны по `(workspace_id, lower(name))`: «Tools» и «tools» — один
+    тег, хранится первое написание. Регистр сворачивает только SQL `lower()`:
+    запрошенные названия сопоставляются с тегами внутри запроса, поэтому
+    поиск совпадает с уникальным индексом на любой СУБД (у SQLite `lower()`
+    знает только ASCII). Существующие теги читаются одним SELECT на
+    `TAG_LOOKUP_CHUNK` названий, недостающие вставляются одним
+    `INSERT ... ON CONFLICT DO NOTHING RETURNING` на `TAG_INSERT_CHUNK`.
+    Названия, которые конфликт пропустил (параллельный запрос или другое
+    написание в том же пакете), дочитываются.
+
+    Args:
+        db: Асинхронная сессия базы данных.
+        workspace_id: Идентификатор workspace.
+        names: Очищенные названия тегов (см. `_tag_names`).
+
+    Returns:
+        Словарь `запрошенное название -> id тега`.
+    """
+    if not names:
+        return {}
+
+    async def _lookup(wanted_names: list[str]) -> dict[str, int]:
+        found: dict[str, int] = {}
+        for start in range(0, len(wanted_names), TAG_LOOKUP_CHUNK):
+            chunk = wanted_names[start:start + TAG_LOOKUP_CHUNK]
+            wanted = union_all(*(select(literal(name, String).label("name")) for name in chunk)).subquery("wanted")
+            rows = await db.execute(
+                select(wanted.c.name, Tag.id).join(
+                    Tag, and_(Tag.workspace_id == workspace_id, func.lower(Tag.name) == func.lower(wanted.c.name))
+                )
+            )
+            found.update(rows.tuples().all())
+        return found
+
+    found = await _lookup(names)
+    missing = [name for name in names if name not in found]
+    if not missing:
+        return found
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    created: list[int] = []
+    for start in range(0, len(missing), TAG_INSERT_CHUNK):
+        chunk = missing[start:start + TAG_INSERT_CHUNK]
+        stmt = (
+            dialect.insert(Tag)
+            .values([{"workspace_id": workspace_id, "name": name} for name in chunk])
+            .on_conflict_do_nothing(index_elements=[Tag.workspace_id, func.lower(Tag.name)])
+            .returning(Tag.name, Tag.id)
+        )
+        for name, tag_id in (await db.execute(stmt)).all():
+            found[name] = tag_id
+            created.append(tag_id)
+    await record_changes(db, SyncEntity.TAG, created, workspace_id)
+    skipped = [name for name in missing if name not in found]
+    if skipped:
+        found.update(await _lookup(skipped))
+    return found
+
+
+async def _set_item_tags(
+    db: AsyncSession,
+    workspace_id: int,
+    wanted: dict[int, list[str]],
+    new_item_ids: set[int] | frozenset[int] = frozenset(),
+) -> None:
+    """Приводит теги предметов к заданным наборам, трогая только разницу.
+
+    Текущие связи читаются одним запросом, лишние удаляются одним DELETE,
+    недостающие добавляются одним executemany; если набор не изменился,
+    записей нет вовсе.
+
+    Args:
+        db: Асинхронная сессия базы данных.
+        workspace_id: Workspace предметов и тегов.
+        wanted: Новые наборы тегов по id предмета; пустой список снимает все теги.
+        new_item_ids: Только что созданные предметы — у них связей ещё нет, их не читаем.
+    """
+    if not wanted:
+        return
+    have: set[tuple[int, int]] = set()
+    known = [item_id for item_id in wanted if item_id not in new_item_ids]
+    if known:
+        rows = await db.execute(select(ItemTag.item_id, ItemTag.tag_id).where(ItemTag.item_id.in_(known)))
+        have = {(item_id, tag_id) for item_id, tag_id in rows.all()}
+    tag_ids = await _ensure_tags(db, workspace_id, _tag_names([n for names in wanted.values() for n in names]))
+    want = {(item_id, tag_ids[name]) for item_id, names in wanted.items() for name in names if name in tag_ids}
+    stale = have - want
+    if stale:
+        await db.execute(
+            delete(ItemTag)
+            .where(tuple_(ItemTag.item_id, ItemTag.tag_id).in_(sorted(stale)))
+            .execution_options(synchronize_session=False)
+        )
+    added = want - have
+    if added:
+        await db.execute(insert(ItemTag), [{"item_id": item_id, "tag_id": tag_id} for item_id, tag_id in sorted(added)])
+    changed = {item_id for item_id, _ in stale | added} - set(new_item_ids)
+    await record_changes(db, SyncEntity.ITEM, sorted(changed), workspace_id)
+
+
+def _insert_rows(rows: list[dict], **common) -> list[dict]:
+    """Приводит строки новых предметов к общему набору колонок.
+
+    Один `INSERT ... RETURNING` на пакет возможен, только если у всех строк
+    одинаковые ключи; отсутствующие поля получают скалярный default колонки.
+    """
+    keys = dict.fromkeys(key for row in rows for key in row)
+    defaults = {}
+    for key in keys:
+        default = Item.__table__.c[key].default
+        defaults[key] = default.arg if default is not None and default.is_scalar else None
+    return [{**defaults, **row, **common} for row in rows]
+
+
+def _row_errors(exc: ValidationError) -> list[str]:
+    return [f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()]
+
+
+@router.post("/batch", response_model=ItemBatchResult)
+async def batch_items(
+    payload: ItemBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> ItemBatchResult:
+    """Создаёт и обновляет пачку предметов в одной транзакции.
+
+    Заводит `ItemBatch`, к которому привязываются созданные предметы. Строки
+    без `id` создают предметы в `workspace_id` пакета (локация по умолчанию —
+    `location_id` пакета), строки с `id` обновляют предметы этого workspace.
+    Число запросов не зависит от размера пакета: локации и обновляемые
+    предметы проверяются одним запросом каждые, новые предметы вставляются
+    одним `INSERT ... RETURNING id` в порядке строк, теги — через
+    `_ensure_tags`, связи item-tag — одним executemany.
+
+    Args:
+        payload: Пакет строк.
+        db: Асинхронная сессия базы данных.
+        user: Текущий пользователь.
+
+    Returns:
+        Сводка и результат по каждой строке в исходном порядке.
+
+    Raises:
+        HTTPException: Если локация пакета не найдена в workspace.
+    """
+    workspace_id = payload.workspace_id
+    results: dict[int, ItemBatchRowResult] = {}
+    creates: list[tuple[int, dict, list[str]]] = []
+    updates: list[tuple[int, int, ItemUpdate]] = []
+    for index, raw in enumerate(payload.items):
+        row = dict(raw)
+        item_id = row.pop("id", None)
+        try:
+            if item_id is None:
+                row["workspace_id"] = workspace_id
+                if row.get("location_id") is None:
+                    row["location_id"] = payload.location_id
+                data, tags = _create_data(ItemCreate.model_validate(row))
+                tags = _tag_names(tags)
+                creates.append((index, data, tags))
+            else:
+                update = ItemUpdate.model_validate(row)
+                updates.append((index, int(item_id), update))
+                tags = _tag_names(update.tags)
+        except ValidationError as exc:
+            results[index] = ItemBatchRowResult(index=index, status="error", errors=_row_errors(exc))
+            continue
+        except (TypeError, ValueError):
+            results[index] = ItemBatchRowResult(index=index, status="error", errors=["id: must be an integer"])
+            continue
+        if any(len(name) > 128 for name in tags):
+            results[index] = ItemBatchRowResult(index=index, status="error", errors=["tags: longer than 128 characters"])
+            creates = [entry for entry in creates if entry[0] != index]
+            updates = [entry for entry in updates if entry[0] != index]
+
+    location_ids = {data.get("location_id") for _, data, _ in creates}
+    location_ids |= {update.location_id for _, _, update in updates}
+    location_ids |= {payload.location_id}
+    location_ids.discard(None)
+    known_locations: set[int] = set()
+    if location_ids:
+        known_locations = set(
+            (
+                await db.execute(
+                    select(Location.id).where(Location.id.in_(location_ids), Location.workspace_id == workspace_id)
+                )
+            ).scalars()
+        )
+    if payload.location_id is not None and payload.location_id not in known_locations:
+        raise HTTPException(status_code=400, detail="Batch location not found in workspace")
+
+    def _location_ok(index: int, location_id: int | None) -> bool:
+        if location_id is None or location_id in known_locations:
+            return True
+        results[index] = ItemBatchRowResult(index=index, status="error", errors=["location_id: not found in workspace"])
+        return False
+
+    creates = [entry for entry in creates if _location_ok(entry[0], entry[1].get("location_id"))]
+    updates = [entry for entry in updates if _location_ok(entry[0], entry[2].location_id)]
+
+    existing: dict[int, Item] = {}
+    if updates:
+        rows = await db.execute(
+            select(Item).where(Item.id.in_({item_id for _, item_id, _ in updates}), Item.workspace_id == workspace_id)
+        )
+        existing = {item.id: item for item in rows.scalars()}
+
+    tag_sets: dict[int, list[str]] = {}
+    updated_count = 0
+    for index, item_id, update in updates:
+        item = existing.get(item_id)
+        if item is None:
+            results[index] = ItemBatchRowResult(index=index, status="error", errors=["id: item not found in workspace"])
+            continue
+        tags = _apply_update(item, update)
+        if tags is not None:
+            tag_sets[item.id] = _tag_names(tags)
+        results[index] = ItemBatchRowResult(index=index, status="updated", item_id=item.id)
+        updated_count += 1
+
+    batch: ItemBatch | None = None
+    new_ids: list[int] = []
+    if creates:
+        batch = ItemBatch(
+            workspace_id=workspace_id, location_id=payload.location_id, title=payload.title, created_by=user.id
+        )
+        db.add(batch)
+    await db.flush()
+
+    if creates:
+        rows = _insert_rows([data for _, data, _ in creates], owner_user_id=user.id, batch_id=batch.id)
+        new_ids = (
+            await db.execute(insert(Item).returning(Item.id, sort_by_parameter_order=True), rows)
+        ).scalars().all()
+        for (index, _, tags), item_id in zip(creates, new_ids):
+            results[index] = ItemBatchRowResult(index=index, status="created", item_id=item_id)
+            if tags:
+                tag_sets[item_id] = tags
+        await record_changes(db, SyncEntity.ITEM, new_ids, workspace_id)
+
+    await _set_item_tags(db, workspace_id, tag_sets, new_item_ids=set(new_ids))
+    await db.commit()
+
+    ordered = [results[index] for index in sorted(results)]
+    return ItemBatchResult(
+        batch_id=batch.id if batch else None,
+        created=len(creates),
+        updated=updated_count,
+        failed=sum(1 for row in ordered if row.status == "error"),
+        results=ordered,
+    )
+
+
 @router.get("/{item_id}", response_model=ItemOut)
 async def get_item(item_id: int, db: AsyncSession = Depends(get_db)) -> Item:
     """Возвращает детальную информацию о предмете по его ID.
@@ -274,26 +649,7 @@ async def update_item(
     item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-    data = payload.dict(exclude_unset=True)
-    tags = data.pop("tags", None)
-    existing_attrs: dict = item.attributes or {}
-    attrs = data.get("attributes") or {}
-    # Обновление attributes делаем через merge, чтобы не потерять
-    # уже сохранённые JSON-поля, которые не пришли в PATCH.
-    attrs = {**existing_attrs, **attrs}
-    # Эти поля логически относятся к карточке предмета, но физически
-    # тоже лежат внутри JSON `attributes`.
-    links = data.pop("links", None)
-    for attr_key in ["purchase_datetime", "quantity", "manufacturer", "origin_country", "location_ids"]:
-        val = data.pop(attr_key, None)
-        if val is not None:
-            attrs[attr_key] = val
-    if links is not None:
-        attrs["links"] = list(links)
-    if attrs:
-        data["attributes"] = attrs
-    for k, v in data.items():
-        setattr(item, k, v)
+    tags = _apply_update(item, payload)
     await db.commit()
     if tags is not None:
         await _upsert_tags(item.id, item.workspace_id, tags, db)
@@ -397,20 +753,12 @@ async def list_item_media(item_id: int, db: AsyncSession = Depends(get_db)):
         .order_by(Media.id.desc())
     )
     media_rows = (await db.execute(stmt)).scalars().all()
+    # Последние детекции разрешаются пачкой по `Media.latest_detection_id`.
+    latest = await _latest_detections(db, (media.id for media in media_rows))
     result = []
     for media in media_rows:
-        det_stmt = (
-            select(AIDetection)
-            .where(AIDetection.media_id == media.id)
-            .order_by(AIDetection.id.desc())
-            .limit(1)
-        )
-        det = (await db.execute(det_stmt)).scalar_one_or_none()
-        obj_stmt = select(AIDetectionObject).where(
-            AIDetectionObject.detection_id == (det.id if det else -1)
-        )
-        objects = (await db.execute(obj_stmt)).scalars().all() if det else []
-        result.append(_serialize_media(media, det, list(objects)))
+        det, objects = latest.get(media.id, (None, []))
+        result.append(_serialize_media(media, det, objects))
     return result
 
 
@@ -490,18 +838,19 @@ async def unlink_media_from_item(
                 pass
             # Детекции хранятся отдельно и тоже должны исчезнуть, иначе
             # AI history останется указывать на уже удалённое медиа.
-            await db.execute(delete(AIDetection).where(AIDetection.media_id == media_id))
+            removed = await db.execute(
+                delete(AIDetection).where(AIDetection.media_id == media_id).returning(AIDetection.id)
+            )
+            await record_changes(db, SyncEntity.DETECTION, removed.scalars().all(), media.workspace_id, deleted=True)
     await db.commit()
     return None
 
 
 async def _upsert_tags(item_id: int, workspace_id: int, tags: list[str], db: AsyncSession):
-    """Обновляет набор тегов для предмета, заменяя существующие.
+    """Обновляет набор тегов предмета.
 
-    Функция удаляет все текущие связи предмета с тегами, затем создаёт
-    новые связи для переданного списка тегов. Если тег не существует,
-    он создаётся в базе данных. Этот подход прост и эффективен для
-    небольших списков тегов.
+    Недостающие теги создаются, связи меняются по разнице с текущим набором
+    (см. `_set_item_tags`), поэтому PATCH с теми же тегами ничего не пишет.
 
     Args:
         item_id: Идентификатор предмета.
@@ -509,19 +858,4 @@ async def _upsert_tags(item_id: int, workspace_id: int, tags: list[str], db: Asy
         tags: Список названий тегов.
         db: Асинхронная сессия базы данных.
     """
-    # Сначала удаляем старые связи item-tag.
-    await db.execute(delete(ItemTag).where(ItemTag.item_id == item_id))
-    if not tags:
-        return
-    names = [t.strip() for t in tags if t.strip()]
-    if not names:
-        return
-    existing_stmt = select(Tag).where(Tag.name.in_(names), Tag.workspace_id == workspace_id)
-    existing = {t.name: t for t in (await db.execute(existing_stmt)).scalars().all()}
-    for name in names:
-        tag = existing.get(name)
-        if not tag:
-            tag = Tag(workspace_id=workspace_id, name=name)
-            db.add(tag)
-            await db.flush()
-        db.add(ItemTag(item_id=item_id, tag_id=tag.id))
+    await _set_item_tags(db, workspace_id, {item_id: _tag_names(tags)})
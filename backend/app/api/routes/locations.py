@@ -2,18 +2,25 @@
 
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import String, case, func, literal, literal_column, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
+from app.db.change_log import record_changes
 from app.models.location import Location
 from app.models.item import Item
 from app.models.media import Media
-from app.models.enums import MediaType
-from app.schemas.location import LocationCreate, LocationOut, LocationUpdate
-from app.schemas.item import ItemOut
-from app.api.routes.items import _serialize_item
+from app.models.enums import MediaType, SyncEntity
+from app.schemas.location import (
+    LocationBreadcrumb,
+    LocationCreate,
+    LocationItemOut,
+    LocationOut,
+    LocationTreeNode,
+    LocationUpdate,
+)
+from app.api.routes.items import _serialize_items
 
 router = APIRouter(prefix="/locations", tags=["locations"])
 logger = logging.getLogger(__name__)
@@ -65,26 +72,35 @@ async def _load_parent(db: AsyncSession, parent_id: int | None, current_id: int
         raise HTTPException(status_code=400, detail="Parent not found")
     if current_id and parent_id == current_id:
         raise HTTPException(status_code=400, detail="Parent cannot be self")
-    # Не даём сделать цикл в дереве: поднимаемся по предкам и проверяем,
-    # не пытаемся ли в какой-то момент сослаться на текущую ноду.
-    cursor = parent
-    while cursor and cursor.parent_id:
-        if current_id and cursor.parent_id == current_id:
+    # Не даём сделать цикл в дереве: текущая нода не должна быть среди предков
+    # нового родителя. Предки собираются одним рекурсивным запросом; UNION
+    # вместо UNION ALL завершает обход даже на уже испорченных данных с циклом.
+    if current_id:
+        ancestors = select(Location.id, Location.parent_id).where(Location.id == parent.parent_id).cte(
+            "location_ancestors", recursive=True
+        )
+        ancestors = ancestors.union(
+            select(Location.id, Location.parent_id).join(ancestors, Location.id == ancestors.c.parent_id)
+        )
+        cycle = await db.scalar(select(ancestors.c.id).where(ancestors.c.id == current_id).limit(1))
+        if cycle is not None:
             raise HTTPException(status_code=400, detail="Parent creates cycle")
-        cursor = await db.get(Location, cursor.parent_id)
     return parent
 
 
 async def _update_descendant_paths(
-    db: AsyncSession, old_path: str | None, new_path: str | None
+    db: AsyncSession, location_id: int, old_path: str | None, new_path: str | None
 ) -> None:
     """Обновляет materialized path у всех потомков после перемещения узла.
 
-    Когда локация перемещается в дереве, необходимо обновить пути всех её потомков,
-    заменив старую часть пути на новую.
+    Пути переписываются одним `UPDATE ... SET path = :new || substr(path, ...)`
+    без загрузки потомков в ORM. Префикс `old.` отбирает строки по индексу
+    `path`, а подзапрос по `parent_id` оставляет только настоящих потомков:
+    путь собирается из имён и совпадает у одноимённых соседей.
 
     Args:
         db (AsyncSession): Асинхронная сессия базы данных.
+        location_id (int): ID перемещённой локации.
         old_path (str | None): Старый путь локации.
         new_path (str | None): Новый путь локации.
 
@@ -96,10 +112,24 @@ async def _update_descendant_paths(
     """
     if not old_path or not new_path or old_path == new_path:
         return
-    pattern = f"{old_path}.%"
-    descendants = (await db.execute(select(Location).where(Location.path.like(pattern)))).scalars().all()
-    for child in descendants:
-        child.path = new_path + child.path[len(old_path):]
+    descendants = select(Location.id).where(Location.parent_id == location_id).cte("location_descendants", recursive=True)
+    descendants = descendants.union_all(select(Location.id).join(descendants, Location.parent_id == descendants.c.id))
+    stmt = (
+        update(Location)
+        .where(
+            Location.path.startswith(f"{old_path}.", autoescape=True),
+            Location.id.in_(select(descendants.c.id)),
+        )
+        .values(path=literal(new_path, String) + func.substr(Location.path, len(old_path) + 1))
+        .returning(Location.id, Location.workspace_id)
+        # Потомки в сессию не загружаются, синхронизировать нечего.
+        .execution_options(synchronize_session=False)
+    )
+    by_workspace: dict[int, list[int]] = {}
+    for moved_id, workspace_id in (await db.execute(stmt)).all():
+        by_workspace.setdefault(workspace_id, []).append(moved_id)
+    for workspace_id, moved_ids in by_workspace.items():
+        await record_changes(db, SyncEntity.LOCATION, moved_ids, workspace_id)
 
 
 async def _validate_photo_media(db: AsyncSession, media_id: int) -> Media:
@@ -170,6 +200,136 @@ async def list_locations(db: AsyncSession = Depends(get_db)) -> list[Location]:
     return res.scalars().all()
 
 
+def _tree_statement(workspace_id: int | None, root_id: int | None, max_depth: int | None):
+    """Строит единый запрос дерева со счётчиками по поддеревьям.
+
+    Первый рекурсивный CTE (`scope`) обходит узлы от корней (или от детей
+    `root_id`) до `max_depth`, второй (`closure`) для каждого такого узла
+    собирает всех потомков без ограничения глубины. Прямые счётчики предметов
+    и медиа агрегируются по `location_id` только для узлов замыкания и
+    суммируются по нему.
+    Связь идёт по `parent_id`: `path` строится из имён и у одноимённых соседей
+    совпадает, поэтому для агрегатов по префиксу он не годится.
+    """
+    start = select(Location.id, literal_column("0").label("depth"))
+    start = start.where(Location.parent_id == root_id) if root_id is not None else start.where(Location.parent_id.is_(None))
+    if workspace_id is not None:
+        start = start.where(Location.workspace_id == workspace_id)
+    scope = start.cte("tree_scope", recursive=True)
+    step = select(Location.id, (scope.c.depth + 1).label("depth")).join(scope, Location.parent_id == scope.c.id)
+    if max_depth is not None:
+        step = step.where(scope.c.depth < max_depth)
+    scope = scope.union_all(step)
+
+    closure = select(
+        scope.c.id.label("ancestor_id"), scope.c.id.label("id"), literal_column("0").label("distance")
+    ).cte("tree_closure", recursive=True)
+    closure = closure.union_all(
+        select(closure.c.ancestor_id, Location.id, (closure.c.distance + 1).label("distance")).join(
+            closure, Location.parent_id == closure.c.id
+        )
+    )
+
+    item_counts = (
+        select(Item.location_id.label("location_id"), func.count().label("cnt"))
+        .where(Item.location_id.in_(select(closure.c.id)))
+        .group_by(Item.location_id)
+        .subquery("tree_items")
+    )
+    media_counts = (
+        select(Media.location_id.label("location_id"), func.count().label("cnt"))
+        .where(Media.location_id.in_(select(closure.c.id)))
+        .group_by(Media.location_id)
+        .subquery("tree_media")
+    )
+    direct_items = func.coalesce(item_counts.c.cnt, 0)
+    direct_media = func.coalesce(media_counts.c.cnt, 0)
+    totals = (
+        select(
+            closure.c.ancestor_id.label("id"),
+            func.sum(direct_items).label("total_items"),
+            func.sum(direct_media).label("total_media"),
+            func.sum(case((closure.c.distance == 1, 1), else_=0)).label("child_count"),
+            func.sum(case((closure.c.distance == 0, direct_items), else_=0)).label("direct_items"),
+            func.sum(case((closure.c.distance == 0, direct_media), else_=0)).label("direct_media"),
+        )
+        .select_from(closure)
+        .outerjoin(item_counts, item_counts.c.location_id == closure.c.id)
+        .outerjoin(media_counts, media_counts.c.location_id == closure.c.id)
+        .group_by(closure.c.ancestor_id)
+        .subquery("tree_totals")
+    )
+    return (
+        select(
+            Location,
+            scope.c.depth,
+            totals.c.child_count,
+            totals.c.direct_items,
+            totals.c.direct_media,
+            totals.c.total_items,
+            totals.c.total_media,
+        )
+        .join(scope, scope.c.id == Location.id)
+        .join(totals, totals.c.id == Location.id)
+        .order_by(scope.c.depth, Location.id)
+    )
+
+
+@router.get("/tree", response_model=list[LocationTreeNode])
+async def location_tree(
+    workspace_id: int | None = None,
+    root_id: int | None = None,
+    depth: int | None = Query(default=None, ge=0),
+    db: AsyncSession = Depends(get_db),
+) -> list[LocationTreeNode]:
+    """Возвращает дерево локаций со счётчиками предметов и медиа одним запросом.
+
+    Без `root_id` отдаёт корни (в пределах `workspace_id`, если задан), с
+    `root_id` — детей этой локации, что позволяет раскрывать поддеревья лениво.
+    `depth` ограничивает глубину вложенности относительно верхнего уровня
+    (0 — только верхний уровень); счётчики `total_*` всегда учитывают всё поддерево.
+
+    Args:
+        workspace_id (int | None): Фильтр по workspace.
+        root_id (int | None): Локация, чьё поддерево раскрывается.
+        depth (int | None): Максимальная глубина вложенности.
+        db (AsyncSession): Асинхронная сессия базы данных.
+
+    Returns:
+        list[LocationTreeNode]: Узлы верхнего уровня с вложенными детьми.
+
+    Raises:
+        HTTPException: Если `root_id` не найден.
+    """
+    rows = (await db.execute(_tree_statement(workspace_id, root_id, depth))).all()
+    if root_id is not None and not rows and not await db.get(Location, root_id):
+        raise HTTPException(status_code=404, detail="Location not found")
+    nodes: dict[int, LocationTreeNode] = {}
+    top: list[LocationTreeNode] = []
+    for loc, node_depth, children, items, media, total_items, total_media in rows:
+        node = LocationTreeNode(
+            id=loc.id,
+            workspace_id=loc.workspace_id,
+            parent_id=loc.parent_id,
+            name=loc.name,
+            kind=loc.kind,
+            path=loc.path,
+            photo_media_id=loc.photo_media_id,
+            depth=node_depth,
+            # На Postgres sum() по count() возвращает numeric.
+            child_count=int(children),
+            item_count=int(items),
+            media_count=int(media),
+            total_item_count=int(total_items),
+            total_media_count=int(total_media),
+        )
+        nodes[loc.id] = node
+        # Строки идут по возрастанию глубины, поэтому родитель уже разобран.
+        parent = nodes.get(loc.parent_id) if node_depth else None
+        (parent.children if parent else top).append(node)
+    return top
+
+
 @router.post("", response_model=LocationOut, status_code=status.HTTP_201_CREATED)
 @router.post("/", response_model=LocationOut, status_code=status.HTTP_201_CREATED)
 async def create_location(payload: LocationCreate, db: AsyncSession = Depends(get_db)) -> Location:
@@ -254,7 +414,7 @@ async def update_location(location_id: int, payload: LocationUpdate, db: AsyncSe
         new_path = _build_location_path(parent, name)
         old_path = loc.path
         loc.path = new_path
-        await _update_descendant_paths(db, old_path, new_path)
+        await _update_descendant_paths(db, loc.id, old_path, new_path)
     for k, v in data.items():
         if k in {"photo_media_id", "parent_id", "name"}:
             continue
@@ -296,7 +456,7 @@ async def clear_location_parent(location_id: int, db: AsyncSession = Depends(get
     old_path = loc.path
     loc.parent_id = None
     loc.path = _build_location_path(None, loc.name)
-    await _update_descendant_paths(db, old_path, loc.path)
+    await _update_descendant_paths(db, loc.id, old_path, loc.path)
     await db.commit()
     logger.info("location.parent.clear id=%s", location_id)
     return None
@@ -322,31 +482,92 @@ async def delete_location(location_id: int, db: AsyncSession = Depends(get_db)):
     loc = await db.get(Location, location_id)
     if not loc:
         raise HTTPException(status_code=404, detail="Location not found")
+    # `location_id` предметов обнуляет сам flush, хук журнала этого не видит.
+    orphaned = (await db.execute(select(Item.id).where(Item.location_id == location_id))).scalars().all()
+    await record_changes(db, SyncEntity.ITEM, orphaned, loc.workspace_id)
     await db.delete(loc)
     await db.commit()
     return None
 
 
-@router.get("/{location_id}/items", response_model=list[ItemOut])
-async def items_for_location(location_id: int, db: AsyncSession = Depends(get_db)) -> list[ItemOut]:
-    """Возвращает предметы, лежащие в конкретной локации.
+async def _breadcrumbs(db: AsyncSession, location_ids: set[int]) -> dict[int, list[LocationBreadcrumb]]:
+    """Пути от корня до каждой из локаций, собранные одним рекурсивным запросом.
 
-    Выбирает все предметы, привязанные к данной локации, сортирует по времени создания
-    (новые первыми) и сериализует их с полной информацией.
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        location_ids (set[int]): ID локаций.
+
+    Returns:
+        dict[int, list[LocationBreadcrumb]]: Цепочка от корня до локации включительно.
+    """
+    if not location_ids:
+        return {}
+    columns = (Location.id, Location.parent_id, Location.name, Location.kind)
+    chain = select(*columns).where(Location.id.in_(location_ids)).cte("location_chain", recursive=True)
+    chain = chain.union(select(*columns).join(chain, Location.id == chain.c.parent_id))
+    nodes = {row.id: row for row in (await db.execute(select(chain))).all()}
+    result: dict[int, list[LocationBreadcrumb]] = {}
+    for location_id in location_ids:
+        crumbs: list[LocationBreadcrumb] = []
+        node = nodes.get(location_id)
+        while node is not None and len(crumbs) <= len(nodes):
+            crumbs.append(LocationBreadcrumb(id=node.id, name=node.name, kind=node.kind))
+            node = nodes.get(node.parent_id)
+        result[location_id] = crumbs[::-1]
+    return result
+
+
+@router.get("/{location_id}/items", response_model=list[LocationItemOut])
+async def items_for_location(
+    location_id: int,
+    recursive: bool = False,
+    limit: int | None = Query(default=None, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    db: AsyncSession = Depends(get_db),
+) -> list[LocationItemOut]:
+    """Возвращает предметы, лежащие в конкретной локации или во всём её поддереве.
+
+    Выбирает предметы, привязанные к данной локации, сортирует по времени создания
+    (новые первыми) и сериализует их с полной информацией. С `recursive=true`
+    отдаёт предметы всего поддерева одним запросом: потомки собираются
+    рекурсивным CTE по индексу `parent_id`, выдача постраничная (по умолчанию
+    100 штук), у каждого предмета — `breadcrumb` от корня до его локации.
 
     Args:
         location_id (int): ID локации.
+        recursive (bool): Включить предметы всех вложенных локаций.
+        limit (int | None): Размер страницы (в режиме `recursive` по умолчанию 100).
+        offset (int): Смещение страницы.
         db (AsyncSession): Асинхронная сессия базы данных.
 
     Returns:
-        list[ItemOut]: Список сериализованных предметов.
+        list[LocationItemOut]: Список сериализованных предметов.
 
     Raises:
         Нет исключений (если локация не существует, вернется пустой список).
     """
-    stmt = select(Item).where(Item.location_id == location_id).order_by(Item.created_at.desc())
+    stmt = select(Item).order_by(Item.created_at.desc(), Item.id.desc())
+    if recursive:
+        # Поддерево по parent_id, а не по префиксу path: путь собирается из имён
+        # и совпадает у одноимённых соседей.
+        subtree = select(Location.id).where(Location.id == location_id).cte("location_subtree", recursive=True)
+        subtree = subtree.union_all(select(Location.id).join(subtree, Location.parent_id == subtree.c.id))
+        stmt = stmt.where(Item.location_id.in_(select(subtree.c.id))).limit(limit or 100)
+    else:
+        stmt = stmt.where(Item.location_id == location_id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+    if offset:
+        stmt = stmt.offset(offset)
     items = (await db.execute(stmt)).scalars().all()
-    return [await _serialize_item(item, db) for item in items]
+    serialized = await _serialize_items(items, db)
+    if not recursive:
+        return [LocationItemOut(**item.model_dump()) for item in serialized]
+    crumbs = await _breadcrumbs(db, {item.location_id for item in items})
+    return [
+        LocationItemOut(**out.model_dump(), breadcrumb=crumbs.get(item.location_id, []))
+        for item, out in zip(items, serialized)
+    ]
 
 
 @router.get("/{location_id}/media")
@@ -17,18 +17,21 @@ from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Upload
 from fastapi.responses import FileResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import contains_eager, selectinload
 
 from app.api.deps import get_db
 from app.core.config import settings
+from app.core.metrics import counter
 from app.models.ai import AIDetection, AIDetectionObject, AIDetectionStatus
 from app.models.enums import MediaType, UploadStatus
 from app.models.media import ItemMedia, Media, MediaUploadHistory
 from app.schemas.media import MediaUploadHistoryOut
-from app.services.ai.pipeline import analyze_media
+from app.services.ai.pipeline import analyze_media, set_latest_detection
 from app.services.ai.video import analyze_video
 
 logger = logging.getLogger(__name__)
+
+UPLOAD_BYTES = counter("media_upload_bytes", "Байты, принятые upload-эндпоинтом, по типу медиа.", ("media_type",))
 router = APIRouter(prefix="/media", tags=["media"])
 
 SANITIZE_RE = re.compile(r"[^A-Za-z0-9._-]+")
@@ -174,38 +177,53 @@ def _make_video_thumb(src: Path, dest: Path) -> None:
     cv2.imwrite(str(dest), frame)
 
 
-async def _latest_detection(db: AsyncSession, media_id: int) -> tuple[AIDetection | None, list[AIDetectionObject]]:
-    """Возвращает последнюю детекцию по медиа вместе с объектами и кандидатами.
+async def _latest_detections(
+    db: AsyncSession, media_ids: Iterable[int]
+) -> dict[int, tuple[AIDetection, list[AIDetectionObject]]]:
+    """Возвращает последние детекции для набора медиа вместе с объектами и кандидатами.
 
-    Выполняет запрос к базе данных для получения самой свежей AI-детекции для данного медиафайла,
-    а также всех связанных объектов детекции с их кандидатами.
+    Последняя детекция берётся по указателю `Media.latest_detection_id`, поэтому
+    вместо `ORDER BY ... LIMIT 1` на каждое медиа выполняется фиксированное число
+    запросов по первичным ключам: детекции, объекты, кандидаты.
 
     Args:
         db (AsyncSession): Асинхронная сессия базы данных.
-        media_id (int): ID медиафайла.
+        media_ids (Iterable[int]): ID медиафайлов.
 
     Returns:
-        tuple[AIDetection | None, list[AIDetectionObject]]: Кортеж из последней детекции (или None) и списка объектов.
-
-    Raises:
-        Нет исключений, возвращает None если детекция не найдена.
+        dict[int, tuple[AIDetection, list[AIDetectionObject]]]: Детекция и её объекты по ID медиа.
+            Медиа без анализа в словарь не попадают.
     """
+    ids = {media_id for media_id in media_ids if media_id}
+    if not ids:
+        return {}
     det_stmt = (
         select(AIDetection)
-        .where(AIDetection.media_id == media_id)
-        .order_by(AIDetection.id.desc())
-        .limit(1)
-    )
-    det = (await db.execute(det_stmt)).scalar_one_or_none()
-    objects: list[AIDetectionObject] = []
-    if det:
-        obj_stmt = (
-            select(AIDetectionObject)
-            .options(selectinload(AIDetectionObject.candidates))
-            .where(AIDetectionObject.detection_id == det.id)
+        .join(Media, Media.latest_detection_id == AIDetection.id)
+        .where(Media.id.in_(ids))
+        .options(
+            contains_eager(AIDetection.media),
+            selectinload(AIDetection.objects).selectinload(AIDetectionObject.candidates),
         )
-        objects = (await db.execute(obj_stmt)).scalars().all()
-    return det, list(objects)
+    )
+    detections = (await db.execute(det_stmt)).scalars().all()
+    return {
+        det.media_id: (det, sorted(det.objects, key=lambda obj: obj.id))
+        for det in detections
+    }
+
+
+async def _latest_detection(db: AsyncSession, media_id: int) -> tuple[AIDetection | None, list[AIDetectionObject]]:
+    """Возвращает последнюю детекцию по медиа вместе с объектами и кандидатами.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        media_id (int): ID медиафайла.
+
+    Returns:
+        tuple[AIDetection | None, list[AIDetectionObject]]: Кортеж из последней детекции (или None) и списка объектов.
+    """
+    return (await _latest_detections(db, [media_id])).get(media_id, (None, []))
 
 
 def _serialize_detection(det: AIDetection | None, objects: Iterable[AIDetectionObject]) -> dict | None:
@@ -542,6 +560,7 @@ async def upload_media(
             size_bytes, file_hash = await _write_file(target_path, file, max_bytes=max_bytes)
         finally:
             await file.close()
+        UPLOAD_BYTES.inc(size_bytes, media_type=media_type_enum.value)
 
         rel_path = target_path.relative_to(base)
         rel_path_str = f"private/{rel_path}" if scope == "private" else str(rel_path)
@@ -617,7 +636,10 @@ async def upload_media(
                     analysis_status = {"detection_id": det.id, "status": det.status}
             except Exception as exc:  # noqa: BLE001
                 logger.exception("Analyze failed for media %s: %s", media.id, exc)
-                db.add(AIDetection(media_id=media.id, status=AIDetectionStatus.FAILED, raw={"error": str(exc)}))
+                failed = AIDetection(media_id=media.id, status=AIDetectionStatus.FAILED, raw={"error": str(exc)})
+                db.add(failed)
+                await db.flush()
+                await set_latest_detection(db, media.id, failed.id)
                 await db.commit()
                 analysis_status = {"status": "failed"}
 
@@ -702,12 +724,10 @@ async def upload_history(
     if location_id is not None:
         stmt = stmt.where(MediaUploadHistory.location_id == location_id)
     rows = (await db.execute(stmt)).scalars().all()
+    latest = await _latest_detections(db, (entry.media_id for entry in rows))
     result: list[MediaUploadHistoryOut] = []
     for entry in rows:
-        det: AIDetection | None = None
-        objects: list[AIDetectionObject] = []
-        if entry.media_id:
-            det, objects = await _latest_detection(db, entry.media_id)
+        det, objects = latest.get(entry.media_id, (None, []))
         file_url = f"/api/v1/media/file/{entry.media_id}" if entry.media_id else None
         thumb_url = (
             f"/api/v1/media/file/{entry.media_id}?thumb=1"
@@ -751,13 +771,11 @@ async def recent_media(
         .limit(limit)
     )
     rows = (await db.execute(stmt)).scalars().all()
+    rows = [m for m in rows if m.path.startswith("private/") == (scope == "private")]
+    latest = await _latest_detections(db, (m.id for m in rows))
     result = []
     for m in rows:
-        if scope == "public" and m.path.startswith("private/"):
-            continue
-        if scope == "private" and not m.path.startswith("private/"):
-            continue
-        det, objects = await _latest_detection(db, m.id)
+        det, objects = latest.get(m.id, (None, []))
         result.append(_serialize_media(m, det, objects))
     return result
 
@@ -0,0 +1,21 @@
+"""Эндпоинт `/metrics` в текстовом формате Prometheus."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import render
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Отдаёт in-process метрики воркера (см. `app.core.metrics`).
+
+    Каждый uvicorn-воркер отвечает своими значениями; суммирование по
+    воркерам делает Prometheus. Эндпоинт без авторизации, как и `/health`:
+    его нужно закрывать на уровне сети/прокси.
+    """
+    return PlainTextResponse(render(), media_type=PROMETHEUS_CONTENT_TYPE)
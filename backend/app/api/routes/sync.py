@@ -0,0 +1,140 @@
+"""Дельта-синхронизация для мобильного клиента.
+
+Клиент хранит водяной знак — номер последней полученной записи журнала
+`SyncChange` — и запрашивает только то, что изменилось после него. Стоимость
+ответа пропорциональна числу изменений, а не размеру инвентаря: журнал
+читается по первичному ключу, сущности загружаются по id пачкой на тип.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.api.deps import get_db
+from app.api.routes.ai import _detection_out
+from app.api.routes.items import _serialize_items
+from app.api.routes.media import _latest_detections, _serialize_media
+from app.core.config import settings
+from app.models.ai import AIDetection, AIDetectionObject
+from app.models.enums import SyncEntity
+from app.models.item import Item
+from app.models.location import Location
+from app.models.media import Media
+from app.models.sync import SyncChange
+from app.models.tag import Tag
+from app.schemas.location import LocationOut
+from app.schemas.sync import SyncOut, SyncTag, SyncTombstone
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+logger = logging.getLogger(__name__)
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite возвращает `CURRENT_TIMESTAMP` без зоны, но в UTC.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _watermark(since: int, changes: list[SyncChange]) -> tuple[int, bool]:
+    """Водяной знак страницы с учётом `sync_commit_lag_s`.
+
+    Знак не уходит дальше первой записи моложе окна: более ранний номер мог
+    достаться транзакции, которая ещё не закоммичена. Такие записи клиент
+    получит повторно при следующей синхронизации.
+
+    Returns:
+        Водяной знак и признак того, что знак был придержан окном.
+    """
+    if not changes:
+        return since, False
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.sync_commit_lag_s)
+    for change in changes:
+        if _utc(change.created_at) > cutoff:
+            return max(since, change.id - 1), True
+    return changes[-1].id, False
+
+
+@router.get("", response_model=SyncOut)
+async def sync_changes(
+    since: int = Query(default=0, ge=0),
+    workspace_id: int | None = None,
+    limit: int = Query(default=500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db),
+) -> SyncOut:
+    """Возвращает сущности, изменённые после водяного знака `since`.
+
+    Читает до `limit` записей журнала, схлопывает повторы одной сущности до
+    последнего состояния и загружает актуальные строки одним запросом на тип.
+    Сущность, удалённая внутри страницы, приходит только в `deleted`; строка,
+    исчезнувшая позже страницы, пропускается — её tombstone будет дальше.
+    `since=0` отдаёт полный снимок: миграция заполнила журнал существующими
+    строками.
+
+    Args:
+        since: Водяной знак из прошлого ответа (`0` — первая синхронизация).
+        workspace_id: Ограничить изменения одним workspace.
+        limit: Сколько записей журнала разобрать за раз.
+        db: Асинхронная сессия базы данных.
+
+    Returns:
+        Изменённые сущности, tombstones, новый водяной знак и `has_more`.
+    """
+    stmt = select(SyncChange).where(SyncChange.id > since).order_by(SyncChange.id).limit(limit + 1)
+    if workspace_id is not None:
+        stmt = stmt.where(SyncChange.workspace_id == workspace_id)
+    changes = list((await db.execute(stmt)).scalars().all())
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    watermark, held = _watermark(since, changes)
+
+    latest: dict[tuple[SyncEntity, int], bool] = {}
+    for change in changes:
+        latest[(change.entity, change.entity_id)] = change.deleted
+    upserts: dict[SyncEntity, list[int]] = {entity: [] for entity in SyncEntity}
+    deleted: list[SyncTombstone] = []
+    for (entity, entity_id), is_deleted in latest.items():
+        if is_deleted:
+            deleted.append(SyncTombstone(entity=entity, id=entity_id))
+        else:
+            upserts[entity].append(entity_id)
+
+    out = SyncOut(watermark=watermark, has_more=has_more and not held, deleted=deleted)
+    if upserts[SyncEntity.ITEM]:
+        items = await db.execute(select(Item).where(Item.id.in_(upserts[SyncEntity.ITEM])).order_by(Item.id))
+        out.items = await _serialize_items(list(items.scalars()), db)
+    if upserts[SyncEntity.LOCATION]:
+        locations = await db.execute(
+            select(Location).where(Location.id.in_(upserts[SyncEntity.LOCATION])).order_by(Location.id)
+        )
+        out.locations = [LocationOut.model_validate(loc) for loc in locations.scalars()]
+    if upserts[SyncEntity.MEDIA]:
+        media_rows = await db.execute(select(Media).where(Media.id.in_(upserts[SyncEntity.MEDIA])).order_by(Media.id))
+        media = media_rows.scalars().all()
+        analyses = await _latest_detections(db, (m.id for m in media))
+        out.media = [_serialize_media(m, *analyses.get(m.id, (None, []))) for m in media]
+    if upserts[SyncEntity.DETECTION]:
+        detections = await db.execute(
+            select(AIDetection)
+            .where(AIDetection.id.in_(upserts[SyncEntity.DETECTION]))
+            .order_by(AIDetection.id)
+            .options(
+                selectinload(AIDetection.media),
+                selectinload(AIDetection.objects).selectinload(AIDetectionObject.candidates),
+            )
+        )
+        out.detections = [_detection_out(det) for det in detections.scalars()]
+    if upserts[SyncEntity.TAG]:
+        tags = await db.execute(select(Tag).where(Tag.id.in_(upserts[SyncEntity.TAG])).order_by(Tag.id))
+        out.tags = [SyncTag(id=tag.id, workspace_id=tag.workspace_id, name=tag.name) for tag in tags.scalars()]
+    logger.info(
+        "sync since=%s watermark=%s changes=%s deleted=%s has_more=%s",
+        since,
+        out.watermark,
+        len(changes),
+        len(deleted),
+        out.has_more,
+    )
+    return out
@@ -0,0 +1 @@
+"""Бенчмарки и генераторы синтетических данных для backend."""
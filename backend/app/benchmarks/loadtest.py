@@ -0,0 +1,388 @@
+"""HTTP-нагрузка на upload, историю, поиск и отдачу файлов.
+
+Воркеры (`--concurrency`) параллельно шлют запросы по смеси сценариев:
+- `upload` — `POST /media/upload`, фото и видео в заданной пропорции;
+- `history` — `GET /media/history`;
+- `search` — `GET /items/search` по словам из генератора данных;
+- `file` — `GET /media/file/{id}` (оригинал или превью) по известным id медиа.
+
+Цель — либо уже запущенный сервер (`--base-url`, например uvicorn поверх
+локального Postgres), либо приложение в процессе через ASGI поверх
+временной SQLite или `--database-url`, предварительно наполненной
+`seed_workspace`. Отчёт — пропускная способность, перцентили латентности и
+доля ошибок по каждому сценарию; он печатается и сохраняется в JSON.
+
+Запуск из каталога backend:
+  python -m app.benchmarks.loadtest --concurrency 16 --duration 30
+  python -m app.benchmarks.loadtest --base-url http://127.0.0.1:8000 --workspace-id 1 --owner-user-id 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from httpx import AsyncClient, Limits
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.deps import get_db
+from app.benchmarks.pipeline import _git_commit, _parse_resolutions
+from app.benchmarks.seed_workspace import NOUNS, SeedConfig, seed_workspaces
+from app.benchmarks.synthetic import make_image, write_video
+from app.core.config import settings
+from app.db.base import Base
+from app.db.query_stats import instrument_engine
+from app.main import app
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIX = "upload=1,history=3,search=4,file=4"
+SCENARIOS = ("upload", "history", "search", "file")
+
+
+@dataclass
+class LoadConfig:
+    """Параметры прогона.
+
+    Attributes:
+        concurrency (int): Параллельных воркеров (одновременных запросов).
+        duration_s (float): Длительность прогона в секундах.
+        max_requests (int | None): Остановиться после стольких запросов.
+        mix (dict[str, float]): Веса сценариев.
+        video_share (float): Доля видео среди загрузок.
+        analyze (bool): Запускать AI-анализ при загрузке.
+        workspace_id (int): Workspace для загрузок.
+        owner_user_id (int): Владелец загрузок.
+        photo_size (tuple[int, int]): Разрешение загружаемых фото.
+        video_size (tuple[int, int]): Разрешение загружаемых видео.
+        seed (int): Зерно генератора.
+    """
+
+    concurrency: int = 8
+    duration_s: float = 30.0
+    max_requests: int | None = None
+    mix: Dict[str, float] = field(default_factory=lambda: _parse_mix(DEFAULT_MIX))
+    video_share: float = 0.2
+    analyze: bool = True
+    workspace_id: int = 1
+    owner_user_id: int = 1
+    photo_size: Tuple[int, int] = (1280, 960)
+    video_size: Tuple[int, int] = (640, 360)
+    seed: int = 0
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    """Разбирает `upload=1,search=4` в веса сценариев."""
+    mix = {}
+    for chunk in value.split(","):
+        if chunk.strip():
+            name, weight = chunk.split("=")
+            if name.strip() not in SCENARIOS:
+                raise ValueError(f"unknown scenario {name.strip()!r}, expected one of {SCENARIOS}")
+            mix[name.strip()] = float(weight)
+    return mix
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Перцентиль по ближайшему рангу."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: List[Tuple[str, int, float]], elapsed_s: float) -> Dict[str, Any]:
+    """Сводка по сценариям и в целом.
+
+    Args:
+        samples (list[tuple[str, int, float]]): (сценарий, HTTP-статус или 0 при исключении, секунды).
+        elapsed_s (float): Длительность прогона.
+
+    Returns:
+        dict[str, Any]: По сценарию: число запросов, ошибки, rps, перцентили в мс и статусы.
+    """
+    groups: Dict[str, List[Tuple[int, float]]] = {}
+    for name, status, seconds in samples:
+        groups.setdefault(name, []).append((status, seconds))
+        groups.setdefault("total", []).append((status, seconds))
+    report = {}
+    for name, rows in groups.items():
+        latencies = sorted(seconds * 1000 for _, seconds in rows)
+        errors = sum(1 for status, _ in rows if not 200 <= status < 400)
+        statuses: Dict[str, int] = {}
+        for status, _ in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        report[name] = {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4),
+            "rps": round(len(rows) / elapsed_s, 2) if elapsed_s else 0.0,
+            "p50_ms": round(_percentile(latencies, 50), 2),
+            "p90_ms": round(_percentile(latencies, 90), 2),
+            "p95_ms": round(_percentile(latencies, 95), 2),
+            "p99_ms": round(_percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2),
+            "statuses": statuses,
+        }
+    return report
+
+
+class _Payloads:
+    """Готовые тела загрузок: генерация картинки не должна попадать в замер."""
+
+    def __init__(self, config: LoadConfig, workdir: Path):
+        rng = random.Random(config.seed)
+        self.photos: List[bytes] = []
+        for idx in range(8):
+            buffer = io.BytesIO()
+            make_image(config.photo_size, objects=rng.randint(3, 15), seed=config.seed + idx).save(
+                buffer, format="JPEG", quality=85
+            )
+            self.photos.append(buffer.getvalue())
+        self.video: bytes | None = None
+        if config.video_share > 0:
+            try:
+                path = write_video(workdir / "load.mp4", config.video_size, frames=30, seed=config.seed)
+                self.video = path.read_bytes()
+            except (ImportError, RuntimeError) as exc:
+                logger.warning("loadtest video uploads disabled: %s", exc)
+
+    def pick(self, rng: random.Random, video_share: float) -> Tuple[str, bytes, str, str]:
+        """Возвращает (media_type, тело, имя файла, MIME).
+
+        К телу дописываются случайные байты после конца файла: декодеры их
+        игнорируют, а хэш меняется, и кэш инференса не превращает загрузку в no-op.
+        """
+        salt = os.urandom(16)
+        if self.video is not None and rng.random() < video_share:
+            return "video", self.video + salt, "load.mp4", "video/mp4"
+        return "photo", rng.choice(self.photos) + salt, "load.jpg", "image/jpeg"
+
+
+async def run_load(client: AsyncClient, config: LoadConfig) -> Dict[str, Any]:
+    """Гоняет смесь сценариев против клиента и возвращает отчёт.
+
+    Args:
+        client (AsyncClient): Клиент с `base_url` приложения (сеть или ASGI).
+        config (LoadConfig): Параметры прогона.
+
+    Returns:
+        dict[str, Any]: `{"meta": ..., "endpoints": {...}}`.
+    """
+    prefix = settings.api_v1_prefix
+    names = [name for name, weight in config.mix.items() if weight > 0]
+    weights = [config.mix[name] for name in names]
+
+    # Известные id медиа для `file`: из истории и из успешных загрузок по ходу прогона.
+    resp = await client.get(f"{prefix}/media/history", params={"status": "success", "limit": 200})
+    media_ids = [row["media_id"] for row in resp.json() if row.get("media_id")] if resp.status_code == 200 else []
+    if "file" in names and not media_ids and "upload" not in names:
+        logger.warning("loadtest: no media to fetch, scenario 'file' disabled")
+        idx = names.index("file")
+        names.pop(idx)
+        weights.pop(idx)
+    if not names:
+        raise ValueError("empty scenario mix")
+
+    with tempfile.TemporaryDirectory(prefix="gdemoe-load-") as tmp:
+        payloads = _Payloads(config, Path(tmp))
+        samples: List[Tuple[str, int, float]] = []
+        issued = 0
+        started = time.perf_counter()
+        deadline = started + config.duration_s
+
+        async def _request(name: str, rng: random.Random) -> int:
+            if name == "upload":
+                media_type, body, filename, mime = payloads.pick(rng, config.video_share)
+                resp = await client.post(
+                    f"{prefix}/media/upload",
+                    data={
+                        "workspace_id": str(config.workspace_id),
+                        "owner_user_id": str(config.owner_user_id),
+                        "media_type": media_type,
+                        "analyze": str(config.analyze).lower(),
+                        "source": "loadtest",
+                    },
+                    files={"file": (filename, body, mime)},
+                )
+                if resp.status_code == 200:
+                    media_ids.append(resp.json()["id"])
+                return resp.status_code
+            if name == "history":
+                resp = await client.get(f"{prefix}/media/history", params={"limit": rng.choice((20, 50, 100))})
+                return resp.status_code
+            if name == "search":
+                resp = await client.get(f"{prefix}/items/search", params={"query": rng.choice(NOUNS)})
+                return resp.status_code
+            if not media_ids:
+                # Первые загрузки ещё не завершились: считаем как поиск по истории.
+                resp = await client.get(f"{prefix}/media/history", params={"limit": 20})
+                return resp.status_code
+            params = {"thumb": 1} if rng.random() < 0.5 else None
+            resp = await client.get(f"{prefix}/media/file/{rng.choice(media_ids)}", params=params)
+            return resp.status_code
+
+        async def _worker(worker_id: int) -> None:
+            nonlocal issued
+            rng = random.Random(config.seed * 1000 + worker_id)
+            while time.perf_counter() < deadline:
+                if config.max_requests is not None:
+                    if issued >= config.max_requests:
+                        return
+                    issued += 1
+                name = rng.choices(names, weights)[0]
+                request_started = time.perf_counter()
+                try:
+                    status = await _request(name, rng)
+                except Exception as exc:  # noqa: BLE001
+                    logger.debug("loadtest %s failed: %s", name, exc)
+                    status = 0
+                samples.append((name, status, time.perf_counter() - request_started))
+
+        await asyncio.gather(*(_worker(idx) for idx in range(config.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "concurrency": config.concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "mix": dict(zip(names, weights)),
+            "video_share": config.video_share if payloads.video is not None else 0.0,
+            "analyze": config.analyze,
+        },
+        "endpoints": summarize(samples, elapsed),
+    }
+
+
+async def run_in_process(config: LoadConfig, seed_config: SeedConfig, database_url: str | None = None) -> Dict[str, Any]:
+    """Поднимает приложение в процессе поверх наполненной БД и гоняет нагрузку через ASGI.
+
+    Args:
+        config (LoadConfig): Параметры прогона; `workspace_id`/`owner_user_id`
+            подменяются на созданные генератором.
+        seed_config (SeedConfig): Объёмы данных для генератора.
+        database_url (str | None): DSN локальной БД (например, Postgres);
+            по умолчанию — временная SQLite. Схема создаётся через `create_all`.
+
+    Returns:
+        dict[str, Any]: Отчёт `run_load` с конфигурацией данных в `meta`.
+    """
+    old_public, old_private = settings.media_public_path, settings.media_private_path
+    with tempfile.TemporaryDirectory(prefix="gdemoe-load-app-") as tmp:
+        root = Path(tmp) / "public_media"
+        root.mkdir()
+        settings.media_public_path = str(root)
+        settings.media_private_path = str(Path(tmp) / "private_media")
+        url = database_url or f"sqlite+aiosqlite:///{tmp}/load.db"
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        engine = create_async_engine(url, connect_args=connect_args)
+        instrument_engine(engine.sync_engine)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def _override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                seeded = await seed_workspaces(conn, seed_config, root)
+            config.workspace_id = seeded["workspace_ids"][0]
+            config.owner_user_id = seeded["owner_user_ids"][0]
+            app.dependency_overrides[get_db] = _override_get_db
+            try:
+                async with AsyncClient(app=app, base_url="http://load", timeout=None) as client:
+                    report = await run_load(client, config)
+            finally:
+                app.dependency_overrides.pop(get_db, None)
+        finally:
+            await engine.dispose()
+            settings.media_public_path, settings.media_private_path = old_public, old_private
+    report["meta"]["target"] = "in-process " + engine.dialect.name
+    report["meta"]["seed_rows"] = seeded["rows"]
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> List[str]:
+    """Таблица для консоли: по строке на сценарий."""
+    lines = [f"{'scenario':<10}{'req':>8}{'err%':>8}{'rps':>9}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+    for name, row in sorted(report["endpoints"].items(), key=lambda kv: (kv[0] == "total", kv[0])):
+        lines.append(
+            f"{name:<10}{row['requests']:>8}{row['error_rate'] * 100:>7.1f}%{row['rps']:>9.1f}"
+            f"{row['p50_ms']:>9.1f}{row['p90_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+        )
+    return lines
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон upload/history/search/file")
+    parser.add_argument("--base-url", help="Адрес запущенного сервера; без него приложение поднимается в процессе")
+    parser.add_argument("--database-url", help="DSN БД для режима в процессе (по умолчанию временная SQLite)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="Секунд нагрузки")
+    parser.add_argument("--requests", type=int, help="Остановиться после N запросов")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Веса сценариев upload/history/search/file")
+    parser.add_argument("--video-share", type=float, default=0.2, help="Доля видео среди загрузок")
+    parser.add_argument("--no-analyze", action="store_true", help="Загружать без AI-анализа")
+    parser.add_argument("--workspace-id", type=int, default=1, help="Workspace для загрузок (режим --base-url)")
+    parser.add_argument("--owner-user-id", type=int, default=1, help="Владелец загрузок (режим --base-url)")
+    parser.add_argument("--photo-size", default="1280x960")
+    parser.add_argument("--video-size", default="640x360")
+    parser.add_argument("--seed-items", type=int, default=20_000, help="Предметов в данных для режима в процессе")
+    parser.add_argument("--seed-media", type=int, default=1_000, help="Медиа в данных для режима в процессе")
+    parser.add_argument("--out", type=Path, help="Куда сохранить JSON-отчёт")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Логи приложения на каждый запрос только мешают читать результат.
+    logging.getLogger("app").setLevel(logging.ERROR)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger(__name__).setLevel(logging.INFO)
+
+    config = LoadConfig(
+        concurrency=args.concurrency,
+        duration_s=args.duration,
+        max_requests=args.requests,
+        mix=_parse_mix(args.mix),
+        video_share=args.video_share,
+        analyze=not args.no_analyze,
+        workspace_id=args.workspace_id,
+        owner_user_id=args.owner_user_id,
+        photo_size=_parse_resolutions(args.photo_size)[0],
+        video_size=_parse_resolutions(args.video_size)[0],
+    )
+
+    async def _run() -> Dict[str, Any]:
+        if not args.base_url:
+            seed_config = SeedConfig(items=args.seed_items, media=args.seed_media)
+            return await run_in_process(config, seed_config, args.database_url)
+        limits = Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with AsyncClient(base_url=args.base_url, timeout=None, limits=limits) as client:
+            report = await run_load(client, config)
+        report["meta"]["target"] = args.base_url
+        return report
+
+    report = asyncio.run(_run())
+    for line in format_report(report):
+        print(line)
+    if args.out:
+        args.out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"saved report to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
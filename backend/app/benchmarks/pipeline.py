@@ -0,0 +1,329 @@
+"""Бенчмарк AI-пайплайна на синтетических данных и SQLite.
+
+Генерирует фото и видео нескольких разрешений, заводит workspace с N
+предметами и их фото и замеряет:
+- `thumbnail` — `_make_image_thumb` для каждого разрешения;
+- `top_k_candidates` — `_top_k_candidates` против N эмбеддингов;
+- `analyze_media` / `analyze_video` — полный пайплайн на SQLite;
+- `upload` — `POST /media/upload` с анализом, end-to-end через ASGI.
+
+Без весов YOLO и без CLIP работает контурный fallback, поэтому бенчмарк
+запускается в любом окружении; версии моделей пишутся в `meta`, чтобы не
+сравнивать несравнимое. Результаты сохраняются в JSON, `--compare`
+печатает изменение медианы относительно прошлого прогона.
+
+Запуск из каталога backend:
+  python -m app.benchmarks.pipeline --out bench.json
+  python -m app.benchmarks.pipeline --out bench-new.json --compare bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.deps import get_db
+from app.api.routes.media import _make_image_thumb
+from app.benchmarks.synthetic import write_photo, write_video
+from app.core.config import settings
+from app.db.base import Base
+from app.main import app
+from app.models.enums import MediaType
+from app.models.item import Item
+from app.models.media import ItemMedia, Media
+from app.models.user import User, Workspace
+from app.services.ai.detector import detector_version
+from app.services.ai.embeddings import clip_version
+from app.services.ai.pipeline import _top_k_candidates, analyze_media
+from app.services.ai.video import analyze_video
+
+DEFAULT_RESOLUTIONS = "640x480,1920x1080,4032x3024"
+DEFAULT_VIDEO_RESOLUTIONS = "640x360,1280x720"
+ITEM_PHOTO_SIZE = (320, 240)
+EMBEDDING_DIM = 512
+
+
+def _parse_resolutions(value: str) -> List[Tuple[int, int]]:
+    """Разбирает `640x480,1920x1080` в список пар (ширина, высота)."""
+    result = []
+    for chunk in value.split(","):
+        if chunk.strip():
+            width, height = chunk.lower().split("x")
+            result.append((int(width), int(height)))
+    return result
+
+
+def _stats(samples_s: List[float]) -> Dict[str, float]:
+    """Сводка по замерам в миллисекундах."""
+    ms = sorted(s * 1000 for s in samples_s)
+    p95_idx = min(len(ms) - 1, max(0, round(0.95 * len(ms)) - 1))
+    return {
+        "runs": len(ms),
+        "min_ms": round(ms[0], 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p95_ms": round(ms[p95_idx], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+async def _measure(fn: Callable[[int], Awaitable[Any]], repeat: int, warmup: int = 1) -> List[float]:
+    """Прогоняет `fn(run_index)` `warmup` раз вхолостую и `repeat` раз с замером."""
+    for idx in range(warmup):
+        await fn(-1 - idx)
+    samples = []
+    for idx in range(repeat):
+        started = time.perf_counter()
+        await fn(idx)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except Exception:  # noqa: BLE001
+        return None
+
+
+async def _seed(session_factory, root: Path, items: int) -> None:
+    """Workspace с `items` предметами, у каждого одно фото."""
+    async with session_factory() as session:
+        session.add_all(
+            [
+                User(id=1, email="bench@local", hashed_password="noop"),
+                Workspace(id=1, name="Bench", owner_user_id=1),
+            ]
+        )
+        for idx in range(1, items + 1):
+            rel_path = f"items/item_{idx}.jpg"
+            write_photo(root / rel_path, ITEM_PHOTO_SIZE, objects=3, seed=idx)
+            session.add(Item(id=idx, workspace_id=1, owner_user_id=1, title=f"Item {idx}"))
+            session.add(
+                Media(id=idx, workspace_id=1, owner_user_id=1, media_type=MediaType.PHOTO, path=rel_path, mime_type="image/jpeg")
+            )
+            session.add(ItemMedia(item_id=idx, media_id=idx))
+        await session.commit()
+
+
+async def _add_media(session_factory, rel_path: str, media_type: MediaType, mime_type: str) -> int:
+    async with session_factory() as session:
+        media = Media(workspace_id=1, owner_user_id=1, media_type=media_type, path=rel_path, mime_type=mime_type)
+        session.add(media)
+        await session.commit()
+        return media.id
+
+
+async def run_benchmarks(
+    items: int = 50,
+    resolutions: List[Tuple[int, int]] | None = None,
+    video_resolutions: List[Tuple[int, int]] | None = None,
+    repeat: int = 5,
+    video_frames: int = 30,
+) -> Dict[str, Any]:
+    """Готовит синтетическое окружение, прогоняет все бенчмарки и возвращает результаты.
+
+    Args:
+        items (int): Количество предметов с фото в workspace.
+        resolutions (list[tuple[int, int]] | None): Разрешения фото.
+        video_resolutions (list[tuple[int, int]] | None): Разрешения видео.
+        repeat (int): Количество замеров на каждый бенчмарк.
+        video_frames (int): Длина синтетического видео в кадрах.
+
+    Returns:
+        dict[str, Any]: `{"meta": ..., "results": [...]}` для сохранения в JSON.
+    """
+    resolutions = resolutions or _parse_resolutions(DEFAULT_RESOLUTIONS)
+    video_resolutions = video_resolutions if video_resolutions is not None else _parse_resolutions(DEFAULT_VIDEO_RESOLUTIONS)
+    results: List[Dict[str, Any]] = []
+
+    def _record(name: str, params: Dict[str, Any], samples: List[float]) -> None:
+        results.append({"name": name, "params": params, **_stats(samples)})
+        logging.getLogger(__name__).info("bench %s %s median_ms=%s", name, params, results[-1]["median_ms"])
+
+    old_public, old_private = settings.media_public_path, settings.media_private_path
+    with tempfile.TemporaryDirectory(prefix="gdemoe-bench-") as tmp:
+        root = Path(tmp) / "public_media"
+        root.mkdir()
+        settings.media_public_path = str(root)
+        settings.media_private_path = str(Path(tmp) / "private_media")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            await _seed(session_factory, root, items)
+
+            # CPU-часть подбора кандидатов: близость к N эмбеддингам предметов.
+            rng = np.random.default_rng(0)
+            vectors = rng.standard_normal((items, EMBEDDING_DIM)).astype("float32")
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            item_embeddings = list(zip(range(1, items + 1), vectors))
+            query = rng.standard_normal(EMBEDDING_DIM).astype("float32")
+
+            async def _top_k(_: int) -> None:
+                _top_k_candidates(query, item_embeddings, 3)
+
+            _record("top_k_candidates", {"items": items}, await _measure(_top_k, repeat))
+
+            for width, height in resolutions:
+                params = {"width": width, "height": height}
+                rel_path = f"photos/photo_{width}x{height}.jpg"
+                photo = write_photo(root / rel_path, (width, height), seed=width)
+
+                async def _thumb(run: int) -> None:
+                    _make_image_thumb(photo, root / "thumbs" / f"{width}x{height}_{run}.jpg")
+
+                _record("thumbnail", params, await _measure(_thumb, repeat))
+
+                # file_hash не задан: кэш инференса не срабатывает, каждый прогон — полный анализ.
+                media_id = await _add_media(session_factory, rel_path, MediaType.PHOTO, "image/jpeg")
+
+                async def _analyze(_: int) -> None:
+                    async with session_factory() as session:
+                        await analyze_media(media_id, session)
+
+                _record("analyze_media", params, await _measure(_analyze, repeat))
+
+            for width, height in video_resolutions:
+                params = {"width": width, "height": height, "frames": video_frames}
+                rel_path = f"videos/video_{width}x{height}.mp4"
+                try:
+                    write_video(root / rel_path, (width, height), frames=video_frames)
+                except (ImportError, RuntimeError) as exc:
+                    logging.getLogger(__name__).warning("bench video skipped: %s", exc)
+                    break
+                media_id = await _add_media(session_factory, rel_path, MediaType.VIDEO, "video/mp4")
+
+                async def _analyze_video(_: int) -> None:
+                    async with session_factory() as session:
+                        await analyze_video(media_id, session, frame_stride=10, max_frames=3)
+
+                _record("analyze_video", params, await _measure(_analyze_video, repeat))
+
+            async def _override_get_db():
+                async with session_factory() as session:
+                    yield session
+
+            app.dependency_overrides[get_db] = _override_get_db
+            try:
+                async with AsyncClient(app=app, base_url="http://bench") as client:
+                    for width, height in resolutions:
+                        params = {"width": width, "height": height}
+                        # Новое содержимое на каждый прогон, иначе сработает кэш инференса по хэшу.
+                        # Файлы готовим заранее, чтобы генерация картинки не попадала в замер.
+                        payloads = {
+                            run: write_photo(
+                                Path(tmp) / "uploads" / f"{width}x{height}_{run}.jpg", (width, height), seed=1000 + run
+                            )
+                            for run in [-1, *range(repeat)]
+                        }
+
+                        async def _upload(run: int) -> None:
+                            path = payloads[run]
+                            with path.open("rb") as f:
+                                resp = await client.post(
+                                    f"{settings.api_v1_prefix}/media/upload",
+                                    data={"workspace_id": "1", "owner_user_id": "1", "media_type": "photo"},
+                                    files={"file": (path.name, f, "image/jpeg")},
+                                )
+                            resp.raise_for_status()
+
+                        _record("upload", params, await _measure(_upload, repeat))
+            finally:
+                app.dependency_overrides.pop(get_db, None)
+        finally:
+            await engine.dispose()
+            settings.media_public_path, settings.media_private_path = old_public, old_private
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "detector_version": detector_version(),
+            "clip_version": clip_version(),
+            "items": items,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def _result_key(result: Dict[str, Any]) -> str:
+    return f"{result['name']} {json.dumps(result['params'], sort_keys=True)}"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Строки отчёта: медиана baseline → текущая и отношение.
+
+    Args:
+        current (dict[str, Any]): Результаты текущего прогона.
+        baseline (dict[str, Any]): Результаты прошлого прогона.
+
+    Returns:
+        list[str]: По строке на бенчмарк, присутствующий в обоих прогонах.
+    """
+    base = {_result_key(r): r for r in baseline.get("results", [])}
+    lines = []
+    for result in current["results"]:
+        prev = base.get(_result_key(result))
+        if prev is None:
+            continue
+        ratio = result["median_ms"] / prev["median_ms"] if prev["median_ms"] else float("inf")
+        lines.append(f"{_result_key(result)}: {prev['median_ms']:.2f} -> {result['median_ms']:.2f} ms (x{ratio:.2f})")
+    return lines
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк AI-пайплайна на синтетических данных")
+    parser.add_argument("--out", type=Path, default=Path("bench-results.json"), help="Куда сохранить JSON")
+    parser.add_argument("--items", type=int, default=50, help="Предметов с фото в workspace")
+    parser.add_argument("--resolutions", default=DEFAULT_RESOLUTIONS, help="Разрешения фото, например 640x480,1920x1080")
+    parser.add_argument("--video-resolutions", default=DEFAULT_VIDEO_RESOLUTIONS, help="Разрешения видео; пусто — без видео")
+    parser.add_argument("--video-frames", type=int, default=30, help="Длина синтетического видео в кадрах")
+    parser.add_argument("--repeat", type=int, default=5, help="Замеров на бенчмарк")
+    parser.add_argument("--compare", type=Path, help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Логи пайплайна и httpx на каждый прогон только мешают читать результат.
+    logging.getLogger("app").setLevel(logging.ERROR)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger(__name__).setLevel(logging.INFO)
+
+    report = asyncio.run(
+        run_benchmarks(
+            items=args.items,
+            resolutions=_parse_resolutions(args.resolutions),
+            video_resolutions=_parse_resolutions(args.video_resolutions),
+            repeat=args.repeat,
+            video_frames=args.video_frames,
+        )
+    )
+    args.out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"saved {len(report['results'])} results to {args.out}")
+    if args.compare:
+        for line in compare(report, json.loads(args.compare.read_text(encoding="utf-8"))):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
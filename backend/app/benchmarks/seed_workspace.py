@@ -0,0 +1,597 @@
+"""Генератор большого синтетического workspace для нагрузочных тестов.
+
+Заполняет БД (Postgres или SQLite) объёмами, близкими к продакшену:
+workspace'ы с глубоким деревом локаций, сотни тысяч предметов с тегами и
+атрибутами, медиа с маленькими файлами на диске, AI-детекции с объектами и
+кандидатами и журнал загрузок. Этого достаточно, чтобы нагружать списки,
+поиск и историю загрузок. Каждая созданная сущность попадает и в журнал
+`SyncChange`, поэтому `GET /sync?since=0` отдаёт весь сгенерированный workspace.
+
+Вставка идёт пачками без ORM: на asyncpg — через `COPY`
+(`copy_records_to_table`), на остальных драйверах — `executemany` по
+`insert(table)`. Идентификаторы назначаются заранее от текущего `max(id)`,
+поэтому связи строятся без `RETURNING`, а данные можно доливать в уже
+заполненную БД. После вставки на Postgres сдвигаются sequence'ы.
+
+Запуск из каталога backend:
+  python -m app.benchmarks.seed_workspace --database-url sqlite+aiosqlite:///seed.db --create-schema
+  python -m app.benchmarks.seed_workspace --items 200000 --media 20000 --media-root /tmp/gdemoe-media
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from enum import Enum as PyEnum
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import JSON, Numeric, Table, func, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.benchmarks.synthetic import make_image
+from app.core.config import settings
+from app.db.base import Base
+from app.models.ai import AIDetection, AIDetectionCandidate, AIDetectionObject
+from app.models.enums import (
+    AIDetectionDecision,
+    AIDetectionStatus,
+    ItemStatus,
+    LocationKind,
+    MediaType,
+    Scope,
+    SyncEntity,
+    UploadStatus,
+)
+from app.models.item import Item
+from app.models.location import Location
+from app.models.media import ItemMedia, Media, MediaUploadHistory
+from app.models.sync import SyncChange
+from app.models.tag import ItemTag, Tag
+from app.models.user import User, Workspace
+
+logger = logging.getLogger(__name__)
+
+NOUNS = (
+    "лампа", "дрель", "зарядка", "кабель", "ботинки", "куртка", "книга", "чайник", "отвёртка", "рюкзак",
+    "наушники", "палатка", "фонарь", "монитор", "клавиатура", "коробка", "мяч", "зонт", "часы", "ноутбук",
+)
+ADJECTIVES = ("старый", "новый", "красный", "синий", "большой", "малый", "запасной", "рабочий", "зимний", "детский")
+CATEGORIES = ("электроника", "инструменты", "одежда", "книги", "кухня", "спорт", "туризм", "документы", "хобби", "разное")
+COLORS = ("black", "white", "red", "blue", "green", "grey", "yellow")
+LABELS = ("bottle", "cup", "book", "laptop", "backpack", "chair", "box", "shoe", "lamp", "phone")
+# Виды узлов по уровню дерева: дом → комната → шкаф → полка → коробка → …
+LEVEL_KINDS = (LocationKind.HOME, LocationKind.ROOM, LocationKind.CLOSET, LocationKind.SHELF, LocationKind.BOX)
+
+
+@dataclass
+class SeedConfig:
+    """Объёмы генерации.
+
+    Attributes:
+        workspaces (int): Количество workspace'ов (у каждого свой владелец).
+        location_depth (int): Глубина дерева локаций.
+        location_fanout (int): Дочерних узлов у каждой локации.
+        items (int): Предметов на workspace.
+        tags (int): Тегов на workspace.
+        tags_per_item (int): Тегов у каждого предмета.
+        media (int): Медиа на workspace.
+        video_share (float): Доля видео среди медиа.
+        item_media_share (float): Доля медиа, привязанных к предмету.
+        objects_per_detection (int): Объектов в каждой детекции.
+        candidates_per_object (int): Кандидатов у каждого объекта.
+        failed_uploads (int): Дополнительных неудачных загрузок на workspace.
+        image_size (tuple[int, int]): Размер сгенерированных картинок.
+        write_files (bool): Писать ли файлы медиа и превью на диск.
+        days (int): За сколько дней размазать `created_at`.
+        batch_size (int): Строк в одной пачке вставки.
+        seed (int): Зерно генератора для воспроизводимости.
+    """
+
+    workspaces: int = 1
+    location_depth: int = 5
+    location_fanout: int = 4
+    items: int = 100_000
+    tags: int = 200
+    tags_per_item: int = 3
+    media: int = 5_000
+    video_share: float = 0.1
+    item_media_share: float = 0.5
+    objects_per_detection: int = 3
+    candidates_per_object: int = 3
+    failed_uploads: int = 100
+    image_size: Tuple[int, int] = (160, 120)
+    write_files: bool = True
+    days: int = 365
+    batch_size: int = 5_000
+    seed: int = 0
+
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkWriter:
+    """Пачечная вставка строк-словарей в таблицы одного соединения.
+
+    Все строки одной таблицы должны иметь одинаковый набор ключей:
+    колонки, которых нет в строке, получают значения по умолчанию из БД.
+
+    Attributes:
+        conn (AsyncConnection): Соединение с открытой транзакцией.
+        batch_size (int): Строк в одной пачке.
+        use_copy (bool): Вставлять через `COPY` (только asyncpg).
+        counts (dict[str, int]): Вставлено строк по таблицам.
+        seconds (dict[str, float]): Время вставки по таблицам.
+    """
+
+    def __init__(self, conn: AsyncConnection, batch_size: int = 5_000):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.use_copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg"
+        self.counts: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+
+    async def next_id(self, table: Table) -> int:
+        """Первый свободный id таблицы."""
+        return int((await self.conn.execute(select(func.coalesce(func.max(table.c.id), 0)))).scalar_one()) + 1
+
+    async def insert(self, table: Table, rows: Iterable[Dict[str, Any]]) -> int:
+        """Вставляет строки пачками по `batch_size`.
+
+        Returns:
+            int: Количество вставленных строк.
+        """
+        started = time.perf_counter()
+        total = 0
+        for chunk in _chunks(rows, self.batch_size):
+            if self.use_copy:
+                await self._copy(table, chunk)
+            else:
+                await self.conn.execute(insert(table), chunk)
+            total += len(chunk)
+        self.counts[table.name] = self.counts.get(table.name, 0) + total
+        self.seconds[table.name] = self.seconds.get(table.name, 0.0) + time.perf_counter() - started
+        if total:
+            logger.info("seed %s rows=%s", table.name, total)
+        return total
+
+    async def _copy(self, table: Table, chunk: List[Dict[str, Any]]) -> None:
+        # COPY обходит слой типов SQLAlchemy: enum и JSON приводим сами.
+        columns = list(chunk[0].keys())
+        types = [table.c[name].type for name in columns]
+        records = [tuple(_copy_value(row[name], type_) for name, type_ in zip(columns, types)) for row in chunk]
+        raw = await self.conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(table.name, records=records, columns=columns)
+
+    async def reset_sequences(self, tables: Sequence[Table]) -> None:
+        """Сдвигает sequence'ы Postgres за вставленные вручную id."""
+        if self.conn.dialect.name != "postgresql":
+            return
+        preparer = self.conn.dialect.identifier_preparer
+        for table in tables:
+            quoted = preparer.format_table(table)
+            await self.conn.execute(
+                text(f"SELECT setval(pg_get_serial_sequence(:name, 'id'), (SELECT coalesce(max(id), 1) FROM {quoted}))"),
+                {"name": quoted},
+            )
+
+
+def _copy_value(value: Any, type_: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, PyEnum):
+        return value.value
+    if isinstance(type_, JSON):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(type_, Numeric) and not isinstance(value, Decimal):
+        return Decimal(str(value))
+    return value
+
+
+def _location_tree(
+    rng: random.Random, workspace_id: int, first_id: int, depth: int, fanout: int, created_at: datetime
+) -> List[Dict[str, Any]]:
+    """Строки локаций полного дерева в порядке обхода в ширину (родитель раньше детей)."""
+    rows: List[Dict[str, Any]] = []
+    level: List[Dict[str, Any] | None] = [None]
+    next_id = first_id
+    for depth_idx in range(depth):
+        kind = LEVEL_KINDS[min(depth_idx, len(LEVEL_KINDS) - 1)]
+        children: List[Dict[str, Any]] = []
+        for parent in level:
+            # Корней меньше, чем детей у узла: дом обычно один-два.
+            count = max(1, fanout // 2) if parent is None else fanout
+            for idx in range(count):
+                name = f"{kind.value}-{idx + 1}"
+                row = {
+                    "id": next_id,
+                    "workspace_id": workspace_id,
+                    "parent_id": parent["id"] if parent else None,
+                    "name": name,
+                    "kind": kind,
+                    "path": f"{parent['path']}.{name}" if parent else name,
+                    "meta": {"seed": True} if rng.random() < 0.1 else None,
+                    "created_at": created_at,
+                }
+                next_id += 1
+                children.append(row)
+        rows.extend(children)
+        level = children
+    return rows
+
+
+def _created_at(start: datetime, span: timedelta, idx: int, total: int) -> datetime:
+    """Равномерно растущее время: порядок по id совпадает с порядком по `created_at`."""
+    return start + span * (idx / max(1, total))
+
+
+def _image_pool(size: Tuple[int, int], count: int, seed: int) -> List[bytes]:
+    pool = []
+    for idx in range(count):
+        buffer = io.BytesIO()
+        make_image(size, objects=4, seed=seed + idx).save(buffer, format="JPEG", quality=70)
+        pool.append(buffer.getvalue())
+    return pool
+
+
+async def seed_workspaces(conn: AsyncConnection, config: SeedConfig, media_root: Path | None) -> Dict[str, Any]:
+    """Заполняет БД синтетическими данными внутри переданной транзакции.
+
+    Args:
+        conn (AsyncConnection): Соединение с открытой транзакцией.
+        config (SeedConfig): Объёмы генерации.
+        media_root (Path | None): Каталог публичных медиа; `None` — файлы не пишутся.
+
+    Returns:
+        dict[str, Any]: Созданные workspace'ы и их владельцы, число строк и время вставки по таблицам.
+    """
+    rng = random.Random(config.seed)
+    writer = BulkWriter(conn, config.batch_size)
+    tables = {
+        model.__name__: model.__table__
+        for model in (User, Workspace, Location, Tag, Item, ItemTag, Media, ItemMedia)
+        + (AIDetection, AIDetectionObject, AIDetectionCandidate, MediaUploadHistory, SyncChange)
+    }
+    ids = {name: await writer.next_id(table) for name, table in tables.items() if "id" in table.c}
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=config.days)
+    span = end - start
+    pool = _image_pool(config.image_size, 16, config.seed) if media_root is not None and config.write_files else []
+    workspace_ids: List[int] = []
+    owner_user_ids: List[int] = []
+
+    async def _log_changes(entity: SyncEntity, workspace_id: int, entity_ids: Iterable[int]) -> None:
+        # Хук журнала видит только ORM-flush, а вставка идёт мимо него: пишем журнал сами.
+        await writer.insert(
+            tables["SyncChange"],
+            (
+                {"workspace_id": workspace_id, "entity": entity, "entity_id": entity_id, "deleted": False}
+                for entity_id in entity_ids
+            ),
+        )
+
+    for _ in range(config.workspaces):
+        user_id, workspace_id = ids["User"], ids["Workspace"]
+        ids["User"] += 1
+        ids["Workspace"] += 1
+        workspace_ids.append(workspace_id)
+        owner_user_ids.append(user_id)
+        await writer.insert(
+            tables["User"],
+            [{"id": user_id, "email": f"seed-{user_id}@gdemo.local", "hashed_password": "seed", "is_active": True}],
+        )
+        await writer.insert(
+            tables["Workspace"],
+            [{"id": workspace_id, "name": f"Seed workspace {workspace_id}", "scope": Scope.PRIVATE, "owner_user_id": user_id}],
+        )
+
+        locations = _location_tree(
+            rng, workspace_id, ids["Location"], config.location_depth, config.location_fanout, start
+        )
+        ids["Location"] += len(locations)
+        await writer.insert(tables["Location"], locations)
+        location_ids = [row["id"] for row in locations]
+        await _log_changes(SyncEntity.LOCATION, workspace_id, location_ids)
+
+        tag_ids = list(range(ids["Tag"], ids["Tag"] + config.tags))
+        ids["Tag"] += config.tags
+        await writer.insert(
+            tables["Tag"],
+            ({"id": tag_id, "workspace_id": workspace_id, "name": f"tag-{tag_id}"} for tag_id in tag_ids),
+        )
+        await _log_changes(SyncEntity.TAG, workspace_id, tag_ids)
+
+        first_item = ids["Item"]
+        item_ids = range(first_item, first_item + config.items)
+        ids["Item"] += config.items
+
+        def _items() -> Iterator[Dict[str, Any]]:
+            for idx, item_id in enumerate(item_ids):
+                noun = rng.choice(NOUNS)
+                yield {
+                    "id": item_id,
+                    "workspace_id": workspace_id,
+                    "owner_user_id": user_id,
+                    "title": f"{rng.choice(ADJECTIVES)} {noun} {item_id}",
+                    "description": f"Синтетический предмет: {noun}" if rng.random() < 0.6 else None,
+                    "category": rng.choice(CATEGORIES),
+                    "status": rng.choice(list(ItemStatus)),
+                    "attributes": {
+                        "color": rng.choice(COLORS),
+                        "weight_g": rng.randint(10, 20_000),
+                        "fragile": rng.random() < 0.2,
+                    },
+                    "price": Decimal(rng.randint(100, 5_000_000)) / 100 if rng.random() < 0.5 else None,
+                    "currency": "RUB",
+                    "location_id": rng.choice(location_ids) if location_ids and rng.random() < 0.9 else None,
+                    "scope": Scope.PRIVATE,
+                    "created_at": _created_at(start, span, idx, config.items),
+                }
+
+        await writer.insert(tables["Item"], _items())
+        await _log_changes(SyncEntity.ITEM, workspace_id, item_ids)
+
+        tags_per_item = min(config.tags_per_item, len(tag_ids))
+        await writer.insert(
+            tables["ItemTag"],
+            (
+                {"item_id": item_id, "tag_id": tag_id}
+                for item_id in item_ids
+                for tag_id in rng.sample(tag_ids, tags_per_item)
+            ),
+        )
+
+        media_rows: List[Dict[str, Any]] = []
+        for idx in range(config.media):
+            media_id = ids["Media"] + idx
+            is_video = rng.random() < config.video_share
+            media_type = MediaType.VIDEO if is_video else MediaType.PHOTO
+            rel_dir = f"{workspace_id}/{user_id}/seed/{media_id // 1000:04d}"
+            # Видео на диске — тоже JPEG: отдача файла не смотрит на содержимое,
+            # а синтетический mp4 на каждую строку сильно замедлил бы генерацию.
+            rel_path = f"{rel_dir}/seed_{media_id}.{'mp4' if is_video else 'jpg'}"
+            thumb_path = f"thumbs/{rel_dir}/seed_{media_id}.jpg"
+            payload = pool[media_id % len(pool)] if pool else b""
+            if pool:
+                for target in (media_root / rel_path, media_root / thumb_path):
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    target.write_bytes(payload)
+            media_rows.append(
+                {
+                    "id": media_id,
+                    "workspace_id": workspace_id,
+                    "owner_user_id": user_id,
+                    "location_id": rng.choice(location_ids) if location_ids else None,
+                    "media_type": media_type,
+                    "path": rel_path,
+                    "thumb_path": thumb_path,
+                    "mime_type": "video/mp4" if is_video else "image/jpeg",
+                    "size_bytes": len(payload) or None,
+                    "created_at": _created_at(start, span, idx, config.media),
+                    "analyzed_at": _created_at(start, span, idx, config.media),
+                }
+            )
+        ids["Media"] += config.media
+        await writer.insert(tables["Media"], media_rows)
+        await _log_changes(SyncEntity.MEDIA, workspace_id, (row["id"] for row in media_rows))
+
+        if config.items:
+            await writer.insert(
+                tables["ItemMedia"],
+                (
+                    {"item_id": rng.choice(item_ids), "media_id": row["id"]}
+                    for row in media_rows
+                    if rng.random() < config.item_media_share
+                ),
+            )
+
+        detection_rows, object_rows, candidate_rows = [], [], []
+        for row in media_rows:
+            detection_id = ids["AIDetection"]
+            ids["AIDetection"] += 1
+            row["detection_id"] = detection_id
+            detection_rows.append(
+                {
+                    "id": detection_id,
+                    "media_id": row["id"],
+                    "status": AIDetectionStatus.DONE,
+                    "raw": {"source": "seed"},
+                    "created_at": row["created_at"],
+                    "completed_at": row["created_at"],
+                }
+            )
+            width, height = config.image_size
+            for _ in range(config.objects_per_detection):
+                object_id = ids["AIDetectionObject"]
+                ids["AIDetectionObject"] += 1
+                x1, y1 = rng.uniform(0, width * 0.7), rng.uniform(0, height * 0.7)
+                object_rows.append(
+                    {
+                        "id": object_id,
+                        "detection_id": detection_id,
+                        "label": rng.choice(LABELS),
+                        "confidence": round(rng.uniform(0.3, 0.99), 3),
+                        "bbox": {"x1": x1, "y1": y1, "x2": x1 + width * 0.2, "y2": y1 + height * 0.2},
+                        "suggested_location_id": row["location_id"],
+                        "decision": AIDetectionDecision.PENDING,
+                        "created_at": row["created_at"],
+                    }
+                )
+                if not config.items:
+                    continue
+                for _ in range(config.candidates_per_object):
+                    candidate_rows.append(
+                        {
+                            "id": ids["AIDetectionCandidate"],
+                            "detection_object_id": object_id,
+                            "item_id": rng.choice(item_ids),
+                            "score": round(rng.uniform(0.2, 0.95), 3),
+                            "created_at": row["created_at"],
+                        }
+                    )
+                    ids["AIDetectionCandidate"] += 1
+        await writer.insert(tables["AIDetection"], detection_rows)
+        await writer.insert(tables["AIDetectionObject"], object_rows)
+        await writer.insert(tables["AIDetectionCandidate"], candidate_rows)
+        await _log_changes(SyncEntity.DETECTION, workspace_id, (row["id"] for row in detection_rows))
+
+        # latest_detection_id ссылается на aidetection, поэтому проставляется
+        # после вставки детекций одним set-based UPDATE.
+        if media_rows:
+            media, detection = tables["Media"], tables["AIDetection"]
+            await conn.execute(
+                update(media)
+                .where(media.c.workspace_id == workspace_id)
+                .values(
+                    latest_detection_id=select(func.max(detection.c.id))
+                    .where(detection.c.media_id == media.c.id)
+                    .scalar_subquery()
+                )
+            )
+
+        history_rows = [
+            {
+                "id": ids["MediaUploadHistory"] + idx,
+                "media_id": row["id"],
+                "detection_id": row["detection_id"],
+                "workspace_id": workspace_id,
+                "owner_user_id": user_id,
+                "location_id": row["location_id"],
+                "media_type": row["media_type"],
+                "status": UploadStatus.SUCCESS,
+                "source": "seed",
+                "ai_status": AIDetectionStatus.DONE.value,
+                "ai_summary": {"id": row["detection_id"], "status": AIDetectionStatus.DONE.value, "objects": []},
+                "path": row["path"],
+                "thumb_path": row["thumb_path"],
+                "created_at": row["created_at"],
+            }
+            for idx, row in enumerate(media_rows)
+        ]
+        ids["MediaUploadHistory"] += len(history_rows)
+        for idx in range(config.failed_uploads):
+            history_rows.append(
+                {
+                    "id": ids["MediaUploadHistory"],
+                    "media_id": None,
+                    "detection_id": None,
+                    "workspace_id": workspace_id,
+                    "owner_user_id": user_id,
+                    "location_id": rng.choice(location_ids) if location_ids else None,
+                    "media_type": MediaType.PHOTO,
+                    "status": UploadStatus.FAILED,
+                    "source": "seed",
+                    "ai_status": None,
+                    "ai_summary": {"error": "synthetic failure"},
+                    "path": None,
+                    "thumb_path": None,
+                    "created_at": _created_at(start, span, idx, config.failed_uploads),
+                }
+            )
+            ids["MediaUploadHistory"] += 1
+        await writer.insert(tables["MediaUploadHistory"], history_rows)
+
+    await writer.reset_sequences([table for table in tables.values() if "id" in table.c])
+    return {
+        "workspace_ids": workspace_ids,
+        "owner_user_ids": owner_user_ids,
+        "rows": writer.counts,
+        "seconds": {name: round(value, 3) for name, value in writer.seconds.items()},
+    }
+
+
+async def run(database_url: str, config: SeedConfig, media_root: Path | None, create_schema: bool = False) -> Dict[str, Any]:
+    """Подключается к БД, при необходимости создаёт схему и заполняет её.
+
+    Args:
+        database_url (str): DSN async SQLAlchemy (`postgresql+asyncpg://…`, `sqlite+aiosqlite:///…`).
+        config (SeedConfig): Объёмы генерации.
+        media_root (Path | None): Каталог публичных медиа.
+        create_schema (bool): Выполнить `create_all` (для пустой SQLite без миграций).
+
+    Returns:
+        dict[str, Any]: Отчёт `seed_workspaces` с общим временем.
+    """
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    engine = create_async_engine(database_url, connect_args=connect_args)
+    started = time.perf_counter()
+    try:
+        async with engine.begin() as conn:
+            if create_schema:
+                await conn.run_sync(Base.metadata.create_all)
+            report = await seed_workspaces(conn, config, media_root)
+    finally:
+        await engine.dispose()
+    report["total_seconds"] = round(time.perf_counter() - started, 3)
+    report["config"] = asdict(config)
+    return report
+
+
+def _parse_size(value: str) -> Tuple[int, int]:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv: List[str] | None = None) -> None:
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description="Наполнение БД синтетическим большим workspace")
+    parser.add_argument("--database-url", default=settings.database_url, help="DSN async SQLAlchemy")
+    parser.add_argument("--create-schema", action="store_true", help="Создать таблицы через create_all")
+    parser.add_argument("--media-root", type=Path, default=Path(settings.media_public_path), help="Каталог публичных медиа")
+    parser.add_argument("--no-files", action="store_true", help="Не писать файлы медиа на диск")
+    parser.add_argument("--workspaces", type=int, default=defaults.workspaces)
+    parser.add_argument("--location-depth", type=int, default=defaults.location_depth)
+    parser.add_argument("--location-fanout", type=int, default=defaults.location_fanout)
+    parser.add_argument("--items", type=int, default=defaults.items, help="Предметов на workspace")
+    parser.add_argument("--tags", type=int, default=defaults.tags, help="Тегов на workspace")
+    parser.add_argument("--tags-per-item", type=int, default=defaults.tags_per_item)
+    parser.add_argument("--media", type=int, default=defaults.media, help="Медиа на workspace")
+    parser.add_argument("--video-share", type=float, default=defaults.video_share)
+    parser.add_argument("--objects-per-detection", type=int, default=defaults.objects_per_detection)
+    parser.add_argument("--candidates-per-object", type=int, default=defaults.candidates_per_object)
+    parser.add_argument("--failed-uploads", type=int, default=defaults.failed_uploads)
+    parser.add_argument("--image-size", type=_parse_size, default=defaults.image_size, help="Например 160x120")
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    config = SeedConfig(
+        workspaces=args.workspaces,
+        location_depth=args.location_depth,
+        location_fanout=args.location_fanout,
+        items=args.items,
+        tags=args.tags,
+        tags_per_item=args.tags_per_item,
+        media=args.media,
+        video_share=args.video_share,
+        objects_per_detection=args.objects_per_detection,
+        candidates_per_object=args.candidates_per_object,
+        failed_uploads=args.failed_uploads,
+        image_size=args.image_size,
+        write_files=not args.no_files,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+    report = asyncio.run(run(args.database_url, config, None if args.no_files else args.media_root, args.create_schema))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Синтетические фото и видео для бенчмарков.
+
+Картинки имитируют снимок полки: градиентный фон и прямоугольные «товары»
+разного цвета. Контурный fallback-детектор находит на них объекты, поэтому
+бенчмарки осмысленны и без весов YOLO/CLIP.
+"""
+
+import random
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+
+def make_image(size: Tuple[int, int], objects: int = 12, seed: int = 0) -> Image.Image:
+    """Рисует синтетическое фото заданного размера.
+
+    Args:
+        size (tuple[int, int]): Ширина и высота.
+        objects (int): Количество прямоугольников-объектов.
+        seed (int): Зерно генератора: одинаковое зерно — одинаковая картинка.
+
+    Returns:
+        Image.Image: RGB-изображение.
+    """
+    width, height = size
+    rng = random.Random(seed)
+    # Градиент вместо шума: JPEG остаётся компактным, а фон не однотонный.
+    gradient = np.linspace(40, 120, width, dtype=np.uint8)
+    canvas = np.repeat(np.tile(gradient, (height, 1))[:, :, None], 3, axis=2)
+    image = Image.fromarray(canvas)
+    draw = ImageDraw.Draw(image)
+    for _ in range(objects):
+        w = rng.randint(max(4, width // 40), max(5, width // 8))
+        h = rng.randint(max(4, height // 30), max(5, height // 5))
+        x = rng.randint(0, max(0, width - w))
+        y = rng.randint(0, max(0, height - h))
+        color = tuple(rng.randint(150, 255) for _ in range(3))
+        draw.rectangle((x, y, x + w, y + h), fill=color)
+    return image
+
+
+def write_photo(path: Path, size: Tuple[int, int], objects: int = 12, seed: int = 0, quality: int = 85) -> Path:
+    """Сохраняет синтетическое фото в JPEG.
+
+    Returns:
+        Path: Путь к файлу.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    make_image(size, objects, seed).save(path, format="JPEG", quality=quality)
+    return path
+
+
+def write_video(path: Path, size: Tuple[int, int], frames: int = 30, fps: int = 15, seed: int = 0) -> Path:
+    """Сохраняет синтетическое видео MP4 (mp4v) со сдвигающимися объектами.
+
+    Raises:
+        ImportError: Если OpenCV не установлен.
+        RuntimeError: Если кодек mp4v недоступен.
+    """
+    import cv2  # noqa: WPS433
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    if not writer.isOpened():
+        raise RuntimeError("mp4v codec is not available")
+    base = np.asarray(make_image(size, seed=seed))
+    try:
+        for idx in range(frames):
+            frame = np.roll(base, idx * 4, axis=1)
+            writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+    finally:
+        writer.release()
+    return path
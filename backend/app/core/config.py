@@ -4,7 +4,7 @@
 откуда берутся пути к медиа, настройки БД и параметры AI.
 """
 
-from typing import List
+from typing import List, Literal
 
 from pydantic import computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -24,6 +24,8 @@ class Settings(BaseSettings):
     - Аутентификация JWT (jwt_*)
     - Медиафайлы (media_*)
     - AI и ML (ai_*)
+    - Наблюдаемость запросов (request_*)
+    - Дельта-синхронизация клиентов (sync_*)
     - Разработка (debug, cors_origins)
 
     Для изменения настроек в продакшене используйте переменные окружения
@@ -91,12 +93,77 @@ class Settings(BaseSettings):
     video_max_frames: int = 3
     """Максимальное количество кадров для извлечения из видео."""
 
+    request_slow_ms: float = 1000.0
+    """Порог (мс), начиная с которого запрос логируется как медленный вместе со списком SQL."""
+
+    request_slow_sample_rate: float = 1.0
+    """Доля медленных запросов, которые попадают в лог (0.0-1.0)."""
+
+    sync_commit_lag_s: float = 10.0
+    """Окно (с), в котором `GET /sync` не сдвигает водяной знак за свежие записи журнала.
+
+    Номера записей выдаются до коммита, поэтому транзакция, начатая раньше, может
+    стать видимой позже соседней. Свежие записи отдаются повторно, пока не выйдут из
+    окна; пропустить изменение может только транзакция длиннее окна.
+    """
+
     ai_service_url: str | None = None
     """URL внешнего AI-сервиса для распознавания (опционально)."""
 
     ai_yolo_weights_path: str | None = None
     """Путь к весам YOLO для локального AI-пайплайна (опционально)."""
 
+    ai_detector_backend: Literal["ultralytics", "onnx"] = "ultralytics"
+    """Бэкенд детектора: `ultralytics` (YOLO .pt на torch) или `onnx` (ONNX Runtime, .onnx рядом с .pt)."""
+
+    ai_detector_iou: float = 0.45
+    """Порог IoU для NMS в ONNX-бэкенде детектора."""
+
+    ai_inference_socket: str | None = None
+    """Unix-сокет общего сервиса инференса (`python -m app.services.ai.inference_server`).
+
+    Если задан, воркеры не грузят YOLO/CLIP сами, а отправляют запросы в сервис.
+    """
+
+    ai_inference_batch_window_ms: float = 5.0
+    """Окно (мс), в течение которого сервис инференса собирает запросы в один батч."""
+
+    ai_inference_max_batch: int = 8
+    """Максимальный размер батча в сервисе инференса."""
+
+    ai_inference_timeout_s: float = 60.0
+    """Таймаут ответа сервиса инференса для клиента в воркере."""
+
+    ai_preload_models: bool = False
+    """Загружать и прогревать YOLO/CLIP в фоне при старте; `/health/ready` ждёт окончания прогрева."""
+
+    ai_decode_max_side: int = 2560
+    """Длинная сторона рабочей копии фото для детектора; рамки всё равно отдаются в пикселях оригинала."""
+
+    ai_crop_max_side: int = 1280
+    """Длинная сторона копии фото, из которой вырезаются кропы для CLIP."""
+
+    ai_item_embedding_max_side: int = 512
+    """Длинная сторона, до которой декодируются фото предметов для эмбеддингов при подборе кандидатов."""
+
+    ai_tiling: Literal["auto", "off", "always"] = "auto"
+    """Режим нарезки на тайлы: `auto` — по разрешению и плотности объектов, `off`, `always`."""
+
+    ai_tile_size: int = 640
+    """Сторона тайла в пикселях рабочей копии фото (равна входу YOLO, без даунскейла)."""
+
+    ai_tile_overlap: float = 0.2
+    """Доля перекрытия соседних тайлов, чтобы объекты на стыке целиком попадали хотя бы в один тайл."""
+
+    ai_tile_max_tiles: int = 16
+    """Бюджет тайлов на изображение; при превышении тайлы увеличиваются."""
+
+    ai_tile_min_side: int = 1600
+    """Длинная сторона, начиная с которой `auto` режет изображение на тайлы без оглядки на плотность."""
+
+    ai_tile_density_objects: int = 20
+    """Число объектов в полнокадровом проходе, при котором `auto` режет на тайлы и меньшее изображение."""
+
     @computed_field
     @property
     def database_url(self) -> str:
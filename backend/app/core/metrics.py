@@ -0,0 +1,250 @@
+"""Лёгкие in-process метрики без внешних зависимостей.
+
+Метрики регистрируются один раз на уровне модуля через `counter`, `gauge`
+и `histogram` и обновляются из любого потока (инференс идёт в
+`asyncio.to_thread`). Значения живут в памяти процесса; каждый
+uvicorn-воркер считает свои. `render()` отдаёт их в текстовом формате
+Prometheus для эндпоинта `/metrics`.
+"""
+
+import math
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Границы бакетов для латентностей в секундах: от 5 мс до 30 с.
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric(ABC):
+    """Общая часть метрик: имя, описание, метки и блокировка."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def _samples(self) -> List[Tuple[str, LabelValues, Tuple[str, ...], float]]:
+        """Сэмплы для экспозиции: (суффикс имени, значения меток, доп. метки, значение)."""
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        """Увеличивает счётчик на `amount` для набора меток."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        with self._lock:
+            return [("_total", key, (), value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Текущее значение: выставляется явно или считается колбэком при выгрузке.
+
+    Колбэк возвращает словарь `{значения меток: значение}` и вызывается на
+    каждый scrape, поэтому подходит для состояний, которые и так хранятся
+    в других местах (пул соединений, состояние моделей).
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        callback: Callable[[], Dict[LabelValues, float]] | None = None,
+    ):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels: object) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels: object) -> Iterator[None]:
+        """Увеличивает gauge на время блока (счётчик выполняющихся операций)."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        if self._callback is not None:
+            return [("", tuple(str(v) for v in key), (), value) for key, value in self._callback().items()]
+        with self._lock:
+            return [("", key, (), value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными бакетами и метками.
+
+    Attributes:
+        name (str): Имя метрики.
+        help (str): Описание метрики.
+        labelnames (tuple[str, ...]): Имена меток.
+        buckets (tuple[float, ...]): Верхние границы бакетов по возрастанию.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # По набору меток: счётчики по бакетам (последний — +Inf), сумма и количество.
+        self._series: Dict[LabelValues, Tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        """Добавляет наблюдение.
+
+        Args:
+            value (float): Значение (для латентностей — секунды).
+            **labels: Значения меток из `labelnames`.
+        """
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+            counts, totals = series
+            counts[idx] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def snapshot(self) -> Dict[LabelValues, dict]:
+        """Копия текущих значений: накопительные счётчики по бакетам, сумма и количество."""
+        with self._lock:
+            result = {}
+            for key, (counts, totals) in self._series.items():
+                cumulative, running = [], 0
+                for count in counts:
+                    running += count
+                    cumulative.append(running)
+                result[key] = {"buckets": cumulative, "sum": totals[0], "count": int(totals[1])}
+            return result
+
+    def _samples(self):
+        samples = []
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key, series in self.snapshot().items():
+            for bound, count in zip(bounds, series["buckets"]):
+                samples.append(("_bucket", key, (("le", bound),), count))
+            samples.append(("_sum", key, (), series["sum"]))
+            samples.append(("_count", key, (), series["count"]))
+        return samples
+
+
+_registry_lock = threading.Lock()
+REGISTRY: Dict[str, _Metric] = {}
+
+
+def _register(cls, name: str, *args, **kwargs):
+    with _registry_lock:
+        metric = REGISTRY.get(name)
+        if metric is None:
+            metric = REGISTRY[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"metric {name} already registered as {metric.type}")
+        return metric
+
+
+def counter(name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+    """Возвращает счётчик из реестра, создавая его при первом обращении."""
+    return _register(Counter, name, help, labelnames)
+
+
+def gauge(
+    name: str,
+    help: str,
+    labelnames: Iterable[str] = (),
+    callback: Callable[[], Dict[LabelValues, float]] | None = None,
+) -> Gauge:
+    """Возвращает gauge из реестра, создавая его при первом обращении."""
+    return _register(Gauge, name, help, labelnames, callback=callback)
+
+
+def histogram(name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+    """Возвращает гистограмму из реестра, создавая её при первом обращении.
+
+    Args:
+        name (str): Имя метрики.
+        help (str): Описание метрики.
+        labelnames (Iterable[str]): Имена меток.
+        buckets (Iterable[float]): Границы бакетов.
+
+    Returns:
+        Histogram: Зарегистрированная гистограмма.
+    """
+    return _register(Histogram, name, help, labelnames, buckets)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render() -> str:
+    """Выгружает все метрики реестра в текстовом формате Prometheus 0.0.4.
+
+    Returns:
+        str: Тело ответа для `/metrics`.
+    """
+    with _registry_lock:
+        metrics = sorted(REGISTRY.values(), key=lambda m: m.name)
+    lines: List[str] = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for suffix, key, extra, value in metric._samples():
+            pairs = list(zip(metric.labelnames, key)) + list(extra)
+            labels = ",".join(f'{name}="{_escape(str(val))}"' for name, val in pairs)
+            lines.append(f"{metric.name}{suffix}{{{labels}}} {_format_value(value)}" if labels else f"{metric.name}{suffix} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,107 @@
+"""ASGI-middleware для метрик и таймингов HTTP-запросов."""
+
+import logging
+import random
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import counter, histogram
+from app.db.query_stats import track_queries
+
+logger = logging.getLogger(__name__)
+
+REQUEST_SECONDS = histogram(
+    "http_request_duration_seconds",
+    "Длительность HTTP-запросов по маршруту, с.",
+    ("method", "route", "status"),
+)
+REQUEST_QUERIES = histogram(
+    "http_request_queries",
+    "Количество SQL-выражений на HTTP-запрос по маршруту.",
+    ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+REQUEST_BYTES = counter(
+    "http_request_bytes",
+    "Байты тел запросов (in) и ответов (out) по маршруту.",
+    ("route", "direction"),
+)
+
+# Длина одного SQL-выражения в логе медленного запроса.
+_LOG_STATEMENT_CHARS = 300
+
+
+def route_template(scope: Scope) -> str:
+    """Шаблон маршрута (`/api/v1/items/{item_id}`) вместо сырого пути.
+
+    Сырой путь с ID дал бы метке неограниченную кардинальность; запросы мимо
+    всех маршрутов складываются в `unmatched`.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """Замеряет каждый HTTP-запрос: время, число SQL-выражений и байты in/out.
+
+    Значения уходят в метрики `http_request_*`. Запросы дольше
+    `settings.request_slow_ms` логируются (с долей `request_slow_sample_rate`)
+    вместе со списком выполненных SQL — так видно N+1 в списках.
+
+    Реализован как «чистый» ASGI, а не `BaseHTTPMiddleware`, чтобы не
+    буферизовать стриминговые ответы (отдача медиа).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.monotonic()
+        status = 500
+        bytes_in = 0
+        bytes_out = 0
+
+        async def _receive() -> Message:
+            nonlocal bytes_in
+            message = await receive()
+            if message["type"] == "http.request":
+                bytes_in += len(message.get("body", b""))
+            return message
+
+        async def _send(message: Message) -> None:
+            nonlocal status, bytes_out
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                bytes_out += len(message.get("body", b""))
+            await send(message)
+
+        with track_queries() as queries:
+            try:
+                await self.app(scope, _receive, _send)
+            finally:
+                elapsed = time.monotonic() - started
+                route = route_template(scope)
+                REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route, status=status)
+                REQUEST_QUERIES.observe(queries.count, method=scope["method"], route=route)
+                REQUEST_BYTES.inc(bytes_in, route=route, direction="in")
+                REQUEST_BYTES.inc(bytes_out, route=route, direction="out")
+                if elapsed * 1000 >= settings.request_slow_ms and random.random() < settings.request_slow_sample_rate:
+                    logger.warning(
+                        "http.slow_request method=%s route=%s path=%s status=%s duration_ms=%.1f queries=%s "
+                        "bytes_in=%s bytes_out=%s\n%s",
+                        scope["method"],
+                        route,
+                        scope["path"],
+                        status,
+                        elapsed * 1000,
+                        queries.count,
+                        bytes_in,
+                        bytes_out,
+                        "\n".join(f"  {statement[:_LOG_STATEMENT_CHARS]}" for statement in queries.statements),
+                    )
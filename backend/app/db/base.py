@@ -16,4 +16,5 @@ from app.models.tag import Tag, ItemTag  # noqa
 from app.models.relations import ItemRelation, ItemNote, ItemHistory  # noqa
 from app.models.media import Media, ItemMedia, MediaUploadHistory  # noqa
 from app.models.todo import Todo  # noqa
-from app.models.ai import AIDetection, AIDetectionObject, AIDetectionCandidate, AIDetectionReview  # noqa
+from app.models.ai import AIDetection, AIDetectionObject, AIDetectionCandidate, AIDetectionReview, AIInferenceCache  # noqa
+from app.models.sync import SyncChange  # noqa
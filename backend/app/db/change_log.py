@@ -0,0 +1,126 @@
+"""Запись журнала изменений `SyncChange` для `GET /sync`.
+
+Слушатель `after_flush` (`instrument_sessions`) смотрит, какие ORM-объекты
+сессия только что вставила, изменила или удалила, и одним INSERT пишет по
+записи на сущность. Изменения связей и дочерних строк поднимаются до
+родителя: тег или медиа предмета — это изменение предмета, объект
+детекции — изменение детекции. Массовые `insert()`/`update()`/`delete()`
+мимо unit of work хук не видит, такие места вызывают `record_changes` сами.
+"""
+
+from collections.abc import Iterable
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.ai import AIDetection, AIDetectionObject
+from app.models.enums import SyncEntity
+from app.models.item import Item
+from app.models.location import Location
+from app.models.media import ItemMedia, Media
+from app.models.sync import SyncChange
+from app.models.tag import ItemTag, Tag
+
+# Модели, которые клиент синхронизирует целиком.
+_ENTITIES = {
+    Item: SyncEntity.ITEM,
+    Location: SyncEntity.LOCATION,
+    Media: SyncEntity.MEDIA,
+    Tag: SyncEntity.TAG,
+    AIDetection: SyncEntity.DETECTION,
+}
+# Строки, изменение которых меняет родителя: модель -> (сущность, атрибут с id родителя).
+_PARENTS = {
+    ItemTag: (SyncEntity.ITEM, "item_id"),
+    ItemMedia: (SyncEntity.ITEM, "item_id"),
+    AIDetectionObject: (SyncEntity.DETECTION, "detection_id"),
+}
+
+
+def _collect(session: Session) -> dict[tuple[SyncEntity, int], tuple[int | None, bool]]:
+    """Собирает `(сущность, id) -> (workspace_id, удалена)` по состоянию сессии до flush."""
+    changes: dict[tuple[SyncEntity, int], tuple[int | None, bool]] = {}
+
+    def _add(entity: SyncEntity, entity_id: int | None, workspace_id: int | None, deleted: bool) -> None:
+        if entity_id is None:
+            return
+        known_ws, was_deleted = changes.get((entity, entity_id), (None, False))
+        changes[(entity, entity_id)] = (workspace_id or known_ws, deleted or was_deleted)
+
+    dirty = [obj for obj in session.dirty if session.is_modified(obj, include_collections=False)]
+    for objects, deleted in ((session.new, False), (dirty, False), (session.deleted, True)):
+        for obj in objects:
+            entity = _ENTITIES.get(type(obj))
+            if entity is not None:
+                _add(entity, obj.id, getattr(obj, "workspace_id", None), deleted)
+                continue
+            parent = _PARENTS.get(type(obj))
+            if parent is not None:
+                _add(parent[0], getattr(obj, parent[1]), None, False)
+    return changes
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    changes = _collect(session)
+    if not changes:
+        return
+    conn = session.connection()
+    # У детекций и связей workspace не хранится: добираем его одним запросом на тип.
+    missing = {
+        entity: [entity_id for (kind, entity_id), (ws, _) in changes.items() if kind is entity and ws is None]
+        for entity in (SyncEntity.ITEM, SyncEntity.DETECTION)
+    }
+    resolved: dict[tuple[SyncEntity, int], int] = {}
+    if missing[SyncEntity.ITEM]:
+        rows = conn.execute(select(Item.id, Item.workspace_id).where(Item.id.in_(missing[SyncEntity.ITEM])))
+        resolved.update({(SyncEntity.ITEM, item_id): ws for item_id, ws in rows})
+    if missing[SyncEntity.DETECTION]:
+        rows = conn.execute(
+            select(AIDetection.id, Media.workspace_id)
+            .join(Media, Media.id == AIDetection.media_id)
+            .where(AIDetection.id.in_(missing[SyncEntity.DETECTION]))
+        )
+        resolved.update({(SyncEntity.DETECTION, detection_id): ws for detection_id, ws in rows})
+    conn.execute(
+        insert(SyncChange),
+        [
+            {
+                "workspace_id": ws if ws is not None else resolved.get(key),
+                "entity": key[0],
+                "entity_id": key[1],
+                "deleted": deleted,
+            }
+            for key, (ws, deleted) in changes.items()
+        ],
+    )
+
+
+def instrument_sessions() -> None:
+    """Подключает запись журнала ко всем ORM-сессиям (в т.ч. внутри `AsyncSession`)."""
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+
+
+async def record_changes(
+    db: AsyncSession,
+    entity: SyncEntity,
+    entity_ids: Iterable[int],
+    workspace_id: int | None,
+    deleted: bool = False,
+) -> None:
+    """Пишет в журнал изменения, сделанные в обход unit of work.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия; запись уходит в её транзакцию.
+        entity (SyncEntity): Тип сущности.
+        entity_ids (Iterable[int]): ID изменённых строк.
+        workspace_id (int | None): Workspace этих строк.
+        deleted (bool): Строки удалены (tombstone).
+    """
+    rows = [
+        {"workspace_id": workspace_id, "entity": entity, "entity_id": entity_id, "deleted": deleted}
+        for entity_id in dict.fromkeys(entity_ids)
+    ]
+    if rows:
+        await db.execute(insert(SyncChange), rows)
@@ -0,0 +1,71 @@
+"""Подсчёт SQL-запросов в пределах HTTP-запроса или блока кода.
+
+Слушатель `before_cursor_execute` вешается на sync-движок (`instrument_engine`)
+и пишет выражения в `QueryStats`, открытый через `track_queries()`. Статистика
+хранится в `ContextVar`: async-движок SQLAlchemy выполняет курсоры в greenlet
+того же контекста, а `asyncio.to_thread` копирует контекст в поток, поэтому
+запросы попадают к тому HTTP-запросу, который их вызвал. Вложенные блоки
+при выходе добавляют свои запросы во внешний: тест, обернувший ASGI-вызов,
+видит запросы, посчитанные middleware внутри.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Сколько выражений хранить для лога медленного запроса; счётчик идёт дальше.
+MAX_RECORDED_STATEMENTS = 100
+
+_current: ContextVar["QueryStats | None"] = ContextVar("query_stats", default=None)
+
+
+@dataclass
+class QueryStats:
+    """Запросы, выполненные в блоке `track_queries()`.
+
+    Attributes:
+        count (int): Количество выполненных SQL-выражений.
+        statements (list[str]): Первые `MAX_RECORDED_STATEMENTS` выражений.
+    """
+
+    count: int = 0
+    statements: List[str] = field(default_factory=list)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Считает SQL-выражения, выполненные внутри блока.
+
+    Yields:
+        QueryStats: Статистика, заполняемая по мере выполнения запросов.
+    """
+    parent = _current.get()
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        if parent is not None:
+            parent.count += stats.count
+            room = MAX_RECORDED_STATEMENTS - len(parent.statements)
+            parent.statements.extend(stats.statements[: max(0, room)])
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.count += 1
+    if len(stats.statements) < MAX_RECORDED_STATEMENTS:
+        stats.statements.append(statement)
+
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """Подключает подсчёт запросов к движку (для async — `engine.sync_engine`)."""
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
@@ -3,10 +3,29 @@
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import settings
+from app.core.metrics import gauge
+from app.db.change_log import instrument_sessions
+from app.db.query_stats import instrument_engine
 
 
 engine = create_async_engine(settings.database_url, future=True, echo=False)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+instrument_engine(engine.sync_engine)
+instrument_sessions()
+
+
+def _pool_usage() -> dict[tuple[str, ...], float]:
+    """Состояние пула соединений для `/metrics`; у пулов без счётчиков (NullPool) пусто."""
+    pool = engine.sync_engine.pool
+    usage: dict[tuple[str, ...], float] = {}
+    for state in ("size", "checkedout", "checkedin", "overflow"):
+        method = getattr(pool, state, None)
+        if callable(method):
+            usage[(state,)] = float(method())
+    return usage
+
+
+gauge("db_pool_connections", "Соединения пула SQLAlchemy по состоянию.", ("state",), callback=_pool_usage)
 
 
 async def get_session() -> AsyncSession:
@@ -4,29 +4,32 @@
 проверки окружения, которые полезны при старте сервиса.
 """
 
+import asyncio
 import logging
 from pathlib import Path
 
 from fastapi import FastAPI
 
-from app.api.routes import api_router
+from app.api.routes import api_router, metrics
 from app.core.config import settings
+from app.core.middleware import RequestMetricsMiddleware
 from app.db import base  # noqa: F401
+from app.services.ai.detector import _resolve_weights_path
+from app.services.ai.warmup import mark_preload_started, preload_models
 
 app = FastAPI(title=settings.project_name)
 app.include_router(api_router, prefix=settings.api_v1_prefix)
+# `/metrics` живёт вне префикса API: так его ищут скрейперы по умолчанию.
+app.include_router(metrics.router)
+app.add_middleware(RequestMetricsMiddleware)
 
 logger = logging.getLogger("uvicorn.error")
 
 
 def _resolve_yolo_weights_path() -> tuple[Path, str]:
-    """Возвращает путь к весам YOLO и источник этого пути."""
-    if settings.ai_yolo_weights_path:
-        weights_path = Path(settings.ai_yolo_weights_path)
-        if not weights_path.is_absolute():
-            weights_path = Path.cwd() / weights_path
-        return weights_path, "AI_YOLO_WEIGHTS_PATH"
-    return Path.home() / ".cache" / "ultralytics" / "assets" / "yolov8n.pt", "default"
+    """Возвращает путь к весам YOLO (с учётом бэкенда детектора) и источник этого пути."""
+    source = "AI_YOLO_WEIGHTS_PATH" if settings.ai_yolo_weights_path else "default"
+    return _resolve_weights_path(settings.ai_detector_backend), source
 
 
 @app.on_event("startup")
@@ -34,13 +37,27 @@ async def log_ai_weights() -> None:
     """Логирует, где backend ищет веса для локального AI-пайплайна."""
     weights_path, source = _resolve_yolo_weights_path()
     logger.info(
-        "ai.weights source=%s path=%s exists=%s",
+        "ai.weights backend=%s source=%s path=%s exists=%s",
+        settings.ai_detector_backend,
         source,
         str(weights_path),
         weights_path.exists(),
     )
 
 
+@app.on_event("startup")
+async def preload_ai_models() -> None:
+    """Запускает фоновую загрузку и прогрев моделей, если это включено в настройках.
+
+    При работе через общий сервис инференса модели живут там, а не в воркере.
+    """
+    if not settings.ai_preload_models or settings.ai_inference_socket:
+        return
+    # До первого запроса: пока поток прогрева не стартовал, readiness уже отвечает 503.
+    mark_preload_started()
+    app.state.ai_preload_task = asyncio.create_task(asyncio.to_thread(preload_models))
+
+
 @app.get("/")
 async def root() -> dict:
     return {"message": "ГдеМоё — приложение, которое помнит за вас."}
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric, String, JSON, func, Enum
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, LargeBinary, Numeric, String, JSON, UniqueConstraint, func, Enum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -17,7 +17,8 @@ class AIDetection(Base):
     может быть несколько детекций по разным кадрам или временным интервалам.
 
     Хранит статус выполнения анализа, технические детали в JSON-поле raw
-    (warnings, progress, embeddings, ошибки) и временные метки.
+    (warnings, progress, ссылка на эмбеддинги, ошибки) и временные метки.
+    Сами эмбеддинги лежат в `AIDetectionObject.embedding`.
 
     Attributes:
         id (int): Уникальный идентификатор детекции.
@@ -33,20 +34,23 @@ class AIDetection(Base):
         reviews: Действия review пользователей по этому анализу.
     """
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    media_id: Mapped[int] = mapped_column(ForeignKey("media.id"), nullable=False)
+    media_id: Mapped[int] = mapped_column(ForeignKey("media.id"), nullable=False, index=True)
     status: Mapped[AIDetectionStatus] = mapped_column(
         Enum(AIDetectionStatus, values_callable=lambda x: [e.value for e in x]),
         default=AIDetectionStatus.PENDING,
     )
-    # `raw` хранит технические детали анализа: warnings, progress, embeddings и ошибки.
+    # `raw` хранит технические детали анализа: warnings, progress, ссылку на embeddings и ошибки.
     raw: Mapped[dict | None] = mapped_column(JSON)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
-    media = relationship("Media")
+    media = relationship("Media", foreign_keys=[media_id])
     objects = relationship("AIDetectionObject", back_populates="detection")
     reviews = relationship("AIDetectionReview", back_populates="detection")
 
+    # Очередь review (`list_detections`) фильтрует по статусу и идёт по id.
+    __table_args__ = (Index("ix_aidetection_status_id", "status", "id"),)
+
 
 class AIDetectionObject(Base):
     """Один найденный объект внутри детекции.
@@ -61,6 +65,7 @@ class AIDetectionObject(Base):
         label (str): Метка распознанного объекта (например, "bottle", "book").
         confidence (float): Уверенность модели в распознавании (0.0-1.0).
         bbox (dict | None): Координаты bounding box в формате {"x1": float, "y1": float, "x2": float, "y2": float}.
+        embedding (bytes | None): CLIP-эмбеддинг кропа объекта в float16.
         suggested_location_id (int | None): ID локации, предложенной AI.
         decision (AIDetectionDecision): Решение пользователя (PENDING, ACCEPT, REJECT, MANUAL).
         decided_by (int | None): ID пользователя, принявшего решение.
@@ -74,30 +79,12 @@ class AIDetectionObject(Base):
         candidates: Кандидаты для сопоставления с предметами.
     """
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    detection_id: Mapped[int] = mapped_column(ForeignKey("aidetection.id"), nullable=False)
-    label: Mapped[str] = mapped_column(String(255), nullable=False)
-    confidence: Mapped[float] = mapped_column(Numeric(5, 3))
-    bbox: Mapped[dict | None] = mapped_column(JSON)
-    suggested_location_id: Mapped[int | None] = mapped_column(ForeignKey("location.id"))
-    decision: Mapped[AIDetectionDecision] = mapped_column(
-        Enum(AIDetectionDecision, values_callable=lambda x: [e.value for e in x]),
-        default=AIDetectionDecision.PENDING,
-        nullable=False,
-    )
-    decided_by: Mapped[int | None] = mapped_column(ForeignKey("user.id"), nullable=True)
-    decided_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
-    # linked_* — итоговые привязки после ручного подтверждения в AI Review.
-    linked_item_id: Mapped[int | None] = mapped_column(ForeignKey("item.id"), nullable=True)
-    linked_location_id: Mapped[int | None] = mapped_column(ForeignKey("location.id"), nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-
-    detection = relationship("AIDetection", back_populates="objects")
-    candidates = relationship("AIDetectionCandidate", back_populates="detection_object")
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    detection_id: Mapped[int] = mapped_column(ForeignKey("aidetection.id"), nullable=False)
+    detection_id: Mapped[int] = mapped_column(ForeignKey("aidetection.id"), nullable=False, index=True)
     label: Mapped[str] = mapped_column(String(255), nullable=False)
     confidence: Mapped[float] = mapped_column(Numeric(5, 3))
     bbox: Mapped[dict | None] = mapped_column(JSON)
+    # Эмбеддинг кропа в float16 (см. `encode_embedding`); по умолчанию не грузится.
+    embedding: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True, deferred=True)
     suggested_location_id: Mapped[int | None] = mapped_column(ForeignKey("location.id"))
     decision: Mapped[AIDetectionDecision] = mapped_column(
         Enum(AIDetectionDecision, values_callable=lambda x: [e.value for e in x]),
@@ -133,14 +120,7 @@ class AIDetectionCandidate(Base):
         detection_object: Связанный объект детекции.
     """
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    detection_object_id: Mapped[int] = mapped_column(ForeignKey("aidetectionobject.id"), nullable=False)
-    item_id: Mapped[int] = mapped_column(ForeignKey("item.id"), nullable=False)
-    score: Mapped[float] = mapped_column(Numeric(5, 3))
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-
-    detection_object = relationship("AIDetectionObject", back_populates="candidates")
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    detection_object_id: Mapped[int] = mapped_column(ForeignKey("aidetectionobject.id"), nullable=False)
+    detection_object_id: Mapped[int] = mapped_column(ForeignKey("aidetectionobject.id"), nullable=False, index=True)
     item_id: Mapped[int] = mapped_column(ForeignKey("item.id"), nullable=False)
     score: Mapped[float] = mapped_column(Numeric(5, 3))
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -176,13 +156,38 @@ class AIDetectionReview(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     detection = relationship("AIDetection", back_populates="reviews")
+
+
+class AIInferenceCache(Base):
+    """Кэш сырых результатов детектора и CLIP по содержимому файла.
+
+    Повторный анализ того же файла теми же моделями не прогоняет YOLO/CLIP
+    заново: из кэша берутся рамки и эмбеддинги, а пересчитывается только
+    дешёвый подбор кандидатов по актуальному набору предметов.
+
+    Attributes:
+        id (int): Уникальный идентификатор записи кэша.
+        file_hash (str): Хэш содержимого файла (`Media.file_hash`).
+        detector_version (str): Версия детектора (бэкенд и веса).
+        clip_version (str): Версия CLIP-модели или `unavailable`.
+        conf (float): Порог уверенности детектора.
+        objects (list | None): Объекты в JSON: label, confidence, bbox, has_embedding.
+        embeddings (bytes | None): Эмбеддинги объектов с `has_embedding` подряд, float16.
+        embedding_dim (int | None): Размерность одного эмбеддинга.
+        warnings (list | None): Warnings инференса.
+        created_at (datetime): Время создания записи.
+    """
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    detection_id: Mapped[int] = mapped_column(ForeignKey("aidetection.id"), nullable=False, index=True)
-    user_id: Mapped[int | None] = mapped_column(ForeignKey("user.id"), nullable=True)
-    action: Mapped[AIDetectionReviewAction] = mapped_column(
-        Enum(AIDetectionReviewAction, values_callable=lambda x: [e.value for e in x]), nullable=False
-    )
-    payload: Mapped[dict | None] = mapped_column(JSON)
+    file_hash: Mapped[str] = mapped_column(String(128), nullable=False)
+    detector_version: Mapped[str] = mapped_column(String(255), nullable=False)
+    clip_version: Mapped[str] = mapped_column(String(255), nullable=False)
+    conf: Mapped[float] = mapped_column(Numeric(5, 3), nullable=False)
+    objects: Mapped[list | None] = mapped_column(JSON)
+    embeddings: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    embedding_dim: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    warnings: Mapped[list | None] = mapped_column(JSON)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
-    detection = relationship("AIDetection", back_populates="reviews")
+    __table_args__ = (
+        UniqueConstraint("file_hash", "detector_version", "clip_version", "conf", name="uq_aiinferencecache_key"),
+    )
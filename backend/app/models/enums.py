@@ -79,3 +79,12 @@ class AIDetectionReviewAction(str, enum.Enum):
     LINK = "link_existing"
     CREATE = "create_new"
     FIX_LOCATION = "fix_location"
+
+
+class SyncEntity(str, enum.Enum):
+    """Тип сущности в журнале изменений для `GET /sync`."""
+    ITEM = "item"
+    LOCATION = "location"
+    MEDIA = "media"
+    DETECTION = "detection"
+    TAG = "tag"
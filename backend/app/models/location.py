@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, JSON, func, Enum
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, JSON, func, Enum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -20,7 +20,7 @@ class Location(Base):
         default=LocationKind.OTHER,
     )
     # `path` хранит materialized path и помогает быстро перестраивать дерево.
-    path: Mapped[str | None] = mapped_column(String(1024), index=True)  # можно использовать ltree
+    path: Mapped[str | None] = mapped_column(String(1024))  # можно использовать ltree
     photo_media_id: Mapped[int | None] = mapped_column(ForeignKey("media.id"), nullable=True, index=True)
     meta: Mapped[dict | None] = mapped_column(JSON)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -30,3 +30,9 @@ class Location(Base):
     photo_media = relationship("Media", foreign_keys=[photo_media_id])
     workspace = relationship("Workspace", back_populates="locations")
     items = relationship("Item", back_populates="location")
+
+    __table_args__ = (
+        # Потомков перемещённого узла ищут по префиксу `path LIKE 'old.%'`:
+        # в PostgreSQL btree с не-C collation обслуживает LIKE только с pattern_ops.
+        Index("ix_location_path", "path", postgresql_ops={"path": "varchar_pattern_ops"}),
+    )
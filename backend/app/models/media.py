@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Numeric, func, Enum, JSON
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Numeric, func, Enum, JSON, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -28,6 +28,7 @@ class Media(Base):
         file_hash (str | None): Хэш файла для проверки дубликатов.
         created_at (datetime): Время загрузки файла.
         analyzed_at (datetime | None): Время последнего AI-анализа.
+        latest_detection_id (int | None): ID самой свежей AI-детекции этого медиа.
 
     Relationships:
         items: Связи с предметами через ItemMedia.
@@ -46,9 +47,28 @@ class Media(Base):
     file_hash: Mapped[str | None] = mapped_column(String(128))
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     analyzed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Указатель на самую свежую детекцию: карточки медиа читают анализ по PK,
+    # без `ORDER BY aidetection.id DESC LIMIT 1`. Поддерживается пайплайном.
+    latest_detection_id: Mapped[int | None] = mapped_column(
+        ForeignKey("aidetection.id", use_alter=True, name="fk_media_latest_detection_id", ondelete="SET NULL"),
+        nullable=True,
+    )
 
     items = relationship("ItemMedia", back_populates="media")
 
+    __table_args__ = (
+        # Поиск повторных загрузок в `_hash_candidates`: хэш есть не у всех файлов.
+        Index(
+            "ix_media_workspace_file_hash",
+            "workspace_id",
+            "file_hash",
+            postgresql_where=text("file_hash IS NOT NULL"),
+            sqlite_where=text("file_hash IS NOT NULL"),
+        ),
+        Index("ix_media_workspace_id", "workspace_id", "id"),
+        Index("ix_media_location_id", "location_id"),
+    )
+
 
 class ItemMedia(Base):
     __tablename__ = "item_media"
@@ -72,6 +92,9 @@ class ItemMedia(Base):
     item = relationship("Item", back_populates="media_links")
     media = relationship("Media", back_populates="items")
 
+    # PK (item_id, media_id) не помогает при переходе от медиа к предметам.
+    __table_args__ = (Index("ix_item_media_media_id", "media_id"),)
+
 
 class MediaUploadHistory(Base):
     __tablename__ = "mediauploadhistory"
@@ -119,3 +142,9 @@ class MediaUploadHistory(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     media = relationship("Media")
+
+    __table_args__ = (
+        # `/media/history`: ORDER BY created_at DESC LIMIT n, опционально по владельцу.
+        Index("ix_mediauploadhistory_created_at", "created_at"),
+        Index("ix_mediauploadhistory_owner_created_at", "owner_user_id", "created_at"),
+    )
@@ -0,0 +1,41 @@
+"""ORM-модель журнала изменений для дельта-синхронизации клиентов."""
+
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Enum, Index, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+from app.models.enums import SyncEntity
+
+
+class SyncChange(Base):
+    """Запись журнала: сущность изменилась или удалена.
+
+    `id` монотонно растёт и служит водяным знаком `GET /sync?since=`: клиент
+    получает только записи новее своего знака. Удаление — та же запись с
+    `deleted=True` (tombstone). Пишется хуком `app.db.change_log` и явными
+    вызовами `record_changes` там, где изменения идут мимо ORM.
+
+    Attributes:
+        id (int): Порядковый номер изменения.
+        workspace_id (int | None): Workspace сущности; без FK, чтобы tombstone пережил удаление.
+        entity (SyncEntity): Тип сущности.
+        entity_id (int): ID изменённой строки.
+        deleted (bool): Строка удалена.
+        created_at (datetime): Время записи (начало транзакции).
+    """
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    workspace_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    entity: Mapped[SyncEntity] = mapped_column(
+        Enum(SyncEntity, values_callable=lambda x: [e.value for e in x]), nullable=False
+    )
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # `GET /sync?workspace_id=`: WHERE workspace_id = ? AND id > ? ORDER BY id.
+        Index("ix_syncchange_workspace_id", "workspace_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
@@ -2,22 +2,24 @@
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
 
 
 class Tag(Base):
-    """Тег внутри workspace."""
+    """Тег внутри workspace; название уникально без учёта регистра."""
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     workspace_id: Mapped[int] = mapped_column(ForeignKey("workspace.id"), nullable=False)
     name: Mapped[str] = mapped_column(String(128), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
-    __table_args__ = (
-        {"sqlite_autoincrement": True},
-    )
+    __table_args__ = ({"sqlite_autoincrement": True},)
+
+
+# Цель `ON CONFLICT DO NOTHING` при создании тегов: «Tools» и «tools» — один тег.
+Index("uq_tag_workspace_lower_name", Tag.workspace_id, func.lower(Tag.name), unique=True)
 
 
 class ItemTag(Base):
@@ -1,7 +1,7 @@
 """Pydantic-схемы предметов для API."""
 
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -75,3 +75,33 @@ class ItemOut(ItemBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ItemBatchRequest(BaseModel):
+    """Пакетное создание и обновление предметов (импорт чека, таблицы).
+
+    Строки без `id` создают предметы по схеме ItemCreate, строки с `id`
+    обновляют существующие по схеме ItemUpdate. Строки валидируются по
+    отдельности: ошибка в одной не отменяет остальные.
+    """
+    workspace_id: int
+    title: str | None = None
+    location_id: int | None = None
+    items: list[dict[str, Any]] = Field(min_length=1, max_length=1000)
+
+
+class ItemBatchRowResult(BaseModel):
+    """Результат обработки одной строки пакета."""
+    index: int
+    status: Literal["created", "updated", "error"]
+    item_id: int | None = None
+    errors: list[str] | None = None
+
+
+class ItemBatchResult(BaseModel):
+    """Ответ пакетной операции."""
+    batch_id: int | None = None
+    created: int
+    updated: int
+    failed: int
+    results: list[ItemBatchRowResult]
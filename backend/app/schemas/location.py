@@ -5,6 +5,7 @@ from datetime import datetime
 from pydantic import BaseModel, ConfigDict
 
 from app.models.enums import LocationKind
+from app.schemas.item import ItemOut
 
 
 class LocationBase(BaseModel):
@@ -38,3 +39,38 @@ class LocationOut(LocationBase):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class LocationTreeNode(BaseModel):
+    """Узел дерева локаций со счётчиками предметов и медиа.
+
+    `item_count`/`media_count` — привязанные к самой локации, `total_*` — ко
+    всему поддереву. Если `child_count > 0`, а `children` пуст, поддерево
+    обрезано ограничением глубины и раскрывается запросом с `root_id`.
+    """
+    id: int
+    workspace_id: int
+    parent_id: int | None = None
+    name: str
+    kind: LocationKind
+    path: str | None = None
+    photo_media_id: int | None = None
+    depth: int
+    child_count: int
+    item_count: int
+    media_count: int
+    total_item_count: int
+    total_media_count: int
+    children: list["LocationTreeNode"] = []
+
+
+class LocationBreadcrumb(BaseModel):
+    """Звено пути от корня дерева до локации."""
+    id: int
+    name: str
+    kind: LocationKind
+
+
+class LocationItemOut(ItemOut):
+    """Предмет в выдаче локации; `breadcrumb` заполняется в режиме `recursive`."""
+    breadcrumb: list[LocationBreadcrumb] | None = None
@@ -0,0 +1,39 @@
+"""Pydantic-схемы дельта-синхронизации `GET /sync`."""
+
+from pydantic import BaseModel, Field
+
+from app.models.enums import SyncEntity
+from app.schemas.ai import AIDetectionOut
+from app.schemas.item import ItemOut
+from app.schemas.location import LocationOut
+
+
+class SyncTag(BaseModel):
+    """Тег workspace."""
+    id: int
+    workspace_id: int
+    name: str
+
+
+class SyncTombstone(BaseModel):
+    """Удалённая сущность: клиент убирает её из локальной копии."""
+    entity: SyncEntity
+    id: int
+
+
+class SyncOut(BaseModel):
+    """Изменения после водяного знака `since`.
+
+    Каждая сущность приходит в актуальном состоянии не более одного раза.
+    Если `has_more`, клиент сразу повторяет запрос с `since=watermark`, иначе
+    сохраняет `watermark` до следующей синхронизации. Повторная доставка
+    возможна, поэтому применять изменения нужно идемпотентно (upsert по `id`).
+    """
+    watermark: int
+    has_more: bool = False
+    items: list[ItemOut] = Field(default_factory=list)
+    locations: list[LocationOut] = Field(default_factory=list)
+    media: list[dict] = Field(default_factory=list)
+    detections: list[AIDetectionOut] = Field(default_factory=list)
+    tags: list[SyncTag] = Field(default_factory=list)
+    deleted: list[SyncTombstone] = Field(default_factory=list)
@@ -0,0 +1,107 @@
+"""Декодирование фото для AI-анализа в уменьшенном рабочем разрешении.
+
+YOLO всё равно сжимает кадр до 640 px, а CLIP — кроп до 224 px, поэтому
+полноразмерный RGB-массив 50 MP фото (~150 MB) анализу не нужен. JPEG
+декодируется сразу с уменьшением через `Image.draft` (масштабирование DCT в
+libjpeg, 1/2–1/8). HEIC/PNG декодируются целиком (libheif через `pillow_heif`
+не умеет масштабировать при декоде) и сразу уменьшаются, так что дальше по
+пайплайну живёт только рабочая копия.
+Рамки детектора переводятся обратно в пиксели оригинала через `AnalysisImage.to_original`.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+from PIL import Image
+
+try:
+    from pillow_heif import register_heif_opener
+
+    register_heif_opener()
+except Exception:
+    pass
+
+BBox = Tuple[float, float, float, float]
+
+
+@dataclass
+class AnalysisImage:
+    """Рабочая копия фото и преобразование координат к оригиналу.
+
+    Attributes:
+        image (Image.Image): RGB-копия в рабочем разрешении (для детектора).
+        original_size (tuple[int, int]): Размер оригинала (ширина, высота).
+        crop_image (Image.Image): RGB-копия среднего разрешения для CLIP-кропов.
+    """
+
+    image: Image.Image
+    original_size: Tuple[int, int]
+    crop_image: Image.Image
+
+    def to_original(self, bbox: BBox) -> BBox:
+        """Переводит рамку из пикселей рабочей копии в пиксели оригинала."""
+        sx = self.original_size[0] / self.image.width
+        sy = self.original_size[1] / self.image.height
+        return (bbox[0] * sx, bbox[1] * sy, bbox[2] * sx, bbox[3] * sy)
+
+    def crop(self, bbox: BBox) -> Image.Image:
+        """Вырезает рамку (в пикселях оригинала) из копии для CLIP."""
+        sx = self.crop_image.width / self.original_size[0]
+        sy = self.crop_image.height / self.original_size[1]
+        return self.crop_image.crop((bbox[0] * sx, bbox[1] * sy, bbox[2] * sx, bbox[3] * sy))
+
+
+def _fit(size: Tuple[int, int], max_side: int) -> Tuple[int, int]:
+    width, height = size
+    ratio = min(1.0, max_side / max(width, height))
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+
+def _downscale(image: Image.Image, max_side: int) -> Image.Image:
+    if max(image.size) <= max_side:
+        return image
+    return image.resize(_fit(image.size, max_side), Image.BILINEAR, reducing_gap=2.0)
+
+
+def open_rgb(path: Path, max_side: int) -> Image.Image:
+    """Декодирует изображение с диска в RGB не больше `max_side` по длинной стороне.
+
+    Pillow читает файл по пути потоково, без промежуточной копии всего файла в
+    `bytes`; файл закрывается сразу после декода.
+
+    Args:
+        path (Path): Путь к изображению.
+        max_side (int): Максимальная длинная сторона результата.
+
+    Returns:
+        Image.Image: RGB-изображение, независимое от файла.
+    """
+    with Image.open(path) as source:
+        if source.format == "JPEG":
+            # draft выбирает ближайший масштаб DCT не меньше запрошенного размера.
+            source.draft("RGB", _fit(source.size, max_side))
+        rgb = source if source.mode == "RGB" else source.convert("RGB")
+        image = _downscale(rgb, max_side)
+        if image is source:
+            # Маленькое фото без уменьшения: копия переживёт закрытие файла.
+            image = source.copy()
+    return image
+
+
+def open_for_analysis(path: Path, max_side: int, crop_max_side: int) -> AnalysisImage:
+    """Открывает фото сразу в рабочем разрешении.
+
+    Args:
+        path (Path): Путь к изображению.
+        max_side (int): Длинная сторона рабочей копии для детектора.
+        crop_max_side (int): Длинная сторона копии для CLIP-кропов (не больше рабочей).
+
+    Returns:
+        AnalysisImage: Рабочая копия, копия для кропов и размер оригинала.
+    """
+    with Image.open(path) as source:
+        original_size = source.size
+    image = open_rgb(path, max_side)
+    crop_image = _downscale(image, min(max_side, crop_max_side))
+    return AnalysisImage(image=image, original_size=original_size, crop_image=crop_image)
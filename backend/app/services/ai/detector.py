@@ -2,16 +2,20 @@
 
 Модель загружается лениво, чтобы backend не падал на старте, если в системе
 нет torch/ultralytics или не скачаны веса. В этом случае включается простой
-контурный детектор.
+контурный детектор. Инференс идёт через ultralytics или ONNX Runtime
+(`settings.ai_detector_backend`), оба бэкенда отдают список `DetectedObject`.
 """
 
 import logging
+import os
 from functools import lru_cache
-from typing import List, Tuple
+from pathlib import Path
+from typing import List, Protocol, Tuple
 
 import numpy as np
 
 from app.core.config import settings
+from app.services.ai.timings import stage
 
 logger = logging.getLogger(__name__)
 
@@ -23,46 +27,170 @@ class DetectedObject:
         bbox (tuple): координаты (x1, y1, x2, y2) рамки объекта.
         label (str): текстовая метка класса.
         score (float): доверие модели к детекции.
+        fallback (bool): рамку дал контурный fallback, потому что модель не загрузилась.
     """
-    def __init__(self, bbox: Tuple[float, float, float, float], label: str, score: float):
+    def __init__(self, bbox: Tuple[float, float, float, float], label: str, score: float, fallback: bool = False):
         self.bbox = bbox  # (x1, y1, x2, y2)
         self.label = label
         self.score = score
+        self.fallback = fallback
+
+
+class DetectorBackend(Protocol):
+    """Интерфейс бэкенда детектора: одно RGB-изображение -> список объектов."""
+
+    names: dict
+
+    def predict(self, image_array: np.ndarray, conf: float = 0.25) -> List[DetectedObject]:
+        ...
+
+    def predict_batch(self, images: List[np.ndarray], conf: float = 0.25) -> List[List[DetectedObject]]:
+        ...
+
+
+class UltralyticsDetector:
+    """Бэкенд на `ultralytics.YOLO` (eager PyTorch).
+
+    Attributes:
+        model: Загруженная модель ultralytics.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.names = model.names
+
+    def predict(self, image_array: np.ndarray, conf: float = 0.25) -> List[DetectedObject]:
+        return self.predict_batch([image_array], conf=conf)[0]
+
+    def predict_batch(self, images: List[np.ndarray], conf: float = 0.25) -> List[List[DetectedObject]]:
+        # ultralytics принимает список картинок и прогоняет их одним батчем.
+        results = self.model.predict(source=list(images), conf=conf, verbose=False)
+        return [self._to_objects(res) for res in results]
+
+    def _to_objects(self, res) -> List[DetectedObject]:
+        if res.boxes is None:
+            return []
+        detected: List[DetectedObject] = []
+        for box in res.boxes:
+            x1, y1, x2, y2 = box.xyxy[0].tolist()
+            score = float(box.conf[0])
+            cls_idx = int(box.cls[0])
+            label = self.names.get(cls_idx, "object")
+            detected.append(DetectedObject((x1, y1, x2, y2), label, score))
+        return detected
+
+
+def _resolve_weights_path(backend: str) -> Path:
+    """Возвращает абсолютный путь к весам для выбранного бэкенда.
+
+    Для `onnx` берётся файл `.onnx` рядом с `.pt` — так его кладёт
+    `scripts/train_yolo.py --export`.
+    """
+    default_weights = Path(os.path.expanduser("~/.cache/ultralytics/assets/yolov8n.pt"))
+    weights_path = Path(settings.ai_yolo_weights_path) if settings.ai_yolo_weights_path else default_weights
+    if not weights_path.is_absolute():
+        weights_path = Path.cwd() / weights_path
+    if backend == "onnx" and weights_path.suffix != ".onnx":
+        weights_path = weights_path.with_suffix(".onnx")
+    return weights_path
+
+
+# Последняя попытка `_load_model` не дала модели: детекция идёт через fallback.
+_load_failed = False
+
+
+def detector_version() -> str:
+    """Версия детектора для ключа кэша инференса: бэкенд и отпечаток файла весов.
+
+    Модель здесь не грузится: функцию зовут из event loop. Если весов нет или
+    прошлая загрузка не удалась (нет ultralytics/onnxruntime, битый файл),
+    работает контурный fallback — у него своя версия. До первой загрузки, как
+    и с сервисом инференса, где модель живёт в другом процессе, fallback-результат
+    помечается warning `detector_fallback` и не кэшируется под версией весов
+    (см. `inference_cache.store`).
+    Параметры нарезки на тайлы тоже входят в версию: они меняют набор рамок.
+    """
+    backend = settings.ai_detector_backend
+    weights_path = _resolve_weights_path(backend)
+    if not weights_path.exists() or (not settings.ai_inference_socket and _load_failed):
+        return "fallback"
+    stat = weights_path.stat()
+    tiling = settings.ai_tiling
+    if tiling != "off":
+        tiling += (
+            f"/{settings.ai_tile_size}/{settings.ai_tile_overlap}/{settings.ai_tile_max_tiles}"
+            f"/{settings.ai_tile_min_side}/{settings.ai_tile_density_objects}"
+        )
+    return f"{backend}:{weights_path.name}:{stat.st_size}:{int(stat.st_mtime)}:{tiling}"
 
 
 @lru_cache(maxsize=1)
-def _load_model():
-    """Лениво загружает YOLO и кеширует объект модели.
+def _load_model() -> DetectorBackend | None:
+    """Лениво загружает бэкенд детектора и кеширует его.
 
-    Пытается загрузить модель YOLOv8 из указанного пути к весам.
-    Если веса не найдены или ultralytics не установлен, возвращает None.
+    Бэкенд выбирается через `settings.ai_detector_backend`: `ultralytics`
+    (YOLO .pt на torch) или `onnx` (ONNX Runtime, без torch).
+    Если веса не найдены, возвращает None. Исход загрузки запоминается
+    в `_load_failed` для `detector_version`.
 
     Returns:
-        YOLO | None: Загруженная модель YOLO или None при ошибке.
+        DetectorBackend | None: Загруженный детектор или None при ошибке.
+
+    Raises:
+        ImportError: Если не установлены зависимости выбранного бэкенда.
     """
+    global _load_failed
+    try:
+        model = _load_backend()
+    except ImportError:
+        _load_failed = True
+        raise
+    _load_failed = model is None
+    return model
+
+
+def _load_backend() -> DetectorBackend | None:
+    backend = settings.ai_detector_backend
+    weights_path = _resolve_weights_path(backend)
+    if backend == "onnx":
+        from app.services.ai.onnx_detector import OnnxYoloDetector
+
+        if not weights_path.exists():
+            logger.warning("ONNX weights not found at %s, skipping detection", weights_path)
+            return None
+        try:
+            return OnnxYoloDetector.from_path(weights_path, iou_threshold=settings.ai_detector_iou)
+        except ImportError:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("failed to load ONNX weights: %s", exc)
+            return None
+
     try:
         from ultralytics import YOLO
     except ImportError as exc:  # noqa: BLE001
         raise ImportError("ultralytics/torch not installed") from exc
 
-    import os
-    from pathlib import Path
-
-    default_weights = Path(os.path.expanduser("~/.cache/ultralytics/assets/yolov8n.pt"))
-    weights_path = Path(settings.ai_yolo_weights_path) if settings.ai_yolo_weights_path else default_weights
-    if not weights_path.is_absolute():
-        weights_path = Path.cwd() / weights_path
     if not weights_path.exists():
         logger.warning("YOLO weights not found at %s, skipping detection", weights_path)
         return None
 
     try:
-        return YOLO(str(weights_path))
+        return UltralyticsDetector(YOLO(str(weights_path)))
     except Exception as exc:  # noqa: BLE001
         logger.warning("failed to load YOLO weights: %s", exc)
         return None
 
 
+def _local_model() -> DetectorBackend | None:
+    """`_load_model`, где ошибка загрузки означает работу через fallback."""
+    try:
+        return _load_model()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("detector unavailable: %s", exc)
+        return None
+
+
 def _fallback_detect(image_array: np.ndarray) -> List[DetectedObject]:
     """Упрощённый детектор на случай недоступности YOLO.
 
@@ -95,11 +223,44 @@ def _fallback_detect(image_array: np.ndarray) -> List[DetectedObject]:
     return [DetectedObject((x, y, x + w, y + h), "object", score)]
 
 
+def detect_objects_batch(images: List[np.ndarray], conf: float = 0.25) -> List[List[DetectedObject]]:
+    """Локальная детекция пачки изображений одним вызовом модели.
+
+    Используется сервисом инференса для micro-batching; для каждой картинки
+    без находок (или без модели) подставляется fallback-детекция. Крупные или
+    плотные кадры дополнительно проходят тайловый режим (см. `tiling`).
+
+    Args:
+        images (List[np.ndarray]): RGB-изображения.
+        conf (float): Порог уверенности для YOLO (0.0-1.0).
+
+    Returns:
+        List[List[DetectedObject]]: Объекты для каждого изображения, в том же порядке.
+    """
+    model = _local_model()
+    if model is None:
+        results = [_fallback_detect(image) for image in images]
+        for objects in results:
+            for obj in objects:
+                obj.fallback = True
+        return results
+    from app.services.ai.tiling import detect_tiled
+
+    results = model.predict_batch(list(images), conf=conf)
+    results = detect_tiled(lambda crops: model.predict_batch(crops, conf=conf), list(images), results)
+    return [detected or _fallback_detect(image) for image, detected in zip(images, results)]
+
+
 def detect_objects(image_array: np.ndarray, conf: float = 0.25) -> List[DetectedObject]:
     """Основная точка входа детектора с автоматическим фолбэком.
 
-    Пытается использовать YOLO, но если модель не доступна или ничего не нашла,
-    возвращает результаты упрощённого детектора.
+    Пытается использовать YOLO (через выбранный бэкенд), но если модель
+    не доступна или ничего не нашла, возвращает результаты упрощённого детектора.
+    Если задан `settings.ai_inference_socket`, запрос уходит в общий сервис
+    инференса; если сервиса нет, детекция выполняется локально. Таймаут
+    перегруженного сервиса — ошибка: локальная копия модели в каждом воркере
+    только добавила бы нагрузки.
+    Время вызова пишется в стадию `detect` (см. `timings`).
 
     Args:
         image_array (np.ndarray): RGB-изображение.
@@ -107,25 +268,16 @@ def detect_objects(image_array: np.ndarray, conf: float = 0.25) -> List[Detected
 
     Returns:
         List[DetectedObject]: Найденные объекты или fallback-детекция.
+
+    Raises:
+        InferenceTimeout: Если сервис инференса не ответил вовремя.
     """
-    try:
-        model = _load_model()
-    except Exception as exc:  # noqa: BLE001
-        logger.warning("detector unavailable: %s", exc)
-        return _fallback_detect(image_array)
-    if model is None:
-        return _fallback_detect(image_array)
-    results = model.predict(source=image_array, conf=conf, verbose=False)
-    detected: List[DetectedObject] = []
-    if not results:
-        return _fallback_detect(image_array)
-    res = results[0]
-    if res.boxes is None or len(res.boxes) == 0:
-        return _fallback_detect(image_array)
-    for box in res.boxes:
-        x1, y1, x2, y2 = box.xyxy[0].tolist()
-        score = float(box.conf[0])
-        cls_idx = int(box.cls[0])
-        label = model.names.get(cls_idx, "object")
-        detected.append(DetectedObject((x1, y1, x2, y2), label, score))
-    return detected
+    with stage("detect"):
+        if settings.ai_inference_socket:
+            from app.services.ai import inference_client
+
+            try:
+                return inference_client.detect_objects(image_array, conf=conf)
+            except inference_client.InferenceUnavailable as exc:
+                logger.warning("inference server unavailable, detecting locally: %s", exc)
+        return detect_objects_batch([image_array], conf=conf)[0]
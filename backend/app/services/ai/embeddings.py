@@ -3,10 +3,22 @@
 Импорт тяжёлых зависимостей делаем лениво, чтобы backend мог стартовать даже
 в окружениях, где CLIP не установлен и доступен только фолбэк-пайплайн.
 """
+import logging
 from functools import lru_cache
 
 import numpy as np
 
+from app.services.ai.timings import stage
+
+logger = logging.getLogger(__name__)
+
+# Эмбеддинги объектов храним компактно: float16 даёт 1 KB на вектор из 512 значений
+# против ~10 KB JSON-текста, а точности для косинусной близости хватает.
+EMBEDDING_STORAGE_DTYPE = "float16"
+
+CLIP_MODEL_NAME = "ViT-B-32"
+CLIP_PRETRAINED = "laion2b_s34b_b79k"
+
 
 @lru_cache(maxsize=1)
 def _load_clip():
@@ -18,31 +30,73 @@ def _load_clip():
         raise ImportError("open_clip/torch not installed") from exc
 
     model, _, preprocess = open_clip.create_model_and_transforms(
-        "ViT-B-32", pretrained="laion2b_s34b_b79k"
+        CLIP_MODEL_NAME, pretrained=CLIP_PRETRAINED
     )
-    tokenizer = open_clip.get_tokenizer("ViT-B-32")
+    tokenizer = open_clip.get_tokenizer(CLIP_MODEL_NAME)
     device = "cuda" if torch.cuda.is_available() else "cpu"
     model = model.to(device)
     return model, preprocess, tokenizer, device
 
 
-def image_embedding(pil_image) -> np.ndarray:
-    """Возвращает нормализованный эмбеддинг изображения.
+def clip_version() -> str:
+    """Версия CLIP для ключа кэша инференса.
+
+    Без установленных open_clip/torch эмбеддинги не считаются вовсе, поэтому
+    такое окружение получает отдельную версию `unavailable`.
+    """
+    import importlib.util
+
+    if importlib.util.find_spec("open_clip") is None or importlib.util.find_spec("torch") is None:
+        return "unavailable"
+    return f"{CLIP_MODEL_NAME}/{CLIP_PRETRAINED}"
+
+
+def image_embeddings(pil_images: list) -> list[np.ndarray]:
+    """Считает эмбеддинги пачки изображений одним вызовом `encode_image`.
 
     Args:
-        pil_image (Image.Image): Изображение PIL в любом формате.
+        pil_images (list[Image.Image]): Изображения PIL.
 
     Returns:
-        np.ndarray: Вектор из float32 длины 512, нормализованный по L2.
+        list[np.ndarray]: Векторы float32 длины 512, нормализованные по L2.
     """
     import torch
 
     model, preprocess, _, device = _load_clip()
-    img = preprocess(pil_image).unsqueeze(0).to(device)
+    batch = torch.stack([preprocess(image) for image in pil_images]).to(device)
     with torch.no_grad():
-        emb = model.encode_image(img)
+        emb = model.encode_image(batch)
         emb = emb / emb.norm(dim=-1, keepdim=True)
-    return emb.cpu().numpy().astype("float32")[0]
+    return list(emb.cpu().numpy().astype("float32"))
+
+
+def image_embedding(pil_image) -> np.ndarray:
+    """Возвращает нормализованный эмбеддинг изображения.
+
+    При заданном `settings.ai_inference_socket` считает его в общем сервисе
+    инференса, иначе — локально. Локально считаем и когда сервиса нет, но
+    не при его таймауте. Время вызова пишется в стадию `embed`.
+
+    Args:
+        pil_image (Image.Image): Изображение PIL в любом формате.
+
+    Returns:
+        np.ndarray: Вектор из float32 длины 512, нормализованный по L2.
+
+    Raises:
+        InferenceTimeout: Если сервис инференса не ответил вовремя.
+    """
+    from app.core.config import settings
+
+    with stage("embed"):
+        if settings.ai_inference_socket:
+            from app.services.ai import inference_client
+
+            try:
+                return inference_client.image_embedding(pil_image)
+            except inference_client.InferenceUnavailable as exc:
+                logger.warning("inference server unavailable, embedding locally: %s", exc)
+        return image_embeddings([pil_image])[0]
 
 
 def text_embedding(text: str) -> np.ndarray:
@@ -62,3 +116,27 @@ def text_embedding(text: str) -> np.ndarray:
         emb = model.encode_text(tokens)
         emb = emb / emb.norm(dim=-1, keepdim=True)
     return emb.cpu().numpy().astype("float32")[0]
+
+
+def encode_embedding(embedding: np.ndarray) -> bytes:
+    """Упаковывает эмбеддинг в байты для колонки `AIDetectionObject.embedding`.
+
+    Args:
+        embedding (np.ndarray): Вектор эмбеддинга.
+
+    Returns:
+        bytes: Little-endian float16 представление вектора.
+    """
+    return np.asarray(embedding, dtype="<f2").tobytes()
+
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    """Распаковывает эмбеддинг, сохранённый через `encode_embedding`.
+
+    Args:
+        blob (bytes): Содержимое колонки `AIDetectionObject.embedding`.
+
+    Returns:
+        np.ndarray: Вектор float32.
+    """
+    return np.frombuffer(blob, dtype="<f2").astype("float32")
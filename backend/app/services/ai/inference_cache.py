@@ -0,0 +1,133 @@
+"""Кэш результатов детектора и CLIP по содержимому файла и версиям моделей.
+
+Ключ — `(Media.file_hash, detector_version, clip_version, conf)`. Повторный
+анализ того же файла теми же моделями берёт рамки и эмбеддинги отсюда и
+пересчитывает только подбор кандидатов (`pipeline._match_candidates`).
+"""
+
+import logging
+from typing import Any, NamedTuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import counter
+from app.models.ai import AIInferenceCache
+from app.services.ai.detector import detector_version
+from app.services.ai.embeddings import clip_version, decode_embedding, encode_embedding
+
+logger = logging.getLogger(__name__)
+
+LOOKUPS = counter("ai_inference_cache_lookups", "Обращения к кэшу инференса по результату.", ("result",))
+
+
+class CacheKey(NamedTuple):
+    file_hash: str
+    detector_version: str
+    clip_version: str
+    conf: float
+
+
+def cache_key(file_hash: str | None, conf: float) -> CacheKey | None:
+    """Строит ключ кэша; для файлов без хэша кэш не используется.
+
+    Рабочее разрешение декода и копии для кропов меняют рамки и эмбеддинги,
+    поэтому входят в версии детектора и CLIP соответственно.
+    """
+    if not file_hash:
+        return None
+    return CacheKey(
+        file_hash,
+        f"{detector_version()}@{settings.ai_decode_max_side}",
+        f"{clip_version()}@{settings.ai_crop_max_side}",
+        round(conf, 3),
+    )
+
+
+def _key_filter(stmt, key: CacheKey):
+    return (
+        stmt.where(AIInferenceCache.file_hash == key.file_hash)
+        .where(AIInferenceCache.detector_version == key.detector_version)
+        .where(AIInferenceCache.clip_version == key.clip_version)
+        .where(AIInferenceCache.conf == key.conf)
+    )
+
+
+async def load_cached(db: AsyncSession, key: CacheKey) -> tuple[list[dict[str, Any]], list[str]] | None:
+    """Возвращает объекты и warnings из кэша или None при промахе.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        key (CacheKey): Ключ кэша.
+
+    Returns:
+        tuple[list[dict[str, Any]], list[str]] | None: Объекты в формате `_detect_and_embed`
+            (с эмбеддингами `np.ndarray | None`) и warnings инференса.
+    """
+    row = (await db.execute(_key_filter(select(AIInferenceCache), key))).scalar_one_or_none()
+    LOOKUPS.inc(result="miss" if row is None else "hit")
+    if row is None:
+        return None
+    dim = row.embedding_dim or 0
+    vectors = (
+        decode_embedding(row.embeddings).reshape(-1, dim) if row.embeddings and dim else np.empty((0, dim))
+    )
+    objects: list[dict[str, Any]] = []
+    vector_idx = 0
+    for obj in row.objects or []:
+        embedding = None
+        if obj.get("has_embedding") and vector_idx < len(vectors):
+            embedding = vectors[vector_idx]
+            vector_idx += 1
+        objects.append(
+            {"label": obj["label"], "confidence": obj["confidence"], "bbox": obj["bbox"], "embedding": embedding}
+        )
+    return objects, list(row.warnings or [])
+
+
+async def store(db: AsyncSession, key: CacheKey, objects: list[dict[str, Any]], warnings: list[str]) -> None:
+    """Сохраняет результат инференса в кэш в текущей транзакции.
+
+    Результаты с временными ошибками CLIP (`clip_error`) не кэшируются, чтобы
+    следующий анализ мог их пересчитать. Не кэшируется и fallback-детекция
+    (`detector_fallback`) под версией настоящих весов: так бывает, когда
+    сервис инференса или локальный фолбэк не смогли загрузить модель. Гонку двух одновременных анализов
+    одного файла решает уникальный ключ: проигравший просто не пишет запись.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        key (CacheKey): Ключ кэша.
+        objects (list[dict[str, Any]]): Объекты из `_detect_and_embed`.
+        warnings (list[str]): Warnings инференса.
+    """
+    if any(w.startswith("clip_error") for w in warnings):
+        return
+    if "detector_fallback" in warnings and not key.detector_version.startswith("fallback@"):
+        return
+    vectors = [obj["embedding"] for obj in objects if obj.get("embedding") is not None]
+    row = AIInferenceCache(
+        file_hash=key.file_hash,
+        detector_version=key.detector_version,
+        clip_version=key.clip_version,
+        conf=key.conf,
+        objects=[
+            {
+                "label": obj["label"],
+                "confidence": obj["confidence"],
+                "bbox": obj["bbox"],
+                "has_embedding": obj.get("embedding") is not None,
+            }
+            for obj in objects
+        ],
+        embeddings=encode_embedding(np.concatenate(vectors)) if vectors else None,
+        embedding_dim=len(vectors[0]) if vectors else None,
+        warnings=list(warnings),
+    )
+    try:
+        async with db.begin_nested():
+            db.add(row)
+    except IntegrityError:
+        logger.info("ai.inference_cache.exists file_hash=%s", key.file_hash)
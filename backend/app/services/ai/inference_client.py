@@ -0,0 +1,164 @@
+"""Тонкий клиент локального сервиса инференса (`inference_server`).
+
+Когда задан `settings.ai_inference_socket`, `detect_objects` и `image_embedding`
+не грузят модели в каждый uvicorn-воркер, а отправляют картинку в общий
+процесс по Unix-сокету. Клиент синхронный: его вызывают из `asyncio.to_thread`.
+
+Протокол кадра: 4 байта длины JSON-заголовка (big-endian), заголовок, затем
+`nbytes` байт полезной нагрузки (сырой массив NumPy).
+"""
+
+import json
+import socket
+import struct
+import threading
+from typing import Any, List, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.ai.detector import DetectedObject
+
+_HEADER_LEN = struct.Struct(">I")
+_local = threading.local()
+
+
+class InferenceUnavailable(ConnectionError):
+    """Сервиса инференса нет (сокета нет или он не принимает соединения): вызывающий код может уйти в локальный режим."""
+
+
+class InferenceTimeout(TimeoutError):
+    """Сервис не ответил за `settings.ai_inference_timeout_s`.
+
+    Обычно он перегружен и ещё считает кадр. Локальный фолбэк здесь вреден:
+    каждый воркер загрузил бы свою копию модели, поэтому это ошибка инференса.
+    """
+
+
+def pack_frame(header: dict[str, Any], payload: bytes = b"") -> bytes:
+    """Собирает кадр протокола из заголовка и полезной нагрузки."""
+    raw = json.dumps({**header, "nbytes": len(payload)}).encode()
+    return _HEADER_LEN.pack(len(raw)) + raw + payload
+
+
+def pack_array(header: dict[str, Any], array: np.ndarray) -> bytes:
+    """Кадр с массивом NumPy: форма и dtype уходят в заголовок."""
+    array = np.ascontiguousarray(array)
+    return pack_frame({**header, "shape": list(array.shape), "dtype": array.dtype.str}, array.tobytes())
+
+
+def unpack_array(header: dict[str, Any], payload: bytes) -> np.ndarray:
+    """Восстанавливает массив, упакованный `pack_array`."""
+    return np.frombuffer(payload, dtype=np.dtype(header["dtype"])).reshape(header["shape"])
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = bytearray()
+    while len(chunks) < size:
+        chunk = sock.recv(size - len(chunks))
+        if not chunk:
+            raise ConnectionError("inference server closed connection")
+        chunks.extend(chunk)
+    return bytes(chunks)
+
+
+def _recv_frame(sock: socket.socket) -> Tuple[dict[str, Any], bytes]:
+    (header_len,) = _HEADER_LEN.unpack(_recv_exactly(sock, _HEADER_LEN.size))
+    header = json.loads(_recv_exactly(sock, header_len))
+    payload = _recv_exactly(sock, header.get("nbytes", 0)) if header.get("nbytes") else b""
+    return header, payload
+
+
+def _connection() -> socket.socket:
+    """Соединение на поток: каждый поток воркера держит своё, сервис обслуживает их параллельно."""
+    sock = getattr(_local, "sock", None)
+    if sock is None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(settings.ai_inference_timeout_s)
+        sock.connect(settings.ai_inference_socket)
+        _local.sock = sock
+    return sock
+
+
+def _drop_connection() -> None:
+    sock = getattr(_local, "sock", None)
+    _local.sock = None
+    if sock is not None:
+        sock.close()
+
+
+def _request(frame: bytes) -> Tuple[dict[str, Any], bytes]:
+    """Отправляет кадр и ждёт ответ; при обрыве соединения один раз переподключается.
+
+    Таймаут не повторяется: сервис мог уже принять кадр и считает его, так что
+    повтор отправил бы ту же картинку второй раз.
+
+    Raises:
+        InferenceUnavailable: Сокета нет или соединение не устанавливается.
+        InferenceTimeout: Сервис не ответил вовремя.
+    """
+    for attempt in range(2):
+        try:
+            sock = _connection()
+            sock.sendall(frame)
+            header, payload = _recv_frame(sock)
+            break
+        except TimeoutError as exc:
+            # Ответ на кадр с таймаутом может прийти позже: соединение больше не годится.
+            _drop_connection()
+            raise InferenceTimeout(str(exc) or "inference server timed out") from exc
+        except OSError as exc:
+            _drop_connection()
+            if attempt or not isinstance(exc, ConnectionError):
+                raise InferenceUnavailable(str(exc)) from exc
+    if "error" in header:
+        # ImportError пробрасываем как есть: пайплайн превращает его в warning `clip_unavailable`.
+        if header.get("error_type") == "ImportError":
+            raise ImportError(header["error"])
+        raise RuntimeError(header["error"])
+    return header, payload
+
+
+def ping() -> dict[str, Any]:
+    """Проверяет сервис и возвращает состояние его моделей (см. `warmup.model_status`).
+
+    Raises:
+        InferenceUnavailable: Если сервис недоступен.
+        InferenceTimeout: Если сервис не ответил вовремя.
+    """
+    header, _ = _request(pack_frame({"op": "ping"}))
+    return header.get("models", {})
+
+
+def detect_objects(image_array: np.ndarray, conf: float = 0.25) -> List[DetectedObject]:
+    """Детекция через сервис инференса.
+
+    Args:
+        image_array (np.ndarray): RGB-изображение.
+        conf (float): Порог уверенности.
+
+    Returns:
+        List[DetectedObject]: Объекты в пикселях исходного изображения.
+
+    Raises:
+        InferenceUnavailable: Если сервис недоступен.
+        InferenceTimeout: Если сервис не ответил вовремя.
+    """
+    header, _ = _request(pack_array({"op": "detect", "conf": conf}, image_array))
+    return [
+        DetectedObject(tuple(obj["bbox"]), obj["label"], obj["score"], fallback=obj.get("fallback", False))
+        for obj in header["objects"]
+    ]
+
+
+def image_embedding(pil_image) -> np.ndarray:
+    """CLIP-эмбеддинг изображения через сервис инференса.
+
+    Raises:
+        InferenceUnavailable: Если сервис недоступен.
+        InferenceTimeout: Если сервис не ответил вовремя.
+        ImportError: Если в сервисе не установлен CLIP.
+    """
+    image_array = np.asarray(pil_image.convert("RGB"))
+    header, payload = _request(pack_array({"op": "embed"}, image_array))
+    return unpack_array(header, payload).astype("float32")
@@ -0,0 +1,213 @@
+"""Локальный сервис инференса с динамическим micro-batching.
+
+Один процесс держит YOLO и OpenCLIP в памяти и обслуживает все uvicorn-воркеры
+через Unix-сокет (`settings.ai_inference_socket`). Запросы, пришедшие в пределах
+`ai_inference_batch_window_ms`, склеиваются в один батч `predict`/`encode_image`.
+
+Запуск:
+    python -m app.services.ai.inference_server
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Callable, List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.ai.detector import detect_objects_batch
+from app.services.ai.embeddings import image_embeddings
+from app.services.ai.inference_client import pack_array, pack_frame, unpack_array
+from app.services.ai.warmup import model_status, preload_models
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Копит запросы в течение окна и выполняет их одним вызовом `run_batch`.
+
+    `run_batch` синхронный (модель), поэтому уходит в поток; батчи одного
+    батчера выполняются строго последовательно.
+
+    Attributes:
+        window_s (float): Сколько ждать добора батча после первого запроса.
+        max_batch (int): Максимальный размер батча.
+    """
+
+    def __init__(self, run_batch: Callable[[List[Any]], Sequence[Any]], window_ms: float, max_batch: int):
+        self._run_batch = run_batch
+        self.window_s = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue[Tuple[Any, asyncio.Future]] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self.batch_sizes: List[int] = []
+
+    async def submit(self, item: Any) -> Any:
+        """Ставит элемент в очередь и ждёт его результат."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window_s
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _loop(self) -> None:
+        while True:
+            batch = await self._collect()
+            self.batch_sizes.append(len(batch))
+            try:
+                results = await asyncio.to_thread(self._run_batch, [item for item, _ in batch])
+            except Exception as exc:  # noqa: BLE001
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+def _detect_batch(items: List[Tuple[np.ndarray, float]]) -> List[list]:
+    """Батчевая детекция; картинки с разным порогом идут отдельными под-батчами."""
+    results: List[list] = [[] for _ in items]
+    by_conf: dict[float, List[int]] = defaultdict(list)
+    for idx, (_, conf) in enumerate(items):
+        by_conf[conf].append(idx)
+    for conf, indices in by_conf.items():
+        detections = detect_objects_batch([items[i][0] for i in indices], conf=conf)
+        for idx, objects in zip(indices, detections):
+            results[idx] = objects
+    return results
+
+
+def _embed_batch(items: List[np.ndarray]) -> List[np.ndarray]:
+    return image_embeddings([Image.fromarray(item) for item in items])
+
+
+class InferenceServer:
+    """Unix-socket сервер поверх двух батчеров: детекции и CLIP-эмбеддингов."""
+
+    def __init__(
+        self,
+        detect_batch: Callable[[List[Any]], Sequence[Any]] = _detect_batch,
+        embed_batch: Callable[[List[Any]], Sequence[Any]] = _embed_batch,
+        window_ms: float | None = None,
+        max_batch: int | None = None,
+    ):
+        window_ms = settings.ai_inference_batch_window_ms if window_ms is None else window_ms
+        max_batch = max_batch or settings.ai_inference_max_batch
+        self.detector = MicroBatcher(detect_batch, window_ms, max_batch)
+        self.embedder = MicroBatcher(embed_batch, window_ms, max_batch)
+
+    async def _dispatch(self, header: dict[str, Any], payload: bytes) -> bytes:
+        op = header.get("op")
+        if op == "ping":
+            return pack_frame({"ok": True, "models": model_status()})
+        if op == "detect":
+            image = unpack_array(header, payload)
+            objects = await self.detector.submit((image, float(header.get("conf", 0.25))))
+            return pack_frame(
+                {
+                    "objects": [
+                        {
+                            "bbox": [float(v) for v in obj.bbox],
+                            "label": obj.label,
+                            "score": float(obj.score),
+                            "fallback": obj.fallback,
+                        }
+                        for obj in objects
+                    ]
+                }
+            )
+        if op == "embed":
+            embedding = await self.embedder.submit(unpack_array(header, payload))
+            return pack_array({}, np.asarray(embedding, dtype="float32"))
+        return pack_frame({"error": f"unknown op: {op}"})
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обслуживает одно соединение воркера до его закрытия."""
+        try:
+            while True:
+                try:
+                    size = int.from_bytes(await reader.readexactly(4), "big")
+                except asyncio.IncompleteReadError:
+                    return
+                header = json.loads(await reader.readexactly(size))
+                payload = await reader.readexactly(header["nbytes"]) if header.get("nbytes") else b""
+                try:
+                    response = await self._dispatch(header, payload)
+                except Exception as exc:  # noqa: BLE001
+                    logger.exception("inference.request.failed op=%s", header.get("op"))
+                    response = pack_frame({"error": str(exc), "error_type": type(exc).__name__})
+                writer.write(response)
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    # Клиент не дождался ответа (таймаут) и закрыл соединение.
+                    logger.info("inference.client.gone op=%s", header.get("op"))
+                    return
+        finally:
+            writer.close()
+
+    async def start(self, socket_path: str) -> asyncio.AbstractServer:
+        """Поднимает сервер на Unix-сокете, удаляя «висящий» файл прошлого запуска."""
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        return await asyncio.start_unix_server(self.handle, path=socket_path)
+
+    async def close(self) -> None:
+        await self.detector.close()
+        await self.embedder.close()
+
+
+async def serve(socket_path: str) -> None:
+    if settings.ai_preload_models:
+        # Сокет открываем только после прогрева: клиенты до этого уходят в локальный режим.
+        await asyncio.to_thread(preload_models)
+    server = InferenceServer()
+    unix_server = await server.start(socket_path)
+    logger.info(
+        "inference.server.started socket=%s window_ms=%s max_batch=%s",
+        socket_path,
+        settings.ai_inference_batch_window_ms,
+        settings.ai_inference_max_batch,
+    )
+    async with unix_server:
+        await unix_server.serve_forever()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    socket_path = settings.ai_inference_socket
+    if not socket_path:
+        raise SystemExit("AI_INFERENCE_SOCKET is not set")
+    asyncio.run(serve(socket_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""YOLOv8-детектор на ONNX Runtime без torch/ultralytics.
+
+Веса берутся из `scripts/train_yolo.py --export` (ultralytics ONNX-экспорт).
+Пред- и постобработка (letterbox, декодирование выхода, NMS) сделаны на NumPy,
+поэтому для инференса нужен только пакет `onnxruntime`.
+"""
+
+import ast
+import logging
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.services.ai.detector import DetectedObject
+
+logger = logging.getLogger(__name__)
+
+LETTERBOX_COLOR = 114
+# Смещение рамок по классу для class-aware NMS одним проходом.
+_CLASS_OFFSET = 7680.0
+
+
+def letterbox(image_array: np.ndarray, size: int) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """Вписывает изображение в квадрат `size x size` с сохранением пропорций.
+
+    Args:
+        image_array (np.ndarray): RGB-изображение (H, W, 3), uint8.
+        size (int): Сторона входа модели.
+
+    Returns:
+        tuple[np.ndarray, float, tuple[float, float]]: Изображение `size x size`,
+            коэффициент масштаба и отступы (pad_x, pad_y) слева и сверху.
+    """
+    h, w = image_array.shape[:2]
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    if (new_w, new_h) != (w, h):
+        try:
+            import cv2
+
+            resized = cv2.resize(image_array, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        except ImportError:
+            from PIL import Image
+
+            resized = np.asarray(Image.fromarray(image_array).resize((new_w, new_h), Image.BILINEAR))
+    else:
+        resized = image_array
+    pad_x = (size - new_w) / 2
+    pad_y = (size - new_h) / 2
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    canvas = np.full((size, size, 3), LETTERBOX_COLOR, dtype=np.uint8)
+    canvas[top : top + new_h, left : left + new_w] = resized
+    return canvas, ratio, (left, top)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Классический greedy NMS.
+
+    Args:
+        boxes (np.ndarray): Рамки (N, 4) в формате xyxy.
+        scores (np.ndarray): Уверенности (N,).
+        iou_threshold (float): Порог IoU, выше которого рамка подавляется.
+
+    Returns:
+        np.ndarray: Индексы оставленных рамок по убыванию score.
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    order = scores.argsort()[::-1]
+    keep: List[int] = []
+    while order.size:
+        i = order[0]
+        keep.append(int(i))
+        rest = order[1:]
+        iw = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        ih = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = iw * ih
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def _parse_names(metadata: Dict[str, str]) -> Dict[int, str]:
+    """Достаёт имена классов из метаданных ultralytics-экспорта."""
+    raw = metadata.get("names")
+    if not raw:
+        return {}
+    try:
+        names = ast.literal_eval(raw)
+    except (ValueError, SyntaxError):
+        return {}
+    if isinstance(names, list):
+        names = dict(enumerate(names))
+    return {int(k): str(v) for k, v in names.items()}
+
+
+class OnnxYoloDetector:
+    """YOLOv8, экспортированный в ONNX, поверх `onnxruntime.InferenceSession`.
+
+    Выход модели — тензор (1, 4 + num_classes, N): cx, cy, w, h и score по
+    каждому классу, без встроенного NMS.
+
+    Attributes:
+        names (dict[int, str]): Имена классов из метаданных модели.
+        input_size (int): Сторона квадратного входа модели.
+        iou_threshold (float): Порог IoU для NMS.
+    """
+
+    def __init__(self, session, input_size: int = 640, iou_threshold: float = 0.45, names: Dict[int, str] | None = None):
+        self.session = session
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        self.input_size = input_size
+        self.iou_threshold = iou_threshold
+        self.names = names or {}
+
+    @classmethod
+    def from_path(cls, weights_path: Path, input_size: int = 640, iou_threshold: float = 0.45) -> "OnnxYoloDetector":
+        """Создаёт сессию ONNX Runtime на CPU.
+
+        Raises:
+            ImportError: Если `onnxruntime` не установлен.
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as exc:  # noqa: BLE001
+            raise ImportError("onnxruntime not installed") from exc
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(str(weights_path), sess_options=options, providers=["CPUExecutionProvider"])
+        metadata = session.get_modelmeta().custom_metadata_map or {}
+        # Экспорт с фиксированным imgsz кладёт его в форму входа; динамический вход — строка.
+        shape = session.get_inputs()[0].shape
+        if len(shape) == 4 and isinstance(shape[2], int):
+            input_size = shape[2]
+        return cls(session, input_size=input_size, iou_threshold=iou_threshold, names=_parse_names(metadata))
+
+    def predict(self, image_array: np.ndarray, conf: float = 0.25) -> List[DetectedObject]:
+        """Прогоняет одно RGB-изображение через модель.
+
+        Args:
+            image_array (np.ndarray): RGB-изображение (H, W, 3).
+            conf (float): Порог уверенности.
+
+        Returns:
+            List[DetectedObject]: Рамки в пикселях исходного изображения.
+        """
+        return self.predict_batch([image_array], conf=conf)[0]
+
+    def predict_batch(self, images: List[np.ndarray], conf: float = 0.25) -> List[List[DetectedObject]]:
+        """Прогоняет пачку изображений.
+
+        Если батч-измерение входа динамическое, картинки идут одним `run`,
+        иначе (экспорт с batch=1) — по одной.
+        """
+        prepared = [letterbox(image, self.input_size) for image in images]
+        blobs = np.stack([canvas.transpose(2, 0, 1) for canvas, _, _ in prepared]).astype(np.float32) / 255.0
+        if self.dynamic_batch or len(images) == 1:
+            outputs = self.session.run(None, {self.input_name: blobs})[0]
+        else:
+            outputs = np.concatenate([self.session.run(None, {self.input_name: blob[None]})[0] for blob in blobs])
+        return [
+            self.postprocess(output[None], ratio, pad, image.shape[:2], conf)
+            for output, (_, ratio, pad), image in zip(outputs, prepared, images)
+        ]
+
+    def postprocess(
+        self,
+        output: np.ndarray,
+        ratio: float,
+        pad: Tuple[float, float],
+        image_shape: Tuple[int, int],
+        conf: float,
+    ) -> List[DetectedObject]:
+        """Декодирует выход YOLOv8, делает NMS и переводит рамки в исходные пиксели."""
+        preds = np.asarray(output)[0].T  # (N, 4 + num_classes)
+        class_scores = preds[:, 4:]
+        cls_idx = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(preds)), cls_idx]
+        mask = scores >= conf
+        if not mask.any():
+            return []
+        preds, cls_idx, scores = preds[mask], cls_idx[mask], scores[mask]
+
+        cx, cy, bw, bh = preds[:, 0], preds[:, 1], preds[:, 2], preds[:, 3]
+        boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+        keep = nms(boxes + (cls_idx * _CLASS_OFFSET)[:, None], scores, self.iou_threshold)
+
+        h, w = image_shape
+        boxes = boxes[keep]
+        boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad[0]) / ratio).clip(0, w)
+        boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad[1]) / ratio).clip(0, h)
+        return [
+            DetectedObject(tuple(float(v) for v in box), self.names.get(int(c), "object"), float(s))
+            for box, c, s in zip(boxes, cls_idx[keep], scores[keep])
+        ]
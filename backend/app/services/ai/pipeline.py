@@ -5,37 +5,42 @@
 2. детектим объекты через YOLO или фолбэк;
 3. считаем эмбеддинги для матчинга, если доступен CLIP;
 4. создаём записи детекций и кандидатов привязки к предметам.
+
+Эмбеддинги объектов сохраняются в бинарную колонку `AIDetectionObject.embedding`,
+а не в JSON `AIDetection.raw`.
+
+Шаги 1-3 выполняются без открытой транзакции: соединение с БД берётся
+только на короткое чтение входных данных и на финальную запись.
 """
 
-from io import BytesIO
+import asyncio
 import logging
+import time
 from pathlib import Path
 from typing import Any, Iterable
 
 import numpy as np
-from PIL import Image
-from sqlalchemy import func, select
+from sqlalchemy import func, insert, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.models.ai import AIDetection, AIDetectionCandidate, AIDetectionObject, AIDetectionStatus
 from app.models.item import Item
-from app.models.enums import MediaType
+from app.models.enums import MediaType, SyncEntity
 from app.models.media import ItemMedia, Media
 from app.services.ai.detector import DetectedObject, detect_objects
-from app.services.ai.embeddings import image_embedding
-
-try:
-    from pillow_heif import register_heif_opener
-
-    register_heif_opener()
-except Exception:
-    pass
+from app.services.ai.embeddings import EMBEDDING_STORAGE_DTYPE, encode_embedding, image_embedding
+from app.services.ai.decode import open_for_analysis, open_rgb
+from app.services.ai import timings
+from app.db.change_log import record_changes
+from app.services.ai.inference_cache import cache_key, load_cached, store as store_cached
 
 logger = logging.getLogger(__name__)
 CANDIDATE_TOP_K = 3
 CANDIDATE_MAX_ITEMS = 200
 HINT_CANDIDATE_SCORE = 0.95
+# Порог детектора; входит в ключ кэша инференса.
+DETECTION_CONF = 0.25
 
 
 def _resolve_media_path(media_path: str) -> Path:
@@ -59,26 +64,23 @@ def _resolve_media_path(media_path: str) -> Path:
     return Path(base) / rel_path
 
 
-async def _load_item_media_embeddings(
+async def _item_media_rows(
     db: AsyncSession,
     workspace_id: int,
     location_id: int | None,
-    max_items: int,
-) -> list[tuple[int, np.ndarray]]:
-    """Собирает эмбеддинги по последним фото предметов в workspace.
+) -> list[tuple[int, str, str | None]]:
+    """Выбирает последние фото предметов workspace для CLIP-матчинга.
 
-    Загружает последние фотографии предметов из указанного workspace,
-    вычисляет их эмбеддинги и возвращает список пар (item_id, embedding).
-    Ограничивает количество предметов для производительности.
+    Это только чтение из БД: сами файлы открываются позже, уже без
+    удержания соединения, в `_load_item_media_embeddings`.
 
     Args:
         db (AsyncSession): Асинхронная сессия базы данных.
         workspace_id (int): ID рабочего пространства.
         location_id (int | None): ID локации для фильтрации предметов.
-        max_items (int): Максимальное количество предметов.
 
     Returns:
-        list[tuple[int, np.ndarray]]: Список пар (item_id, embedding).
+        list[tuple[int, str, str | None]]: Тройки (item_id, path, mime_type), новые первыми.
     """
     stmt = (
         select(Item.id, Media.path, Media.mime_type)
@@ -90,7 +92,30 @@ async def _load_item_media_embeddings(
     )
     if location_id:
         stmt = stmt.where(Item.location_id == location_id)
-    rows = (await db.execute(stmt)).all()
+    return [tuple(row) for row in (await db.execute(stmt)).all()]
+
+
+def _load_item_media_embeddings(
+    rows: Iterable[tuple[int, str, str | None]],
+    max_items: int,
+) -> list[tuple[int, np.ndarray]]:
+    """Собирает эмбеддинги по последним фото предметов в workspace.
+
+    Для каждого предмета берёт самое свежее фото из `rows`, вычисляет его
+    эмбеддинг и возвращает список пар (item_id, embedding). Ограничивает
+    количество предметов для производительности. К БД не обращается.
+
+    Фото декодируются по одному сразу в уменьшенном виде
+    (`settings.ai_item_embedding_max_side`) и освобождаются после эмбеддинга,
+    так что пиковая память не зависит ни от числа предметов, ни от размера оригиналов.
+
+    Args:
+        rows (Iterable[tuple[int, str, str | None]]): Результат `_item_media_rows`.
+        max_items (int): Максимальное количество предметов.
+
+    Returns:
+        list[tuple[int, np.ndarray]]: Список пар (item_id, embedding).
+    """
     embeddings: list[tuple[int, np.ndarray]] = []
     seen: set[int] = set()
     for item_id, media_path, mime_type in rows:
@@ -103,9 +128,11 @@ async def _load_item_media_embeddings(
         if not full_path.exists():
             continue
         try:
-            with full_path.open("rb") as f:
-                image = Image.open(BytesIO(f.read())).convert("RGB")
-            emb = image_embedding(image)
+            image = open_rgb(full_path, settings.ai_item_embedding_max_side)
+            try:
+                emb = image_embedding(image)
+            finally:
+                image.close()
             embeddings.append((item_id, emb))
         except Exception as exc:  # noqa: BLE001
             logger.warning("item_embedding_failed item_id=%s path=%s err=%s", item_id, full_path, exc)
@@ -170,6 +197,271 @@ async def _resolve_hint_item_ids(
     return [row[0] for row in (await db.execute(stmt)).all()]
 
 
+async def _hash_candidates(db: AsyncSession, media: Media) -> dict[int, float]:
+    """Ищет предметы, к которым уже привязан файл с тем же хэшем.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        media (Media): Анализируемое медиа.
+
+    Returns:
+        dict[int, float]: Словарь item_id -> score для совпадений по хэшу.
+    """
+    if not media.file_hash:
+        return {}
+    # Совпадение по хэшу — самый дешёвый сигнал для повторных загрузок.
+    stmt = (
+        select(Item.id)
+        .join(ItemMedia, ItemMedia.item_id == Item.id)
+        .join(Media, Media.id == ItemMedia.media_id)
+        .where(Item.workspace_id == media.workspace_id)
+        # Условие на Media.workspace_id даёт планировщику индекс (workspace_id, file_hash).
+        .where(Media.workspace_id == media.workspace_id)
+        .where(Media.file_hash == media.file_hash)
+        .where(Media.id != media.id)
+    )
+    if media.location_id:
+        stmt = stmt.where(Item.location_id == media.location_id)
+    return {row[0]: 0.99 for row in (await db.execute(stmt)).all()}
+
+
+def _detect_and_embed(media_path: Path) -> tuple[list[dict[str, Any]], list[str]]:
+    """Дорогая часть анализа: детекция и CLIP-эмбеддинги кропов.
+
+    Результат зависит только от содержимого файла и версий моделей, поэтому
+    именно он кладётся в кэш инференса (`AIInferenceCache`). Фото декодируется
+    в рабочем разрешении (`settings.ai_decode_max_side`), рамки переводятся
+    обратно в пиксели оригинала, кропы для CLIP берутся из копии
+    `settings.ai_crop_max_side`.
+
+    Args:
+        media_path (Path): Путь к файлу изображения.
+
+    Returns:
+        tuple[list[dict[str, Any]], list[str]]: Объекты (label, confidence, bbox, embedding) и warnings.
+    """
+    warnings: list[str] = []
+    with timings.stage("decode"):
+        decoded = open_for_analysis(media_path, settings.ai_decode_max_side, settings.ai_crop_max_side)
+    image_np = np.asarray(decoded.image)
+
+    found = detect_objects(image_np, conf=DETECTION_CONF)
+    if any(det.fallback for det in found):
+        warnings.append("detector_fallback")
+    detections = [DetectedObject(decoded.to_original(det.bbox), det.label, det.score) for det in found]
+    del image_np
+    # Если модель не нашла ничего, создаём единичную рамку по всему изображению.
+    if not detections:
+        # Даже если модель ничего не нашла, создаём общий bbox.
+        # Так пользователь видит, что анализ состоялся, а не "пропал".
+        w, h = decoded.original_size
+        detections = [DetectedObject((0, 0, w, h), "object", 0.5)]
+
+    objects: list[dict[str, Any]] = []
+    for det in detections:
+        crop = decoded.crop(det.bbox)
+        embedding: np.ndarray | None = None
+        try:
+            embedding = image_embedding(crop)
+        except ImportError as exc:  # noqa: BLE001
+            warnings.append(f"clip_unavailable:{exc}")
+        except Exception as exc:  # noqa: BLE001
+            warnings.append(f"clip_error:{exc}")
+        objects.append(
+            {
+                "label": det.label,
+                "confidence": det.score,
+                "bbox": {"x1": det.bbox[0], "y1": det.bbox[1], "x2": det.bbox[2], "y2": det.bbox[3]},
+                "embedding": embedding,
+            }
+        )
+    return objects, warnings
+
+
+def _match_candidates(
+    objects: list[dict[str, Any]],
+    hash_candidates: dict[int, float],
+    hint_item_ids: list[int],
+    item_rows: list[tuple[int, str, str | None]],
+) -> list[str]:
+    """Дешёвая часть анализа: подбор кандидатов по актуальному набору предметов.
+
+    Дописывает в каждый объект ключ `candidates` — top-k пар (item_id, score).
+
+    Args:
+        objects (list[dict[str, Any]]): Объекты из `_detect_and_embed` или из кэша.
+        hash_candidates (dict[int, float]): Кандидаты по совпадению хэша.
+        hint_item_ids (list[int]): Проверенные подсказки от клиента.
+        item_rows (list[tuple[int, str, str | None]]): Фото предметов для CLIP-матчинга.
+
+    Returns:
+        list[str]: Warnings подбора кандидатов.
+    """
+    warnings: list[str] = []
+    item_embeddings: list[tuple[int, np.ndarray]] | None = None
+    for obj in objects:
+        embedding = obj.get("embedding")
+        # Начинаем с хэш-кандидатов и добавляем временные подсказки.
+        candidate_scores: dict[int, float] = dict(hash_candidates)
+        for item_id in hint_item_ids:
+            candidate_scores[item_id] = max(candidate_scores.get(item_id, 0.0), HINT_CANDIDATE_SCORE)
+        if embedding is not None:
+            if item_embeddings is None:
+                # Базу эмбеддингов считаем лениво, только если CLIP реально сработал.
+                try:
+                    item_embeddings = _load_item_media_embeddings(item_rows, max_items=CANDIDATE_MAX_ITEMS)
+                except Exception as exc:  # noqa: BLE001
+                    warnings.append(f"clip_candidates_error:{exc}")
+                    item_embeddings = []
+            if item_embeddings:
+                clip_candidates = _top_k_candidates(embedding, item_embeddings, CANDIDATE_TOP_K)
+                for item_id, score in clip_candidates:
+                    candidate_scores[item_id] = max(candidate_scores.get(item_id, 0.0), score)
+        obj["candidates"] = sorted(candidate_scores.items(), key=lambda x: x[1], reverse=True)[:CANDIDATE_TOP_K]
+    return warnings
+
+
+def _run_inference(
+    media_path: Path,
+    hash_candidates: dict[int, float],
+    hint_item_ids: list[int],
+    item_rows: list[tuple[int, str, str | None]],
+) -> tuple[list[dict[str, Any]], list[str]]:
+    """Чистая вычислительная часть анализа: детекция, эмбеддинги и скоринг.
+
+    Функция синхронная и не трогает БД, поэтому её можно выполнять в отдельном
+    потоке, пока соединение из пула свободно для других запросов.
+
+    Args:
+        media_path (Path): Путь к файлу изображения.
+        hash_candidates (dict[int, float]): Кандидаты по совпадению хэша.
+        hint_item_ids (list[int]): Проверенные подсказки от клиента.
+        item_rows (list[tuple[int, str, str | None]]): Фото предметов для CLIP-матчинга.
+
+    Returns:
+        tuple[list[dict[str, Any]], list[str]]: Найденные объекты с кандидатами и warnings.
+    """
+    objects, warnings = _detect_and_embed(media_path)
+    warnings += _match_candidates(objects, hash_candidates, hint_item_ids, item_rows)
+    return objects, warnings
+
+
+def _raw_objects(objects: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Готовит краткое описание объектов для `AIDetection.raw`.
+
+    Эмбеддинги в JSON не попадают: они хранятся в бинарной колонке
+    `AIDetectionObject.embedding`, а в raw остаётся только ссылка (`embedding_ref`).
+
+    Args:
+        objects (list[dict[str, Any]]): Объекты из `_run_inference`.
+
+    Returns:
+        list[dict[str, Any]]: Объекты без векторов.
+    """
+    return [
+        {
+            "label": obj["label"],
+            "confidence": obj["confidence"],
+            "bbox": obj["bbox"],
+            "has_embedding": obj.get("embedding") is not None,
+        }
+        for obj in objects
+    ]
+
+
+def _embedding_ref(objects: list[dict[str, Any]]) -> dict[str, Any] | None:
+    """Ссылка на хранилище эмбеддингов для `AIDetection.raw`."""
+    dims = {len(obj["embedding"]) for obj in objects if obj.get("embedding") is not None}
+    if not dims:
+        return None
+    return {"storage": "aidetectionobject.embedding", "dtype": EMBEDDING_STORAGE_DTYPE, "dim": max(dims)}
+
+
+async def _persist_detection_objects(
+    db: AsyncSession,
+    objects: list[tuple[int, dict[str, Any]]],
+) -> list[int]:
+    """Пакетно вставляет объекты детекций и их кандидатов.
+
+    Все `AIDetectionObject` пишутся одним `INSERT ... RETURNING id`, затем все
+    `AIDetectionCandidate` — одним executemany. Количество round-trip'ов не
+    зависит от числа объектов, поэтому метод используется и для фото, и для
+    всех кадров видео сразу.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        objects (list[tuple[int, dict[str, Any]]]): Пары (detection_id, объект из `_run_inference`).
+            Эмбеддинг объекта (`np.ndarray | None`) пишется в `AIDetectionObject.embedding`.
+
+    Returns:
+        list[int]: ID вставленных объектов в порядке `objects`.
+    """
+    if not objects:
+        return []
+    object_ids = (
+        await db.execute(
+            insert(AIDetectionObject).returning(AIDetectionObject.id, sort_by_parameter_order=True),
+            [
+                {
+                    "detection_id": detection_id,
+                    "label": obj["label"],
+                    "confidence": obj["confidence"],
+                    "bbox": obj["bbox"],
+                    "embedding": encode_embedding(obj["embedding"]) if obj.get("embedding") is not None else None,
+                    "suggested_location_id": None,
+                }
+                for detection_id, obj in objects
+            ],
+        )
+    ).scalars().all()
+    candidate_rows = [
+        {"detection_object_id": object_id, "item_id": item_id, "score": score}
+        for object_id, (_, obj) in zip(object_ids, objects)
+        for item_id, score in obj.get("candidates", [])
+    ]
+    if candidate_rows:
+        await db.execute(insert(AIDetectionCandidate), candidate_rows)
+    return list(object_ids)
+
+
+async def set_latest_detection(db: AsyncSession, media_id: int, detection_id: int) -> None:
+    """Переводит `Media.latest_detection_id` на новую детекцию.
+
+    Вызывается в той же транзакции, что и вставка детекции, поэтому указатель
+    не расходится с таблицей `aidetection`. Указатель только растёт: если
+    параллельный анализ уже записал более свежую детекцию, она не затирается.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        media_id (int): ID медиафайла.
+        detection_id (int): ID только что созданной детекции.
+    """
+    await db.execute(
+        update(Media)
+        .where(Media.id == media_id)
+        .where(or_(Media.latest_detection_id.is_(None), Media.latest_detection_id < detection_id))
+        .values(latest_detection_id=detection_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _mark_detection_failed(db: AsyncSession, detection_id: int, workspace_id: int, raw: dict[str, Any]) -> None:
+    """Переводит детекцию в `FAILED` отдельной короткой транзакцией.
+
+    Нужна, когда не удалась запись результата (фаза 3): иначе строка из фазы 1
+    навсегда осталась бы `IN_PROGRESS`, а `Media.latest_detection_id` уже
+    указывает на неё.
+    """
+    await db.execute(
+        update(AIDetection)
+        .where(AIDetection.id == detection_id)
+        .values(status=AIDetectionStatus.FAILED, raw=raw, completed_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    await record_changes(db, SyncEntity.DETECTION, [detection_id], workspace_id)
+    await db.commit()
+
+
 async def analyze_media(media_id: int, db: AsyncSession, hint_item_ids: list[int] | None = None) -> AIDetection:
     """Анализирует одно изображение и создаёт запись `AIDetection`.
 
@@ -178,6 +470,20 @@ async def analyze_media(media_id: int, db: AsyncSession, hint_item_ids: list[int
     по хэшу, hint'ам и схожести эмбеддингов. Создаёт объекты детекции
     и кандидатов привязки.
 
+    Работа разбита на три фазы, чтобы не держать соединение из пула
+    на время инференса:
+    1. короткая транзакция: читаем входные данные и пишем `IN_PROGRESS`;
+    2. инференс в отдельном потоке без открытой транзакции;
+    3. короткая транзакция: пишем результат, объекты и кандидатов. Если она
+       не удалась, детекция отдельной транзакцией помечается `FAILED`.
+
+    Сырые результаты YOLO/CLIP кэшируются по `(file_hash, версии моделей, conf)`:
+    при повторном анализе того же файла пересчитывается только подбор кандидатов.
+
+    Длительности стадий (`db_read`, `decode`, `detect`, `embed`, `candidates`)
+    сохраняются в `raw["timings"]`; вместе с `db_write` и `total` они пишутся
+    в лог `ai.analyze.timings` и в гистограмму `ai_stage_seconds`.
+
     Args:
         media_id (int): ID медиафайла для анализа.
         db (AsyncSession): Асинхронная сессия базы данных.
@@ -190,126 +496,100 @@ async def analyze_media(media_id: int, db: AsyncSession, hint_item_ids: list[int
         ValueError: Если медиа не найдено.
         FileNotFoundError: Если файл медиа не существует на диске.
     """
-    media = await db.get(Media, media_id)
-    if not media:
-        raise ValueError("Media not found")
-
-    # Работаем уже с файлом, который был ранее сохранён upload-эндпоинтом.
-    media_path = _resolve_media_path(media.path)
-    if not media_path.exists():
-        raise FileNotFoundError(f"Media file not found: {media_path}")
-
-    valid_hint_items = await _resolve_hint_item_ids(db, media.workspace_id, hint_item_ids)
-    detection_row = AIDetection(
-        media_id=media_id,
-        status=AIDetectionStatus.IN_PROGRESS,
-        raw={"objects": [], "hint_item_ids": valid_hint_items},
-    )
-    db.add(detection_row)
-    await db.flush()
-
-    try:
-        with media_path.open("rb") as f:
-            image = Image.open(BytesIO(f.read())).convert("RGB")
-        image_np = np.array(image)
-
-        detections = detect_objects(image_np)
-        # Если модель не нашла ничего, создаём единичную рамку по всему изображению.
-        if not detections:
-            # Даже если модель ничего не нашла, создаём общий bbox.
-            # Так пользователь видит, что анализ состоялся, а не "пропал".
-            w, h = image.size
-            detections = [DetectedObject((0, 0, w, h), "object", 0.5)]
-
-        hash_candidates: dict[int, float] = {}
-        if media.file_hash:
-            # Совпадение по хэшу — самый дешёвый сигнал для повторных загрузок.
-            stmt = (
-                select(Item.id)
-                .join(ItemMedia, ItemMedia.item_id == Item.id)
-                .join(Media, Media.id == ItemMedia.media_id)
-                .where(Item.workspace_id == media.workspace_id)
-                .where(Media.file_hash == media.file_hash)
-                .where(Media.id != media.id)
+    with timings.collect() as stage_times:
+        started = time.monotonic()
+        with timings.stage("db_read"):
+            media = await db.get(Media, media_id)
+            if not media:
+                raise ValueError("Media not found")
+
+            # Работаем уже с файлом, который был ранее сохранён upload-эндпоинтом.
+            media_path = _resolve_media_path(media.path)
+            if not media_path.exists():
+                raise FileNotFoundError(f"Media file not found: {media_path}")
+
+            # Фаза 1: всё, что нужно из БД, читаем заранее одной короткой транзакцией.
+            workspace_id = media.workspace_id
+            valid_hint_items = await _resolve_hint_item_ids(db, workspace_id, hint_item_ids)
+            hash_candidates = await _hash_candidates(db, media)
+            item_rows = await _item_media_rows(db, media.workspace_id, media.location_id)
+            # Тот же файл теми же моделями уже анализировали: YOLO/CLIP не нужны.
+            key = cache_key(media.file_hash, DETECTION_CONF)
+            cached = await load_cached(db, key) if key else None
+            detection_row = AIDetection(
+                media_id=media_id,
+                status=AIDetectionStatus.IN_PROGRESS,
+                raw={"objects": [], "hint_item_ids": valid_hint_items},
             )
-            if media.location_id:
-                stmt = stmt.where(Item.location_id == media.location_id)
-            for row in (await db.execute(stmt)).all():
-                hash_candidates[row[0]] = 0.99
-
-        item_embeddings: list[tuple[int, np.ndarray]] | None = None
-
-        for det in detections:
-            crop = image.crop(det.bbox)
-            embedding_list: list[float] | None = None
-            try:
-                emb = image_embedding(crop)
-                embedding_list = emb.tolist()
-            except ImportError as exc:  # noqa: BLE001
-                detection_row.raw.setdefault("warnings", []).append(f"clip_unavailable:{exc}")
-            except Exception as exc:  # noqa: BLE001
-                detection_row.raw.setdefault("warnings", []).append(f"clip_error:{exc}")
-            det_obj = AIDetectionObject(
-                detection_id=detection_row.id,
-                label=det.label,
-                confidence=det.score,
-                bbox={"x1": det.bbox[0], "y1": det.bbox[1], "x2": det.bbox[2], "y2": det.bbox[3]},
-                suggested_location_id=None,
-            )
-            detection_row.raw["objects"].append(
-                {
-                    "label": det.label,
-                    "confidence": det.score,
-                    "bbox": det_obj.bbox,
-                    "embedding": embedding_list,
-                }
-            )
-            db.add(det_obj)
+            db.add(detection_row)
             await db.flush()
-
-            # Начинаем с хэш-кандидатов и добавляем временные подсказки.
-            candidate_scores: dict[int, float] = dict(hash_candidates)
-            for item_id in valid_hint_items:
-                candidate_scores[item_id] = max(candidate_scores.get(item_id, 0.0), HINT_CANDIDATE_SCORE)
-            if embedding_list is not None:
-                if item_embeddings is None:
-                    # Базу эмбеддингов подгружаем лениво, только если CLIP реально сработал.
-                    try:
-                        item_embeddings = await _load_item_media_embeddings(
-                            db,
-                            workspace_id=media.workspace_id,
-                            location_id=media.location_id,
-                            max_items=CANDIDATE_MAX_ITEMS,
-                        )
-                    except Exception as exc:  # noqa: BLE001
-                        detection_row.raw.setdefault("warnings", []).append(f"clip_candidates_error:{exc}")
-                        item_embeddings = []
-                if item_embeddings:
-                    clip_candidates = _top_k_candidates(
-                        np.array(embedding_list, dtype="float32"),
-                        item_embeddings,
-                        CANDIDATE_TOP_K,
-                    )
-                    for item_id, score in clip_candidates:
-                        candidate_scores[item_id] = max(candidate_scores.get(item_id, 0.0), score)
-
-            for item_id, score in sorted(candidate_scores.items(), key=lambda x: x[1], reverse=True)[:CANDIDATE_TOP_K]:
-                db.add(
-                    AIDetectionCandidate(
-                        detection_object_id=det_obj.id,
-                        item_id=item_id,
-                        score=score,
-                    )
-                )
-
-        detection_row.status = AIDetectionStatus.DONE
-        detection_row.completed_at = func.now()
-    except Exception as exc:  # noqa: BLE001
-        # Ошибку тоже сохраняем в raw, чтобы её было видно в истории и логах.
-        detection_row.status = AIDetectionStatus.FAILED
-        detection_row.raw = {**(detection_row.raw or {}), "error": str(exc)}
-        detection_row.completed_at = func.now()
-
-    await db.commit()
+            detection_id = detection_row.id
+            await set_latest_detection(db, media_id, detection_id)
+            # Commit завершает транзакцию и возвращает соединение в пул до фазы 3.
+            await db.commit()
+
+        def _infer() -> tuple[list[dict[str, Any]], list[str], list[str]]:
+            if cached is not None:
+                objects, inference_warnings = cached
+            else:
+                objects, inference_warnings = _detect_and_embed(media_path)
+            # Кандидатов пересчитываем всегда: набор предметов мог измениться.
+            with timings.stage("candidates"):
+                match_warnings = _match_candidates(objects, hash_candidates, valid_hint_items, item_rows)
+            return objects, inference_warnings, match_warnings
+
+        # Фаза 2: YOLO/CLIP могут работать секунды, поэтому уводим их из event loop.
+        raw: dict[str, Any] = {"objects": [], "hint_item_ids": valid_hint_items}
+        objects: list[dict[str, Any]] = []
+        inference_warnings: list[str] = []
+        try:
+            with timings.IN_PROGRESS.track_inprogress(kind="photo"):
+                objects, inference_warnings, match_warnings = await asyncio.to_thread(_infer)
+            raw["objects"] = _raw_objects(objects)
+            embedding_ref = _embedding_ref(objects)
+            if embedding_ref:
+                raw["embedding_ref"] = embedding_ref
+            warnings = inference_warnings + match_warnings
+            if warnings:
+                raw["warnings"] = warnings
+            if key:
+                raw["inference_cache"] = "hit" if cached is not None else "miss"
+            status = AIDetectionStatus.DONE
+        except Exception as exc:  # noqa: BLE001
+            # Ошибку тоже сохраняем в raw, чтобы её было видно в истории и логах.
+            objects = []
+            raw["error"] = str(exc)
+            status = AIDetectionStatus.FAILED
+        # Время записи в raw не попадает (запись ещё идёт), только в лог и гистограмму.
+        raw["timings"] = timings.rounded(stage_times)
+
+        # Фаза 3: результат пишется одной транзакцией.
+        with timings.stage("db_write"):
+            try:
+                detection_row.status = status
+                detection_row.raw = raw
+                detection_row.completed_at = func.now()
+                await _persist_detection_objects(db, [(detection_id, obj) for obj in objects])
+                if key and cached is None and status == AIDetectionStatus.DONE:
+                    await store_cached(db, key, objects, inference_warnings)
+                await db.commit()
+            except Exception as exc:
+                await db.rollback()
+                logger.exception("ai.analyze.write_failed media_id=%s detection_id=%s", media_id, detection_id)
+                failed_raw = {**raw, "objects": [], "error": f"db_write: {exc}"}
+                failed_raw.pop("embedding_ref", None)
+                await _mark_detection_failed(db, detection_id, workspace_id, failed_raw)
+                raise
+        total = time.monotonic() - started
+        timings.STAGE_SECONDS.observe(total, stage="total")
+        logger.info(
+            "ai.analyze.timings media_id=%s detection_id=%s status=%s cache=%s total=%.4f %s",
+            media_id,
+            detection_id,
+            status.value,
+            raw.get("inference_cache"),
+            total,
+            timings.format_log(stage_times),
+        )
     await db.refresh(detection_row)
     return detection_row
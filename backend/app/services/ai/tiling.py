@@ -0,0 +1,177 @@
+"""Нарезка на тайлы (sliced inference) для плотных снимков полок.
+
+YOLO уменьшает кадр до 640 px, и на фото полки 4000x3000 мелкие товары
+превращаются в несколько пикселей. В тайловом режиме изображение режется на
+перекрывающиеся окна размера входа модели, окна прогоняются батчем, рамки
+переводятся в координаты кадра и сливаются с полнокадровым проходом через
+общий NMS. Решение о нарезке и сетка тайлов считаются здесь; вызовы модели
+остаются в `detector.detect_objects_batch`.
+"""
+
+import math
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.ai.detector import DetectedObject
+from app.services.ai.onnx_detector import nms
+
+Window = Tuple[int, int, int, int]  # (x1, y1, x2, y2) в пикселях кадра
+
+# Рамка ближе этого расстояния к внутреннему краю тайла считается обрезанной.
+_EDGE_MARGIN_PX = 2.0
+
+
+def _axis_starts(length: int, tile: int, overlap: float) -> List[int]:
+    if length <= tile:
+        return [0]
+    stride = max(1.0, tile * (1.0 - overlap))
+    count = math.ceil((length - tile) / stride) + 1
+    return [round(i * (length - tile) / (count - 1)) for i in range(count)]
+
+
+def tile_grid(width: int, height: int, tile: int, overlap: float, max_tiles: int) -> List[Window]:
+    """Строит сетку перекрывающихся тайлов, покрывающую весь кадр.
+
+    Тайлы равномерно распределены по каждой оси, крайние прижаты к границам
+    кадра. Если тайлов больше `max_tiles`, сторона тайла растёт, пока сетка не
+    уложится в бюджет (модель всё равно уменьшит такой тайл до своего входа).
+
+    Args:
+        width (int): Ширина кадра.
+        height (int): Высота кадра.
+        tile (int): Желаемая сторона тайла.
+        overlap (float): Доля перекрытия соседних тайлов (0.0-0.5).
+        max_tiles (int): Максимальное число тайлов.
+
+    Returns:
+        List[Window]: Окна `(x1, y1, x2, y2)`.
+    """
+    while True:
+        xs = _axis_starts(width, tile, overlap)
+        ys = _axis_starts(height, tile, overlap)
+        if len(xs) * len(ys) <= max(1, max_tiles):
+            break
+        tile = math.ceil(tile * 1.25)
+    return [(x, y, min(x + tile, width), min(y + tile, height)) for y in ys for x in xs]
+
+
+def plan_tiles(image_shape: Tuple[int, ...], full_frame: List[DetectedObject]) -> List[Window]:
+    """Решает, нужна ли нарезка, и возвращает окна тайлов (пустой список — не нужна).
+
+    В режиме `auto` кадр режется, если его длинная сторона не меньше
+    `settings.ai_tile_min_side` или полнокадровый проход нашёл не меньше
+    `settings.ai_tile_density_objects` объектов. Кадры, лишь немного
+    превышающие тайл, не режутся: выигрыша в разрешении почти нет.
+
+    Args:
+        image_shape (tuple): Форма изображения (H, W, ...).
+        full_frame (List[DetectedObject]): Результат полнокадрового прохода модели.
+
+    Returns:
+        List[Window]: Окна тайлов.
+    """
+    mode = settings.ai_tiling
+    if mode == "off":
+        return []
+    height, width = image_shape[:2]
+    tile = settings.ai_tile_size
+    if max(height, width) <= tile * 1.25:
+        return []
+    if mode == "auto" and not (
+        max(height, width) >= settings.ai_tile_min_side or len(full_frame) >= settings.ai_tile_density_objects
+    ):
+        return []
+    return tile_grid(width, height, tile, settings.ai_tile_overlap, settings.ai_tile_max_tiles)
+
+
+def _touches_inner_edge(bbox, window: Window, width: int, height: int) -> bool:
+    x1, y1, x2, y2 = bbox
+    wx1, wy1, wx2, wy2 = window
+    return (
+        (wx1 > 0 and x1 - wx1 < _EDGE_MARGIN_PX)
+        or (wy1 > 0 and y1 - wy1 < _EDGE_MARGIN_PX)
+        or (wx2 < width and wx2 - x2 < _EDGE_MARGIN_PX)
+        or (wy2 < height and wy2 - y2 < _EDGE_MARGIN_PX)
+    )
+
+
+def merge_detections(
+    full_frame: List[DetectedObject],
+    tiles: List[Tuple[Window, List[DetectedObject]]],
+    image_shape: Tuple[int, ...],
+    iou_threshold: float,
+) -> List[DetectedObject]:
+    """Переводит рамки тайлов в координаты кадра и сливает их с полнокадровыми.
+
+    Рамки, упирающиеся во внутренний край тайла, отбрасываются: благодаря
+    перекрытию объект целиком виден в соседнем тайле, а крупные объекты
+    приходят из полнокадрового прохода. Остальное проходит общий NMS по классам.
+
+    Args:
+        full_frame (List[DetectedObject]): Объекты полнокадрового прохода.
+        tiles (list): Пары (окно тайла, объекты в координатах тайла).
+        image_shape (tuple): Форма изображения (H, W, ...).
+        iou_threshold (float): Порог IoU для NMS.
+
+    Returns:
+        List[DetectedObject]: Объединённые объекты по убыванию score.
+    """
+    height, width = image_shape[:2]
+    candidates = list(full_frame)
+    for window, detected in tiles:
+        x0, y0 = window[0], window[1]
+        for obj in detected:
+            x1, y1, x2, y2 = obj.bbox
+            bbox = (x1 + x0, y1 + y0, x2 + x0, y2 + y0)
+            if not _touches_inner_edge(bbox, window, width, height):
+                candidates.append(DetectedObject(bbox, obj.label, obj.score))
+    if not candidates:
+        return []
+
+    merged: List[DetectedObject] = []
+    for label in {obj.label for obj in candidates}:
+        group = [obj for obj in candidates if obj.label == label]
+        boxes = np.asarray([obj.bbox for obj in group], dtype=np.float32)
+        scores = np.asarray([obj.score for obj in group], dtype=np.float32)
+        merged.extend(group[i] for i in nms(boxes, scores, iou_threshold))
+    merged.sort(key=lambda obj: obj.score, reverse=True)
+    return merged
+
+
+def detect_tiled(
+    predict_batch: Callable[[List[np.ndarray]], List[List[DetectedObject]]],
+    images: List[np.ndarray],
+    full_frame: List[List[DetectedObject]],
+) -> List[List[DetectedObject]]:
+    """Дополняет полнокадровые результаты тайловым проходом там, где он нужен.
+
+    Тайлы всех изображений идут в модель пачками по `settings.ai_tile_max_tiles`.
+
+    Args:
+        predict_batch (Callable): Батчевый вызов модели (список картинок -> объекты).
+        images (List[np.ndarray]): RGB-изображения.
+        full_frame (List[List[DetectedObject]]): Полнокадровые результаты по каждому изображению.
+
+    Returns:
+        List[List[DetectedObject]]: Итоговые объекты по каждому изображению.
+    """
+    plans = [plan_tiles(image.shape, detected) for image, detected in zip(images, full_frame)]
+    jobs = [(idx, window) for idx, windows in enumerate(plans) for window in windows]
+    if not jobs:
+        return full_frame
+
+    tile_results: List[List[DetectedObject]] = []
+    chunk = max(1, settings.ai_tile_max_tiles)
+    for start in range(0, len(jobs), chunk):
+        crops = [images[idx][y1:y2, x1:x2] for idx, (x1, y1, x2, y2) in jobs[start : start + chunk]]
+        tile_results.extend(predict_batch(crops))
+
+    per_image: List[List[Tuple[Window, List[DetectedObject]]]] = [[] for _ in images]
+    for (idx, window), detected in zip(jobs, tile_results):
+        per_image[idx].append((window, detected))
+    return [
+        merge_detections(detected, per_image[idx], images[idx].shape, settings.ai_detector_iou) if plans[idx] else detected
+        for idx, detected in enumerate(full_frame)
+    ]
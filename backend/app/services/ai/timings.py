@@ -0,0 +1,61 @@
+"""Тайминги стадий AI-пайплайна.
+
+`collect()` открывает сборщик на один анализ, `stage(name)` замеряет стадию
+через `time.monotonic()`. Сборщик живёт в `ContextVar`, а `asyncio.to_thread`
+копирует контекст в поток, поэтому стадии внутри инференса попадают в тот же
+сборщик. Каждое измерение также уходит в гистограмму `ai_stage_seconds`.
+Вне `collect()` стадии пишутся только в гистограмму.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator
+
+from app.core.metrics import gauge, histogram
+
+STAGE_SECONDS = histogram("ai_stage_seconds", "Длительность стадий AI-пайплайна, с.", ("stage",))
+# Анализы, ждущие поток или идущие в инференсе: фактическая глубина очереди воркера.
+IN_PROGRESS = gauge("ai_inference_in_progress", "Анализы в фазе инференса (включая ожидание потока).", ("kind",))
+
+_current: ContextVar[Dict[str, float] | None] = ContextVar("ai_timings", default=None)
+
+
+@contextmanager
+def collect() -> Iterator[Dict[str, float]]:
+    """Открывает сборщик таймингов для одного анализа.
+
+    Yields:
+        dict[str, float]: Суммарное время по стадиям в секундах; повторные
+            стадии (например, `embed` по каждому кропу) складываются.
+    """
+    timings: Dict[str, float] = {}
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Замеряет стадию и записывает её в текущий сборщик и гистограмму."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        elapsed = time.monotonic() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _current.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def rounded(timings: Dict[str, float]) -> Dict[str, float]:
+    """Тайминги в миллисекундной точности для `AIDetection.raw["timings"]`."""
+    return {name: round(seconds, 4) for name, seconds in timings.items()}
+
+
+def format_log(timings: Dict[str, float]) -> str:
+    """Строка `stage=seconds` для структурированного лога."""
+    return " ".join(f"{name}={seconds:.4f}" for name, seconds in timings.items())
@@ -1,11 +1,14 @@
 """Упрощённый AI-пайплайн для видео.
 
 Видео не анализируется целиком: мы берём только часть кадров с шагом `stride`,
-чтобы backend мог работать даже на слабом железе или NAS без GPU.
+чтобы backend мог работать даже на слабом железе или NAS без GPU. Кадры
+декодируются в память и анализируются без открытой транзакции.
 """
 
+import asyncio
 import logging
 import math
+import time
 from pathlib import Path
 from typing import List
 
@@ -15,11 +18,13 @@ from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.models.ai import AIDetection, AIDetectionObject, AIDetectionStatus, AIDetectionCandidate
+from app.models.ai import AIDetection, AIDetectionStatus
 from app.models.media import Media
 from app.models.item import Item
 from app.services.ai.detector import detect_objects
+from app.services.ai import timings
 from app.services.ai.embeddings import image_embedding
+from app.services.ai.pipeline import _embedding_ref, _persist_detection_objects, _raw_objects, set_latest_detection
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +48,106 @@ def _expected_frame_total(total_frames: int, stride: int, limit: int) -> int:
     return min(limit, max(1, math.ceil(total_frames / max(1, stride))))
 
 
+def _frame_candidates(
+    location_item_ids: list[int],
+    hint_item_ids: list[int],
+) -> list[tuple[int, float]]:
+    """Кандидаты для объекта кадра по лёгкой эвристике видео-пайплайна.
+
+    Для видео используем лёгкую эвристику: сначала предметы из той же
+    локации, потом явные hint_item_ids.
+
+    Args:
+        location_item_ids (list[int]): Последние предметы локации медиа.
+        hint_item_ids (list[int]): Проверенные подсказки от клиента.
+
+    Returns:
+        list[tuple[int, float]]: Пары (item_id, score).
+    """
+    candidates = [
+        (item_id, max(0.1, min(0.9, 0.7 - idx * 0.1)))
+        for idx, item_id in enumerate(location_item_ids)
+    ]
+    candidates.extend((item_id, 0.95) for item_id in hint_item_ids)
+    return candidates
+
+
+def _analyze_frame(image: Image.Image, candidates: list[tuple[int, float]]) -> tuple[list[dict], list[str]]:
+    """Детекция и эмбеддинги для одного кадра без обращения к БД.
+
+    Args:
+        image (Image.Image): Кадр в RGB.
+        candidates (list[tuple[int, float]]): Кандидаты, общие для всех объектов кадра.
+
+    Returns:
+        tuple[list[dict], list[str]]: Объекты кадра и warnings.
+    """
+    warnings: list[str] = []
+    objects: list[dict] = []
+    for det in detect_objects(np.asarray(image)):
+        crop = image.crop(det.bbox)
+        embedding: np.ndarray | None = None
+        try:
+            embedding = image_embedding(crop)
+        except ImportError:
+            warnings.append("clip_unavailable")
+        objects.append(
+            {
+                "label": det.label,
+                "confidence": det.score,
+                "bbox": {"x1": det.bbox[0], "y1": det.bbox[1], "x2": det.bbox[2], "y2": det.bbox[3]},
+                "embedding": embedding,
+                "candidates": candidates,
+            }
+        )
+    return objects, warnings
+
+
+def _analyze_frames(
+    cap,
+    stride: int,
+    limit: int,
+    candidates: list[tuple[int, float]],
+    frames: list[dict],
+) -> None:
+    """Читает кадры с шагом `stride` и анализирует их без обращения к БД.
+
+    Результаты складываются в `frames` по мере обработки, поэтому при ошибке
+    на середине видео уже обработанные кадры не теряются.
+
+    Args:
+        cap: Открытый `cv2.VideoCapture`.
+        stride (int): Шаг выборки кадров.
+        limit (int): Максимальное количество кадров.
+        candidates (list[tuple[int, float]]): Кандидаты для объектов.
+        frames (list[dict]): Список, куда добавляются результаты по кадрам.
+    """
+    import cv2  # noqa: WPS433
+
+    frame_idx = 0
+    # Цикл идёт по кадрам до лимита, отбираем каждый `stride`-й. Пропускаемые кадры
+    # только `grab()`-ются: без `retrieve()` они не декодируются в отдельный буфер.
+    while len(frames) < limit and cap.grab():
+        if frame_idx % stride == 0:
+            with timings.collect() as frame_times:
+                with timings.stage("decode"):
+                    ok, frame = cap.retrieve()
+                    if not ok:
+                        break
+                    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                    del frame
+                objects, warnings = _analyze_frame(image, candidates)
+            frames.append(
+                {
+                    "frame_index": frame_idx,
+                    "objects": objects,
+                    "warnings": warnings,
+                    "timings": timings.rounded(frame_times),
+                }
+            )
+        frame_idx += 1
+
+
 async def analyze_video(
     media_id: int,
     db: AsyncSession,
@@ -56,6 +161,10 @@ async def analyze_video(
     как изображение (детекция + эмбеддинги), создаёт отдельную AIDetection
     для каждого обработанного кадра. Возвращает список ID детекций.
 
+    Как и `analyze_media`, работает в три фазы: чтение входных данных,
+    инференс по всем кадрам в отдельном потоке без открытой транзакции
+    и запись всех детекций одной транзакцией.
+
     Args:
         media_id (int): ID видеофайла для анализа.
         db (AsyncSession): Асинхронная сессия базы данных.
@@ -77,6 +186,7 @@ async def analyze_video(
     except ImportError as exc:  # noqa: BLE001
         raise ImportError("OpenCV (cv2) is required for video analysis") from exc
 
+    started = time.monotonic()
     media: Media | None = await db.get(Media, media_id)
     if not media:
         raise ValueError("Media not found")
@@ -104,6 +214,18 @@ async def analyze_video(
             Item.id.in_(hint_item_ids),
         )
         valid_hint_items = [row[0] for row in (await db.execute(stmt)).all()]
+    location_item_ids: list[int] = []
+    if media.location_id:
+        stmt = (
+            select(Item.id)
+            .where(Item.location_id == media.location_id)
+            .order_by(Item.created_at.desc())
+            .limit(3)
+        )
+        location_item_ids = [row[0] for row in (await db.execute(stmt)).all()]
+    # Фаза 1 закончена: отпускаем соединение до записи результатов.
+    await db.commit()
+    read_done = time.monotonic()
     logger.info(
         "analyze_video.start media_id=%s stride=%s limit=%s total_frames=%s expected_total=%s hint_items=%s",
         media_id,
@@ -113,146 +235,96 @@ async def analyze_video(
         expected_total,
         valid_hint_items,
     )
-    detection_ids: List[int] = []
-    frame_idx = 0
-    processed_frames = 0
+
+    frames: list[dict] = []
+    error: str | None = None
     try:
-        ok, frame = cap.read()
-        # Цикл идёт по кадрам до лимита, отбираем каждый `stride`-й.
-        while ok and processed_frames < limit:
-            if frame_idx % stride == 0:
-                # Кадр временно кладём на диск, чтобы переиспользовать
-                # обычный image-flow без отдельной ветки сериализации.
-                tmp_path = base_path / "tmp_frames"
-                tmp_path.mkdir(parents=True, exist_ok=True)
-                frame_file = tmp_path / f"frame_{media_id}_{frame_idx}.jpg"
-                cv2.imwrite(str(frame_file), frame)
-                detection = await _create_detection_from_frame(
-                    media_id=media_id,
-                    frame_path=frame_file,
-                    db=db,
-                    frame_index=frame_idx,
-                    frames_total=expected_total,
-                    processed_index=processed_frames + 1,
-                    media_location_id=media.location_id,
-                    hint_item_ids=valid_hint_items,
-                )
-                detection_ids.append(detection.id)
-                try:
-                    frame_file.unlink(missing_ok=True)
-                except Exception:
-                    pass
-                processed_frames += 1
-            frame_idx += 1
-            ok, frame = cap.read()
+        with timings.IN_PROGRESS.track_inprogress(kind="video"):
+            await asyncio.to_thread(
+                _analyze_frames,
+                cap,
+                stride,
+                limit,
+                _frame_candidates(location_item_ids, valid_hint_items),
+                frames,
+            )
     except Exception as exc:  # noqa: BLE001
         logger.exception("analyze_video failed for media %s: %s", media_id, exc)
-        failed = AIDetection(media_id=media_id, status=AIDetectionStatus.FAILED, raw={"error": str(exc)})
-        db.add(failed)
-        await db.commit()
+        error = str(exc)
     finally:
         cap.release()
-        await db.commit()
-        tmp_dir = base_path / "tmp_frames"
-        try:
-            if tmp_dir.exists() and not any(tmp_dir.iterdir()):
-                tmp_dir.rmdir()
-        except Exception:
-            pass
+    frames_done = time.monotonic()
+
+    detection_rows = [
+        _detection_from_frame(
+            media_id=media_id,
+            frame=frame,
+            frames_total=expected_total,
+            processed_index=processed_index,
+            hint_item_ids=valid_hint_items,
+        )
+        for processed_index, frame in enumerate(frames, start=1)
+    ]
+    if detection_rows:
+        db.add_all(detection_rows)
+        await db.flush()
+        # Объекты всех кадров уходят в БД тем же пакетным методом, что и для фото.
+        await _persist_detection_objects(
+            db,
+            [(row.id, obj) for row, frame in zip(detection_rows, frames) for obj in frame["objects"]],
+        )
+    detection_ids = [row.id for row in detection_rows]
+    latest_id = detection_ids[-1] if detection_ids else None
+    if error is not None:
+        failed_row = AIDetection(media_id=media_id, status=AIDetectionStatus.FAILED, raw={"error": error})
+        db.add(failed_row)
+        await db.flush()
+        latest_id = failed_row.id
+    if latest_id is not None:
+        await set_latest_detection(db, media_id, latest_id)
+    await db.commit()
+    finished = time.monotonic()
+    # Стадии отдельных кадров уже в `raw["timings"]` их детекций; здесь — видео целиком.
+    video_times = {"db_read": read_done - started, "frames": frames_done - read_done, "db_write": finished - frames_done}
+    for name, seconds in video_times.items():
+        timings.STAGE_SECONDS.observe(seconds, stage=f"video_{name}")
+    timings.STAGE_SECONDS.observe(finished - started, stage="video_total")
     logger.info(
-        "analyze_video.done media_id=%s processed_frames=%s detections=%s",
+        "analyze_video.done media_id=%s processed_frames=%s detections=%s total=%.4f %s",
         media_id,
-        processed_frames,
+        len(frames),
         len(detection_ids),
+        finished - started,
+        timings.format_log(video_times),
     )
     return detection_ids
 
 
-async def _create_detection_from_frame(
+def _detection_from_frame(
     media_id: int,
-    frame_path: Path,
-    db: AsyncSession,
-    frame_index: int,
+    frame: dict,
     frames_total: int,
     processed_index: int,
-    media_location_id: int | None,
     hint_item_ids: list[int] | None,
 ) -> AIDetection:
-    """Создаёт детекцию по одному кадру видео."""
-    import cv2  # noqa: WPS433
-
-    with frame_path.open("rb") as f:
-        image = Image.open(f).convert("RGB")
-    image_np = np.array(image)
-    detections = detect_objects(image_np)
-
-    detection_row = AIDetection(
+    """Собирает детекцию по одному уже проанализированному кадру (без записи в БД)."""
+    raw = {
+        "objects": _raw_objects(frame["objects"]),
+        "frame_index": frame["frame_index"],
+        "frames_total": frames_total,
+        "progress": {"current": processed_index, "total": frames_total},
+        "hint_item_ids": hint_item_ids or [],
+    }
+    if frame["warnings"]:
+        raw["warnings"] = frame["warnings"]
+    if frame.get("timings"):
+        raw["timings"] = frame["timings"]
+    embedding_ref = _embedding_ref(frame["objects"])
+    if embedding_ref:
+        raw["embedding_ref"] = embedding_ref
+    return AIDetection(
         media_id=media_id,
-        status=AIDetectionStatus.IN_PROGRESS,
-        raw={
-            "objects": [],
-            "frame_index": frame_index,
-            "frames_total": frames_total,
-            "progress": {"current": processed_index, "total": frames_total},
-            "hint_item_ids": hint_item_ids or [],
-        },
+        status=AIDetectionStatus.DONE,
+        raw=raw,
+        completed_at=func.now(),
     )
-    db.add(detection_row)
-    await db.flush()
-
-    for det in detections:
-        crop = image.crop(det.bbox)
-        embedding_list: list[float] | None = None
-        try:
-            emb = image_embedding(crop)
-            embedding_list = emb.tolist()
-        except ImportError:
-            detection_row.raw.setdefault("warnings", []).append("clip_unavailable")
-        det_obj = AIDetectionObject(
-            detection_id=detection_row.id,
-            label=det.label,
-            confidence=det.score,
-            bbox={"x1": det.bbox[0], "y1": det.bbox[1], "x2": det.bbox[2], "y2": det.bbox[3]},
-            suggested_location_id=None,
-        )
-        detection_row.raw["objects"].append(
-            {
-                "label": det.label,
-                "confidence": det.score,
-                "bbox": det_obj.bbox,
-                "embedding": embedding_list,
-            }
-        )
-        db.add(det_obj)
-
-        # Для видео используем лёгкую эвристику:
-        # сначала предметы из той же локации, потом явные hint_item_ids.
-        if media_location_id:
-            stmt = (
-                select(Item.id)
-                .where(Item.location_id == media_location_id)
-                .order_by(Item.created_at.desc())
-                .limit(3)
-            )
-            item_ids = [row[0] for row in (await db.execute(stmt)).all()]
-            for idx, item_id in enumerate(item_ids):
-                db.add(
-                    AIDetectionCandidate(
-                        detection_object_id=det_obj.id,
-                        item_id=item_id,
-                        score=max(0.1, min(0.9, 0.7 - idx * 0.1)),
-                    )
-                )
-        if hint_item_ids:
-            for item_id in hint_item_ids:
-                db.add(
-                    AIDetectionCandidate(
-                        detection_object_id=det_obj.id,
-                        item_id=item_id,
-                        score=0.95,
-                    )
-                )
-    await db.flush()
-    detection_row.status = AIDetectionStatus.DONE
-    detection_row.completed_at = func.now()
-    return detection_row
@@ -0,0 +1,124 @@
+"""Предзагрузка и прогрев моделей при старте сервиса.
+
+Без прогрева первый upload после деплоя платит за загрузку YOLO и
+`open_clip.create_model_and_transforms` (10–30 с) прямо внутри запроса.
+С `settings.ai_preload_models` модели грузятся в фоне при старте, после чего
+делается холостой forward pass. Состояние и тайминги видны в `/health/full`,
+а `/health/ready` отвечает 503, пока прогрев не закончился.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+import numpy as np
+
+from app.core.metrics import gauge
+from app.services.ai import detector, embeddings
+
+logger = logging.getLogger(__name__)
+
+# Размер холостого кадра совпадает со стандартным входом YOLO.
+WARMUP_IMAGE_SIZE = 640
+
+_lock = threading.Lock()
+_state: dict[str, dict[str, Any]] = {
+    "detector": {"state": "not_loaded"},
+    "clip": {"state": "not_loaded"},
+}
+
+
+def _set_state(name: str, **values: Any) -> None:
+    with _lock:
+        _state[name] = {**_state[name], **values}
+
+
+def model_status() -> dict[str, dict[str, Any]]:
+    """Снимок состояния моделей для health-эндпоинтов.
+
+    Returns:
+        dict[str, dict[str, Any]]: По каждой модели `state`
+            (`not_loaded` | `loading` | `ready` | `failed`), `load_s`, `warmup_s` и `error`.
+    """
+    with _lock:
+        return {name: dict(values) for name, values in _state.items()}
+
+
+_STATES = ("not_loaded", "loading", "ready", "failed")
+
+
+def _model_state_samples() -> dict[tuple[str, ...], float]:
+    return {
+        (name, state): float(values["state"] == state)
+        for name, values in model_status().items()
+        for state in _STATES
+    }
+
+
+def _model_load_samples() -> dict[tuple[str, ...], float]:
+    return {(name,): values["load_s"] for name, values in model_status().items() if values.get("load_s") is not None}
+
+
+gauge("ai_model_state", "Состояние моделей: 1 для текущего состояния.", ("model", "state"), callback=_model_state_samples)
+gauge("ai_model_load_seconds", "Время загрузки моделей при прогреве, с.", ("model",), callback=_model_load_samples)
+
+
+def preload_finished() -> bool:
+    """True, если ни одна модель не находится в процессе загрузки."""
+    return all(values["state"] != "loading" for values in model_status().values())
+
+
+def mark_preload_started() -> None:
+    """Переводит обе модели в `loading` до запуска фонового прогрева.
+
+    Вызывается синхронно в startup-хуке: иначе между стартом сервиса и
+    первым шагом потока прогрева `/health/ready` видит `not_loaded` и отвечает 200.
+    """
+    _set_state("detector", state="loading")
+    _set_state("clip", state="loading")
+
+
+def _warm(name: str, load: Callable[[], Any], warmup: Callable[[], Any]) -> None:
+    _set_state(name, state="loading", error=None)
+    started = time.monotonic()
+    try:
+        loaded = load()
+        load_s = round(time.monotonic() - started, 3)
+        if loaded is None:
+            # Нет весов: детектор работает через fallback, прогревать нечего.
+            _set_state(name, state="failed", load_s=load_s, error="weights not found")
+            return
+        started = time.monotonic()
+        warmup()
+        _set_state(name, state="ready", load_s=load_s, warmup_s=round(time.monotonic() - started, 3))
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("ai.preload.failed model=%s error=%s", name, exc)
+        _set_state(name, state="failed", load_s=round(time.monotonic() - started, 3), error=str(exc))
+
+
+def preload_models() -> dict[str, dict[str, Any]]:
+    """Загружает детектор и CLIP и прогоняет по одному холостому кадру.
+
+    Функция синхронная и долгая: на старте её запускают в отдельном потоке.
+
+    Returns:
+        dict[str, dict[str, Any]]: Итоговое состояние моделей (как `model_status`).
+    """
+    # Оба состояния выставляем сразу, чтобы readiness не успел проскочить между моделями.
+    mark_preload_started()
+    blank = np.zeros((WARMUP_IMAGE_SIZE, WARMUP_IMAGE_SIZE, 3), dtype=np.uint8)
+    _warm("detector", detector._load_model, lambda: detector.detect_objects_batch([blank]))
+
+    def _warm_clip() -> None:
+        from PIL import Image
+
+        embeddings.image_embeddings([Image.fromarray(blank)])
+
+    _warm("clip", embeddings._load_clip, _warm_clip)
+    status = model_status()
+    logger.info(
+        "ai.preload.done %s",
+        " ".join(f"{name}={values['state']}:{values.get('load_s')}s+{values.get('warmup_s')}s" for name, values in status.items()),
+    )
+    return status
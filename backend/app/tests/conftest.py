@@ -1,11 +1,14 @@
 """Общие фикстуры для тестов backend."""
 
+from contextlib import contextmanager
+
 import pytest
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.api.deps import get_db
 from app.core.config import settings
 from app.db.base import Base  # noqa: F401
+from app.db.query_stats import instrument_engine, track_queries
 from app.main import app
 
 
@@ -18,6 +21,8 @@ async def test_app(tmp_path):
     )
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # Тестовый движок подменяет боевой, поэтому считаем запросы и на нём.
+    instrument_engine(engine.sync_engine)
 
     session_factory = async_sessionmaker(engine, expire_on_commit=False)
 
@@ -42,3 +47,20 @@ async def test_app(tmp_path):
         settings.media_public_path = old_public
         settings.media_private_path = old_private
         await engine.dispose()
+
+
+@pytest.fixture
+def assert_num_queries():
+    """Проверяет число SQL-выражений в блоке: `with assert_num_queries(2): ...`.
+
+    Считает через `track_queries` на движке `test_app`, поэтому ловит и запросы
+    внутри ASGI-вызова. При несовпадении в сообщении перечислены выражения.
+    """
+
+    @contextmanager
+    def _assert(expected: int):
+        with track_queries() as stats:
+            yield stats
+        assert stats.count == expected, f"expected {expected} queries, got {stats.count}:\n" + "\n".join(stats.statements)
+
+    return _assert
@@ -1,4 +1,4 @@
-from app.models.ai import AIDetectionCandidate, AIDetectionObject, AIDetectionReview
+from app.models.ai import AIDetectionCandidate, AIDetectionObject, AIDetectionReview, AIInferenceCache
 
 
 def test_ai_detection_object_columns_match_expected_shape():
@@ -8,6 +8,7 @@ def test_ai_detection_object_columns_match_expected_shape():
         "label",
         "confidence",
         "bbox",
+        "embedding",
         "suggested_location_id",
         "decision",
         "decided_by",
@@ -37,3 +38,18 @@ def test_ai_detection_review_columns_match_expected_shape():
         "payload",
         "created_at",
     ]
+
+
+def test_ai_inference_cache_columns_match_expected_shape():
+    assert list(AIInferenceCache.__table__.columns.keys()) == [
+        "id",
+        "file_hash",
+        "detector_version",
+        "clip_version",
+        "conf",
+        "objects",
+        "embeddings",
+        "embedding_dim",
+        "warnings",
+        "created_at",
+    ]
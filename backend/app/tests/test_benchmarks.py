@@ -0,0 +1,104 @@
+"""Дымовой прогон бенчмарка пайплайна на минимальных параметрах."""
+
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app.benchmarks import loadtest
+from app.benchmarks import pipeline as bench
+from app.benchmarks.seed_workspace import SeedConfig, seed_workspaces
+from app.models.item import Item
+from app.models.location import Location
+from app.models.media import Media, MediaUploadHistory
+from app.models.tag import ItemTag
+
+
+@pytest.mark.anyio
+async def test_pipeline_benchmark_runs_on_fallback_and_compares(tmp_path):
+    report = await bench.run_benchmarks(items=3, resolutions=[(320, 240)], video_resolutions=[], repeat=1)
+
+    names = [result["name"] for result in report["results"]]
+    assert names == ["top_k_candidates", "thumbnail", "analyze_media", "upload"]
+    assert all(result["runs"] == 1 and result["median_ms"] >= 0 for result in report["results"])
+    assert report["meta"]["items"] == 3
+    json.dumps(report)
+
+    baseline = json.loads(json.dumps(report))
+    for result in baseline["results"]:
+        result["median_ms"] = result["median_ms"] * 2 or 1.0
+    lines = bench.compare(report, baseline)
+    assert len(lines) == len(names)
+    assert lines[0].startswith('top_k_candidates {"items": 3}')
+
+
+@pytest.mark.anyio
+async def test_seed_workspace_builds_consistent_dataset(test_app):
+    app, session_factory, public_dir, _ = test_app
+    config = SeedConfig(
+        workspaces=2, location_depth=3, location_fanout=2, items=50, tags=5, tags_per_item=2, media=6, failed_uploads=2, batch_size=7
+    )
+    async with session_factory() as session:
+        report = await seed_workspaces(await session.connection(), config, public_dir)
+        await session.commit()
+        # Повторный прогон доливает данные поверх существующих id.
+        await seed_workspaces(await session.connection(), SeedConfig(items=3, tags=2, tags_per_item=1, media=1, failed_uploads=0, location_depth=1, write_files=False), None)
+        await session.commit()
+
+    assert report["rows"]["item"] == 100
+    assert report["rows"]["item_tags"] == 200
+    assert report["rows"]["syncchange"] == 2 * (50 + 7 + 5 + 6 + 6)
+    async with session_factory() as session:
+        assert await session.scalar(select(func.count()).select_from(Item)) == 103
+        assert await session.scalar(select(func.count()).select_from(ItemTag)) == 203
+        missing_latest = await session.scalar(select(func.count()).where(Media.latest_detection_id.is_(None)))
+        assert missing_latest == 0
+        deepest = (await session.execute(select(Location.path).order_by(func.length(Location.path).desc()))).scalars().first()
+        assert deepest.count(".") == 2
+        failed = await session.scalar(select(func.count()).where(MediaUploadHistory.media_id.is_(None)))
+        assert failed == 4
+        media_id = await session.scalar(select(func.min(Media.id)))
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get(f"/api/v1/media/file/{media_id}")
+        assert resp.status_code == 200
+        history = await client.get("/api/v1/media/history", params={"status": "success", "limit": 5})
+        assert history.status_code == 200
+        assert len(history.json()) == 5
+        # Сгенерированные данные видны дельта-синхронизации.
+        workspace_id = report["workspace_ids"][0]
+        snapshot = (await client.get("/api/v1/sync", params={"workspace_id": workspace_id, "limit": 5000})).json()
+        assert len(snapshot["items"]) == 50
+        assert len(snapshot["locations"]) == 7
+        assert len(snapshot["tags"]) == 5
+        assert len(snapshot["media"]) == 6
+        assert len(snapshot["detections"]) == 6
+        assert snapshot["has_more"] is False
+
+
+def test_loadtest_summary_percentiles_and_errors():
+    samples = [("search", 200, ms / 1000) for ms in range(1, 101)] + [("upload", 500, 0.2), ("upload", 0, 0.1)]
+    report = loadtest.summarize(samples, elapsed_s=2.0)
+
+    assert report["search"]["p50_ms"] == 50
+    assert report["search"]["p99_ms"] == 99
+    assert report["search"]["rps"] == 50
+    assert report["upload"]["errors"] == 2
+    assert report["upload"]["statuses"] == {"500": 1, "0": 1}
+    assert report["total"]["requests"] == 102
+
+
+@pytest.mark.anyio
+async def test_loadtest_runs_mixed_scenarios_in_process():
+    config = loadtest.LoadConfig(
+        concurrency=3, duration_s=60, max_requests=16, analyze=False, photo_size=(160, 120), video_share=0.5
+    )
+    seed_config = SeedConfig(items=20, tags=3, tags_per_item=1, media=4, location_depth=2, failed_uploads=0)
+    report = await loadtest.run_in_process(config, seed_config)
+
+    endpoints = report["endpoints"]
+    assert endpoints["total"]["requests"] == 16
+    assert endpoints["total"]["errors"] == 0
+    assert set(endpoints) <= {"upload", "history", "search", "file", "total"}
+    assert report["meta"]["target"] == "in-process sqlite"
@@ -0,0 +1,75 @@
+"""Проверяет декод фото в рабочем разрешении и перевод рамок в пиксели оригинала."""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services.ai import pipeline
+from app.services.ai.decode import open_for_analysis
+from app.services.ai.detector import DetectedObject
+
+
+def _photo(path, fmt):
+    image = Image.new("RGB", (4000, 3000), (20, 20, 20))
+    image.paste((250, 250, 250), (2000, 1500, 2400, 1800))
+    image.save(path, format=fmt)
+    return path
+
+
+@pytest.mark.parametrize("fmt", ["JPEG", "PNG"])
+def test_open_for_analysis_downscales_and_maps_back(tmp_path, fmt):
+    decoded = open_for_analysis(_photo(tmp_path / f"shelf.{fmt.lower()}", fmt), max_side=1000, crop_max_side=500)
+
+    assert decoded.original_size == (4000, 3000)
+    assert max(decoded.image.size) <= 1000
+    assert max(decoded.crop_image.size) <= 500
+    scale = 4000 / decoded.image.width
+    assert decoded.to_original((500, 375, 600, 450)) == pytest.approx((500 * scale, 375 * scale, 600 * scale, 450 * scale))
+    crop = decoded.crop((2000, 1500, 2400, 1800))
+    assert crop.width == 50 and abs(crop.height - 37.5) <= 1
+    assert np.asarray(crop).mean() > 200
+
+
+def test_detect_and_embed_reports_boxes_in_original_pixels(tmp_path, monkeypatch):
+    path = _photo(tmp_path / "shelf.jpg", "JPEG")
+    seen: list[tuple[int, ...]] = []
+    crops: list[tuple[int, int]] = []
+
+    def _detect(image_np, conf=0.25):
+        seen.append(image_np.shape)
+        h, w = image_np.shape[:2]
+        return [DetectedObject((w / 2, h / 2, w * 0.6, h * 0.6), "box", 0.9)]
+
+    def _embed(crop):
+        crops.append(crop.size)
+        return np.ones(4, dtype="float32")
+
+    monkeypatch.setattr(pipeline, "detect_objects", _detect)
+    monkeypatch.setattr(pipeline, "image_embedding", _embed)
+    monkeypatch.setattr(settings, "ai_decode_max_side", 1000)
+    monkeypatch.setattr(settings, "ai_crop_max_side", 500)
+
+    objects, warnings = pipeline._detect_and_embed(path)
+
+    assert warnings == []
+    assert max(seen[0][:2]) <= 1000
+    assert objects[0]["bbox"] == pytest.approx({"x1": 2000, "y1": 1500, "x2": 2400, "y2": 1800})
+    assert max(crops[0]) <= 60
+
+
+def test_item_media_embeddings_decode_reduced_copies(tmp_path, monkeypatch):
+    paths = [_photo(tmp_path / f"item{i}.jpg", "JPEG") for i in range(3)]
+    sizes: list[tuple[int, int]] = []
+
+    def _embed(image):
+        sizes.append(image.size)
+        return np.ones(4, dtype="float32")
+
+    monkeypatch.setattr(pipeline, "image_embedding", _embed)
+    rows = [(i + 1, str(path), "image/jpeg") for i, path in enumerate(paths)]
+
+    embeddings = pipeline._load_item_media_embeddings(rows, max_items=10)
+
+    assert [item_id for item_id, _ in embeddings] == [1, 2, 3]
+    assert all(max(size) <= settings.ai_item_embedding_max_side for size in sizes)
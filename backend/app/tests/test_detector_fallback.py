@@ -1,7 +1,12 @@
 """Проверяет fallback-детектор, когда YOLO/cv2 недоступны."""
 
+import sys
+
 import numpy as np
+import pytest
 
+from app.core.config import settings
+from app.services.ai import inference_cache
 from app.services.ai.detector import detect_objects
 
 
@@ -14,3 +19,64 @@ def test_detect_objects_returns_at_least_one_box_when_no_model(monkeypatch):
     objs = detect_objects(img)
     assert len(objs) >= 1
     assert objs[0].bbox is not None
+    assert all(obj.fallback for obj in objs)
+
+
+def test_detector_version_is_fallback_when_weights_exist_but_import_fails(monkeypatch, tmp_path):
+    from app.services.ai import detector
+
+    weights = tmp_path / "best.pt"
+    weights.write_bytes(b"weights")
+    monkeypatch.setattr(settings, "ai_detector_backend", "ultralytics")
+    monkeypatch.setattr(settings, "ai_yolo_weights_path", str(weights))
+    monkeypatch.setattr(settings, "ai_inference_socket", None)
+    monkeypatch.setattr(detector, "_load_failed", False)
+    # None в sys.modules заставляет `from ultralytics import YOLO` бросить ImportError.
+    monkeypatch.setitem(sys.modules, "ultralytics", None)
+    detector._load_model.cache_clear()
+    try:
+        # Версия считается без загрузки модели: до первой попытки — по файлу весов.
+        assert detector.detector_version().startswith("ultralytics:best.pt:7:")
+        assert all(obj.fallback for obj in detector.detect_objects(np.zeros((10, 10, 3), dtype=np.uint8)))
+        assert detector.detector_version() == "fallback"
+
+        # Загрузка удалась — снова версия весов.
+        monkeypatch.setattr(detector, "_load_backend", lambda: object())
+        detector._load_model.cache_clear()
+        detector._load_model()
+        assert detector.detector_version().startswith("ultralytics:best.pt:7:")
+    finally:
+        detector._load_model.cache_clear()
+
+
+def test_detector_version_does_not_load_model(monkeypatch, tmp_path):
+    from app.services.ai import detector
+
+    weights = tmp_path / "best.pt"
+    weights.write_bytes(b"weights")
+    monkeypatch.setattr(settings, "ai_detector_backend", "ultralytics")
+    monkeypatch.setattr(settings, "ai_yolo_weights_path", str(weights))
+    monkeypatch.setattr(settings, "ai_inference_socket", None)
+    monkeypatch.setattr(detector, "_load_failed", False)
+
+    def _fail():
+        raise AssertionError("detector_version must not load the model")
+
+    monkeypatch.setattr(detector, "_load_model", _fail)
+    monkeypatch.setattr(detector, "_local_model", _fail)
+    assert detector.detector_version().startswith("ultralytics:best.pt:7:")
+
+
+@pytest.mark.anyio
+async def test_fallback_result_is_not_cached_under_weights_version(test_app):
+    _, session_factory, _, _ = test_app
+    objects = [{"label": "object", "confidence": 0.4, "bbox": {"x1": 0, "y1": 0, "x2": 4, "y2": 4}, "embedding": None}]
+    real = inference_cache.CacheKey("abc", "ultralytics:best.pt:7:0:off@1600", "clip@512", 0.25)
+    fallback = real._replace(detector_version="fallback@1600")
+
+    async with session_factory() as session:
+        await inference_cache.store(session, real, objects, ["detector_fallback"])
+        await inference_cache.store(session, fallback, objects, ["detector_fallback"])
+        await session.commit()
+        assert await inference_cache.load_cached(session, real) is None
+        assert await inference_cache.load_cached(session, fallback) is not None
@@ -40,3 +40,53 @@ def test_health_full(monkeypatch, tmp_path):
         assert "ai_weights" in checks
     finally:
         app.dependency_overrides.clear()
+
+
+def test_preload_models_records_state_and_readiness(monkeypatch):
+    from app.services.ai import detector, embeddings, warmup
+
+    warmed: list[int] = []
+    monkeypatch.setattr(warmup, "_state", {"detector": {"state": "not_loaded"}, "clip": {"state": "not_loaded"}})
+    monkeypatch.setattr(detector, "_load_model", lambda: object())
+    monkeypatch.setattr(detector, "detect_objects_batch", lambda images, conf=0.25: warmed.append(len(images)))
+
+    def _no_clip():
+        raise ImportError("open_clip/torch not installed")
+
+    monkeypatch.setattr(embeddings, "_load_clip", _no_clip)
+    monkeypatch.setattr(settings, "ai_preload_models", True)
+    client = TestClient(app)
+
+    # Пока модель грузится, readiness отвечает 503.
+    warmup._set_state("detector", state="loading")
+    resp = client.get("/api/v1/health/ready")
+    assert resp.status_code == 503
+    assert resp.json()["status"] == "warming_up"
+
+    status = warmup.preload_models()
+    assert warmed == [1]
+    assert status["detector"]["state"] == "ready"
+    assert status["detector"]["load_s"] >= 0 and status["detector"]["warmup_s"] >= 0
+    assert status["clip"]["state"] == "failed"
+    assert "open_clip" in status["clip"]["error"]
+
+    # Незагрузившийся CLIP не блокирует трафик (работает fallback), но виден в health.
+    resp = client.get("/api/v1/health/ready")
+    assert resp.status_code == 200
+    assert resp.json()["ai_models"]["models"]["clip"]["state"] == "failed"
+
+
+def test_readiness_is_503_from_startup_until_preload_runs(monkeypatch):
+    from app import main
+    from app.services.ai import warmup
+
+    monkeypatch.setattr(warmup, "_state", {"detector": {"state": "not_loaded"}, "clip": {"state": "not_loaded"}})
+    # Поток прогрева так и не доходит до работы: состояние задаёт только startup-хук.
+    monkeypatch.setattr(main, "preload_models", lambda: None)
+    monkeypatch.setattr(settings, "ai_preload_models", True)
+    monkeypatch.setattr(settings, "ai_inference_socket", None)
+
+    with TestClient(app) as client:
+        resp = client.get("/api/v1/health/ready")
+    assert resp.status_code == 503
+    assert {m["state"] for m in resp.json()["ai_models"]["models"].values()} == {"loading"}
@@ -0,0 +1,109 @@
+"""Проверяет сервис инференса: micro-batching, протокол и фолбэк клиента."""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services.ai import detector, embeddings, inference_client
+from app.services.ai.detector import DetectedObject
+from app.services.ai.inference_server import InferenceServer
+
+
+@pytest.fixture
+def socket_path(monkeypatch):
+    # Путь Unix-сокета ограничен ~100 символами, поэтому не используем длинный tmp_path.
+    with tempfile.TemporaryDirectory(dir="/tmp") as tmp:
+        path = str(Path(tmp) / "inference.sock")
+        monkeypatch.setattr(settings, "ai_inference_socket", path)
+        yield path
+    inference_client._drop_connection()
+
+
+@pytest.mark.anyio
+async def test_concurrent_requests_are_coalesced_into_batches(socket_path):
+    batches: list[list] = []
+
+    def _detect_batch(items):
+        batches.append(items)
+        return [[DetectedObject((0, 0, image.shape[1], image.shape[0]), "box", conf)] for image, conf in items]
+
+    server = InferenceServer(detect_batch=_detect_batch, window_ms=100, max_batch=8)
+    unix_server = await server.start(socket_path)
+    try:
+        images = [np.zeros((10 + i, 20, 3), dtype=np.uint8) for i in range(4)]
+        results = await asyncio.gather(
+            *(asyncio.to_thread(detector.detect_objects, image, 0.3) for image in images)
+        )
+    finally:
+        unix_server.close()
+        await server.close()
+
+    assert sum(len(batch) for batch in batches) == 4
+    assert max(len(batch) for batch in batches) > 1
+    assert [r[0].bbox for r in results] == [(0.0, 0.0, 20.0, float(10 + i)) for i in range(4)]
+    assert all(r[0].label == "box" and r[0].score == pytest.approx(0.3) for r in results)
+
+
+@pytest.mark.anyio
+async def test_embedding_round_trip_and_import_error(socket_path):
+    vector = np.linspace(0, 1, 8, dtype="float32")
+    calls: list[int] = []
+
+    def _embed_batch(items):
+        calls.append(len(items))
+        if items[0].shape[0] == 1:
+            raise ImportError("open_clip/torch not installed")
+        return [vector for _ in items]
+
+    server = InferenceServer(embed_batch=_embed_batch, window_ms=1)
+    unix_server = await server.start(socket_path)
+    try:
+        result = await asyncio.to_thread(embeddings.image_embedding, Image.new("RGB", (4, 4)))
+        with pytest.raises(ImportError):
+            await asyncio.to_thread(embeddings.image_embedding, Image.new("RGB", (4, 1)))
+    finally:
+        unix_server.close()
+        await server.close()
+
+    assert np.allclose(result, vector)
+    assert calls == [1, 1]
+
+
+def test_detect_objects_falls_back_to_local_when_server_is_down(socket_path, monkeypatch):
+    monkeypatch.setattr(detector, "_load_model", lambda: None)
+    objects = detector.detect_objects(np.zeros((10, 10, 3), dtype=np.uint8))
+    assert objects and objects[0].label == "object"
+
+
+@pytest.mark.anyio
+async def test_timeout_is_not_retried(socket_path, monkeypatch):
+    calls: list[int] = []
+    local: list[int] = []
+
+    def _slow_detect_batch(items):
+        calls.append(len(items))
+        time.sleep(0.3)
+        return [[DetectedObject((0, 0, 1, 1), "box", conf)] for _, conf in items]
+
+    monkeypatch.setattr(settings, "ai_inference_timeout_s", 0.1)
+    monkeypatch.setattr(detector, "detect_objects_batch", lambda images, conf=0.25: local.append(1))
+    server = InferenceServer(detect_batch=_slow_detect_batch, window_ms=1)
+    unix_server = await server.start(socket_path)
+    try:
+        with pytest.raises(inference_client.InferenceTimeout):
+            await asyncio.to_thread(detector.detect_objects, np.zeros((10, 10, 3), dtype=np.uint8))
+        # Даём сервису дочитать всё, что клиент успел отправить.
+        await asyncio.sleep(0.5)
+    finally:
+        unix_server.close()
+        await server.close()
+
+    # Кадр ушёл в сервис один раз, а локальная модель не запускалась.
+    assert calls == [1]
+    assert local == []
@@ -11,6 +11,7 @@ from app.api.routes import media as media_routes
 from app.models.ai import AIDetection, AIDetectionObject
 from app.models.enums import AIDetectionStatus
 from app.models.user import User, Workspace
+from app.services.ai.pipeline import set_latest_detection
 
 
 async def _seed_workspace(session, user_id: int = 1, workspace_id: int = 1) -> None:
@@ -34,6 +35,7 @@ async def _fake_analyze_media(media_id: int, db, hint_item_ids=None):
     )
     db.add(detection)
     await db.flush()
+    await set_latest_detection(db, media_id, detection.id)
     db.add(
         AIDetectionObject(
             detection_id=detection.id,
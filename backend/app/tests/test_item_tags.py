@@ -0,0 +1,94 @@
+"""Проверяет теги предметов: уникальность без учёта регистра и обновление по разнице."""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.db.query_stats import track_queries
+from app.models.tag import Tag
+from app.models.user import User, Workspace
+
+
+async def _seed_workspace(session_factory) -> None:
+    async with session_factory() as session:
+        session.add_all(
+            [
+                User(id=1, email="demo@local", hashed_password="noop"),
+                Workspace(id=1, name="Demo", owner_user_id=1),
+            ]
+        )
+        await session.commit()
+
+
+@pytest.mark.anyio
+async def test_tags_are_case_insensitive_per_workspace(test_app):
+    app, session_factory, _, _ = test_app
+    await _seed_workspace(session_factory)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        first = await client.post("/api/v1/items/", json={"title": "Drill", "workspace_id": 1, "tags": ["Tools"]})
+        second = await client.post(
+            "/api/v1/items/", json={"title": "Saw", "workspace_id": 1, "tags": ["tools", "TOOLS", "garage"]}
+        )
+        assert first.status_code == 201
+        assert second.status_code == 201
+        assert sorted(second.json()["tags"]) == ["Tools", "garage"]
+
+    async with session_factory() as session:
+        names = (await session.execute(select(Tag.name).where(Tag.workspace_id == 1))).scalars().all()
+    assert sorted(names) == ["Tools", "garage"]
+
+
+@pytest.mark.anyio
+async def test_patch_tags_writes_only_the_difference(test_app):
+    app, session_factory, _, _ = test_app
+    await _seed_workspace(session_factory)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        created = await client.post(
+            "/api/v1/items/", json={"title": "Drill", "workspace_id": 1, "tags": ["tools", "power"]}
+        )
+        item_id = created.json()["id"]
+
+        with track_queries() as stats:
+            same = await client.patch(f"/api/v1/items/{item_id}", json={"tags": ["power", "Tools"]})
+        assert same.status_code == 200
+        writes = [sql for sql in stats.statements if sql.startswith(("INSERT", "DELETE"))]
+        assert writes == []
+
+        with track_queries() as stats:
+            changed = await client.patch(f"/api/v1/items/{item_id}", json={"tags": ["tools", "garage"]})
+        assert sorted(changed.json()["tags"]) == ["garage", "tools"]
+        writes = [sql.split("(")[0].strip() for sql in stats.statements if sql.startswith(("INSERT", "DELETE"))]
+        writes = [sql for sql in writes if "syncchange" not in sql]
+        assert writes == ["INSERT INTO tag", "DELETE FROM item_tags WHERE", "INSERT INTO item_tags"]
+
+        cleared = await client.patch(f"/api/v1/items/{item_id}", json={"tags": []})
+        assert cleared.json()["tags"] == []
+
+
+@pytest.mark.anyio
+async def test_non_ascii_tag_is_reused_and_kept_on_patch(test_app):
+    app, session_factory, _, _ = test_app
+    await _seed_workspace(session_factory)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        first = await client.post(
+            "/api/v1/items/", json={"title": "Дрель", "workspace_id": 1, "tags": ["Инструменты"]}
+        )
+        second = await client.post(
+            "/api/v1/items/", json={"title": "Пила", "workspace_id": 1, "tags": ["Инструменты", "Гараж"]}
+        )
+        assert first.json()["tags"] == ["Инструменты"]
+        assert sorted(second.json()["tags"]) == ["Гараж", "Инструменты"]
+
+        kept = await client.patch(
+            f"/api/v1/items/{first.json()['id']}", json={"tags": ["Инструменты", "Электро"]}
+        )
+        assert sorted(kept.json()["tags"]) == ["Инструменты", "Электро"]
+        again = await client.get(f"/api/v1/items/{second.json()['id']}")
+        assert sorted(again.json()["tags"]) == ["Гараж", "Инструменты"]
+
+    async with session_factory() as session:
+        names = (await session.execute(select(Tag.name).where(Tag.workspace_id == 1))).scalars().all()
+    assert sorted(names) == ["Гараж", "Инструменты", "Электро"]
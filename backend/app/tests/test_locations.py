@@ -120,3 +120,152 @@ async def test_location_photo_linking(test_app):
 
         clear = await client.delete(f"/api/v1/locations/{loc_id}/photo")
         assert clear.status_code == 204
+
+
+@pytest.mark.anyio
+async def test_location_tree_counts_depth_and_lazy_expansion(test_app, assert_num_queries):
+    from app.models.item import Item
+    from app.models.location import Location
+    from app.models.media import Media
+    from app.models.enums import MediaType
+
+    app, session_factory, _, _ = test_app
+    async with session_factory() as session:
+        await _seed_workspace(session)
+        # Home -> Room -> Shelf -> Box; одноимённые соседи Room проверяют, что счёт не идёт по path.
+        session.add_all(
+            [
+                Location(id=1, workspace_id=1, name="Home", path="Home"),
+                Location(id=2, workspace_id=1, parent_id=1, name="Room", path="Home.Room"),
+                Location(id=3, workspace_id=1, parent_id=1, name="Room", path="Home.Room"),
+                Location(id=4, workspace_id=1, parent_id=2, name="Shelf", path="Home.Room.Shelf"),
+                Location(id=5, workspace_id=1, parent_id=4, name="Box", path="Home.Room.Shelf.Box"),
+                Location(id=6, workspace_id=1, name="Garage", path="Garage"),
+            ]
+        )
+        await session.flush()
+        for idx, location_id in enumerate([1, 2, 3, 5, 5, 5]):
+            session.add(Item(workspace_id=1, owner_user_id=1, title=f"item {idx}", location_id=location_id))
+        for location_id in (4, 5):
+            session.add(Media(workspace_id=1, owner_user_id=1, location_id=location_id, media_type=MediaType.PHOTO, path="x.jpg"))
+        await session.commit()
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        with assert_num_queries(1):
+            resp = await client.get("/api/v1/locations/tree", params={"workspace_id": 1})
+        assert resp.status_code == 200
+        roots = resp.json()
+        assert [node["name"] for node in roots] == ["Home", "Garage"]
+        home = roots[0]
+        assert (home["item_count"], home["total_item_count"], home["total_media_count"]) == (1, 6, 2)
+        assert home["child_count"] == 2
+        room, other_room = home["children"]
+        assert (room["id"], room["total_item_count"], room["total_media_count"]) == (2, 4, 2)
+        assert other_room["total_item_count"] == 1
+        box = room["children"][0]["children"][0]
+        assert (box["depth"], box["item_count"], box["media_count"]) == (3, 3, 1)
+
+        shallow = (await client.get("/api/v1/locations/tree", params={"workspace_id": 1, "depth": 1})).json()
+        shallow_room = shallow[0]["children"][0]
+        assert shallow_room["children"] == [] and shallow_room["child_count"] == 1
+        assert shallow_room["total_item_count"] == 4
+
+        expanded = (await client.get("/api/v1/locations/tree", params={"root_id": 2, "depth": 0})).json()
+        assert [(node["id"], node["depth"], node["total_item_count"]) for node in expanded] == [(4, 0, 3)]
+
+        missing = await client.get("/api/v1/locations/tree", params={"root_id": 999})
+        assert missing.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_move_rewrites_only_real_descendant_paths(test_app, assert_num_queries):
+    from sqlalchemy import select
+
+    from app.models.location import Location
+
+    app, session_factory, _, _ = test_app
+    async with session_factory() as session:
+        await _seed_workspace(session)
+        session.add(Workspace(id=2, name="Other", owner_user_id=1))
+        # Два одноимённых соседа «Room» (одинаковый path), имя с `%`, и такой же путь в другом workspace.
+        session.add_all(
+            [
+                Location(id=1, workspace_id=1, name="Home", path="Home"),
+                Location(id=2, workspace_id=1, parent_id=1, name="Room", path="Home.Room"),
+                Location(id=3, workspace_id=1, parent_id=1, name="Room", path="Home.Room"),
+                Location(id=4, workspace_id=1, parent_id=2, name="Shelf_%", path="Home.Room.Shelf_%"),
+                Location(id=5, workspace_id=1, parent_id=4, name="Box", path="Home.Room.Shelf_%.Box"),
+                Location(id=6, workspace_id=1, parent_id=3, name="Drawer", path="Home.Room.Drawer"),
+                Location(id=7, workspace_id=1, name="Garage", path="Garage"),
+                Location(id=8, workspace_id=2, name="Home", path="Home"),
+                Location(id=9, workspace_id=2, parent_id=8, name="Room", path="Home.Room"),
+                Location(id=10, workspace_id=2, parent_id=9, name="Bin", path="Home.Room.Bin"),
+            ]
+        )
+        await session.commit()
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        moved = await client.patch("/api/v1/locations/2", json={"parent_id": 7})
+        assert moved.status_code == 200
+        assert moved.json()["path"] == "Garage.Room"
+
+        # Цикл: Home нельзя положить в Box, который лежит внутри Home.
+        # Запросы: сама локация, новый родитель и один запрос по предкам.
+        with assert_num_queries(3):
+            cycle = await client.patch("/api/v1/locations/4", json={"parent_id": 5})
+        assert cycle.status_code == 400
+        assert cycle.json()["detail"] == "Parent creates cycle"
+
+        lifted = await client.delete("/api/v1/locations/4/parent")
+        assert lifted.status_code == 204
+
+    async with session_factory() as session:
+        paths = dict((await session.execute(select(Location.id, Location.path))).all())
+    assert paths[4] == "Shelf_%"
+    assert paths[5] == "Shelf_%.Box"
+    assert paths[6] == "Home.Room.Drawer"
+    assert paths[10] == "Home.Room.Bin"
+
+
+@pytest.mark.anyio
+async def test_items_for_location_recursive_with_breadcrumb_and_pages(test_app, assert_num_queries):
+    from app.models.item import Item
+    from app.models.location import Location
+
+    app, session_factory, _, _ = test_app
+    async with session_factory() as session:
+        await _seed_workspace(session)
+        session.add_all(
+            [
+                Location(id=1, workspace_id=1, name="Garage", path="Garage"),
+                Location(id=2, workspace_id=1, parent_id=1, name="Shelf", path="Garage.Shelf"),
+                Location(id=3, workspace_id=1, parent_id=2, name="Box", path="Garage.Shelf.Box"),
+                # Другая ветка с тем же path-префиксом не должна попасть в выдачу.
+                Location(id=4, workspace_id=1, name="Garage", path="Garage"),
+                Location(id=5, workspace_id=1, parent_id=4, name="Shelf", path="Garage.Shelf"),
+            ]
+        )
+        await session.flush()
+        for idx, location_id in enumerate([1, 2, 3, 3, 5]):
+            session.add(Item(id=idx + 1, workspace_id=1, owner_user_id=1, title=f"item {idx + 1}", location_id=location_id))
+        await session.commit()
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        direct = (await client.get("/api/v1/locations/1/items")).json()
+        assert [item["id"] for item in direct] == [1]
+        assert direct[0]["breadcrumb"] is None
+
+        # Предметы, теги и цепочки локаций — по одному запросу.
+        with assert_num_queries(3):
+            resp = await client.get("/api/v1/locations/1/items", params={"recursive": "true"})
+        assert resp.status_code == 200
+        items = resp.json()
+        assert sorted(item["id"] for item in items) == [1, 2, 3, 4]
+        by_id = {item["id"]: item for item in items}
+        assert [crumb["name"] for crumb in by_id[4]["breadcrumb"]] == ["Garage", "Shelf", "Box"]
+        assert [crumb["id"] for crumb in by_id[1]["breadcrumb"]] == [1]
+
+        first = (await client.get("/api/v1/locations/1/items", params={"recursive": "true", "limit": 3})).json()
+        rest = (await client.get("/api/v1/locations/1/items", params={"recursive": "true", "limit": 3, "offset": 3})).json()
+        assert len(first) == 3 and len(rest) == 1
+        assert {item["id"] for item in first + rest} == {1, 2, 3, 4}
@@ -0,0 +1,68 @@
+"""Проверяет in-process метрики и эндпоинт `/metrics`."""
+
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from httpx import AsyncClient
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.middleware import REQUEST_QUERIES
+from app.main import app
+
+
+def test_render_uses_prometheus_text_format(monkeypatch):
+    monkeypatch.setattr(metrics, "REGISTRY", {})
+    uploads = metrics.counter("test_upload_bytes", "Bytes.", ("media_type",))
+    latency = metrics.histogram("test_latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    metrics.gauge("test_pool", "Pool.", ("state",), callback=lambda: {("checkedout",): 2})
+    uploads.inc(100, media_type="photo")
+    uploads.inc(50, media_type="photo")
+    latency.observe(0.05, stage="detect")
+    latency.observe(0.5, stage="detect")
+    latency.observe(3, stage="detect")
+
+    lines = metrics.render().splitlines()
+
+    assert "# TYPE test_upload_bytes counter" in lines
+    assert 'test_upload_bytes_total{media_type="photo"} 150' in lines
+    assert 'test_pool{state="checkedout"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="detect",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="detect",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="detect",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{stage="detect"} 3' in lines
+
+
+def test_metrics_endpoint_reports_route_latency_and_model_state():
+    client = TestClient(app)
+    client.get("/api/v1/health")
+    resp = client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = resp.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/health",status="200"}' in body
+    assert 'ai_model_state{model="detector",state=' in body
+    assert "# TYPE ai_stage_seconds histogram" in body
+
+
+@pytest.mark.anyio
+async def test_slow_request_is_logged_with_sql_statements(test_app, monkeypatch, caplog):
+    app, _, _, _ = test_app
+    monkeypatch.setattr(settings, "request_slow_ms", 0.0)
+    key = ("GET", "/api/v1/locations")
+    before = REQUEST_QUERIES.snapshot().get(key, {"count": 0, "sum": 0})
+
+    with caplog.at_level(logging.WARNING, logger="app.core.middleware"):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            resp = await client.get("/api/v1/locations")
+
+    assert resp.status_code == 200
+    after = REQUEST_QUERIES.snapshot()[key]
+    assert after["count"] == before["count"] + 1
+    assert after["sum"] > before["sum"]
+    record = next(r for r in caplog.records if r.getMessage().startswith("http.slow_request"))
+    message = record.getMessage()
+    assert "route=/api/v1/locations" in message
+    assert "SELECT" in message and "location" in message
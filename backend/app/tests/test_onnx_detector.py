@@ -0,0 +1,89 @@
+"""Проверяет NumPy-часть ONNX-бэкенда детектора: letterbox, NMS и декодирование выхода."""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.ai import detector
+from app.services.ai.onnx_detector import OnnxYoloDetector, letterbox, nms
+
+
+class _FakeSession:
+    """Имитирует `onnxruntime.InferenceSession` с заранее заданным выходом."""
+
+    def __init__(self, output: np.ndarray):
+        self.output = output
+        self.inputs: list[np.ndarray] = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="images", shape=[1, 3, 640, 640])]
+
+    def run(self, output_names, feeds):
+        self.inputs.append(feeds["images"])
+        return [self.output]
+
+
+def _yolo_output(rows: list[tuple[float, float, float, float, int, float]], num_classes: int = 2) -> np.ndarray:
+    """Собирает тензор (1, 4 + num_classes, N) из строк (cx, cy, w, h, cls, score)."""
+    out = np.zeros((1, 4 + num_classes, len(rows)), dtype=np.float32)
+    for i, (cx, cy, w, h, cls, score) in enumerate(rows):
+        out[0, :4, i] = (cx, cy, w, h)
+        out[0, 4 + cls, i] = score
+    return out
+
+
+def test_letterbox_keeps_aspect_ratio_and_pads():
+    image = np.zeros((100, 200, 3), dtype=np.uint8)
+    canvas, ratio, pad = letterbox(image, 640)
+    assert canvas.shape == (640, 640, 3)
+    assert ratio == 3.2
+    assert pad == (0, 160)
+    assert canvas[0, 0, 0] == 114
+
+
+def test_nms_suppresses_overlaps():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+    assert nms(boxes, scores, 0.45).tolist() == [0, 2]
+
+
+def test_onnx_detector_maps_boxes_back_to_original_pixels():
+    # Изображение 100x200 -> ratio 3.2, сверху отступ 160 px.
+    output = _yolo_output(
+        [
+            (320, 320, 64, 64, 0, 0.9),
+            (322, 322, 64, 64, 0, 0.6),  # дубликат первой рамки, уйдёт в NMS
+            (322, 322, 64, 64, 1, 0.5),  # другой класс — NMS его не трогает
+            (100, 200, 10, 10, 1, 0.1),  # ниже порога
+        ]
+    )
+    session = _FakeSession(output)
+    model = OnnxYoloDetector(session, names={0: "box", 1: "bag"})
+    objects = model.predict(np.zeros((100, 200, 3), dtype=np.uint8), conf=0.25)
+
+    assert session.inputs[0].shape == (1, 3, 640, 640)
+    assert session.inputs[0].dtype == np.float32
+    assert [(o.label, round(o.score, 2)) for o in objects] == [("box", 0.9), ("bag", 0.5)]
+    assert np.allclose(objects[0].bbox, (90, 40, 110, 60))
+
+
+def test_detect_objects_uses_configured_onnx_backend(monkeypatch, tmp_path):
+    weights = tmp_path / "best.pt"
+    (tmp_path / "best.onnx").write_bytes(b"")
+    output = _yolo_output([(320, 320, 64, 64, 0, 0.9)], num_classes=1)
+    monkeypatch.setattr(settings, "ai_detector_backend", "onnx")
+    monkeypatch.setattr(settings, "ai_yolo_weights_path", str(weights))
+    monkeypatch.setattr(
+        OnnxYoloDetector,
+        "from_path",
+        classmethod(lambda cls, path, **kwargs: cls(_FakeSession(output), names={0: "box"})),
+    )
+    detector._load_model.cache_clear()
+    try:
+        objects = detector.detect_objects(np.zeros((640, 640, 3), dtype=np.uint8))
+    finally:
+        detector._load_model.cache_clear()
+
+    assert [o.label for o in objects] == ["box"]
+    assert detector._resolve_weights_path("onnx") == tmp_path / "best.onnx"
@@ -0,0 +1,293 @@
+"""Проверяет, что AI-пайплайн не держит транзакцию во время инференса."""
+
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, select
+from sqlalchemy.orm import undefer
+
+from app.models.ai import AIDetection, AIDetectionCandidate, AIDetectionObject
+from app.models.enums import AIDetectionStatus, MediaType
+from app.models.item import Item
+from app.models.media import Media
+from app.models.user import User, Workspace
+from app.services.ai import detector, pipeline, timings, video
+from app.services.ai.detector import DetectedObject
+from app.services.ai.embeddings import decode_embedding
+
+ASSETS = Path(__file__).parent / "assets"
+
+
+async def _seed_media(session, public_dir: Path, asset: str, media_type: MediaType) -> int:
+    shutil.copy(ASSETS / asset, public_dir / asset)
+    session.add_all(
+        [
+            User(id=1, email="demo@local", hashed_password="noop"),
+            Workspace(id=1, name="Demo", owner_user_id=1),
+            Item(id=1, workspace_id=1, owner_user_id=1, title="Backpack"),
+            Media(id=1, workspace_id=1, owner_user_id=1, media_type=media_type, path=asset),
+        ]
+    )
+    await session.commit()
+    return 1
+
+
+def _detector_checking_session(session, calls: list):
+    def _detect(image_array, conf: float = 0.25):
+        # Во время инференса у сессии не должно быть открытой транзакции.
+        calls.append(session.in_transaction())
+        h, w = image_array.shape[:2]
+        return [DetectedObject((0, 0, w // 2, h // 2), "box", 0.8), DetectedObject((0, 0, w, h), "bag", 0.6)]
+
+    return _detect
+
+
+@pytest.mark.anyio
+async def test_analyze_media_runs_inference_outside_transaction(test_app, monkeypatch):
+    _, session_factory, public_dir, _ = test_app
+    calls: list[bool] = []
+    async with session_factory() as session:
+        media_id = await _seed_media(session, public_dir, "sample.jpg", MediaType.PHOTO)
+        monkeypatch.setattr(pipeline, "detect_objects", _detector_checking_session(session, calls))
+        detection = await pipeline.analyze_media(media_id, session, hint_item_ids=[1])
+
+    assert calls == [False]
+    assert detection.status == AIDetectionStatus.DONE
+    assert [obj["label"] for obj in detection.raw["objects"]] == ["box", "bag"]
+    async with session_factory() as session:
+        objects = (await session.execute(select(AIDetectionObject))).scalars().all()
+        candidates = (await session.execute(select(AIDetectionCandidate))).scalars().all()
+    assert len(objects) == 2
+    assert {c.item_id for c in candidates} == {1}
+    assert len(candidates) == 2
+
+
+@pytest.mark.anyio
+async def test_analyze_media_marks_failed_when_inference_raises(test_app, monkeypatch):
+    _, session_factory, public_dir, _ = test_app
+
+    def _boom(image_array, conf: float = 0.25):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(pipeline, "detect_objects", _boom)
+    async with session_factory() as session:
+        media_id = await _seed_media(session, public_dir, "sample.jpg", MediaType.PHOTO)
+        detection = await pipeline.analyze_media(media_id, session)
+
+    assert detection.status == AIDetectionStatus.FAILED
+    assert detection.raw["error"] == "boom"
+
+
+@pytest.mark.anyio
+async def test_analyze_video_runs_inference_outside_transaction(test_app, monkeypatch):
+    pytest.importorskip("cv2")
+    _, session_factory, public_dir, _ = test_app
+    calls: list[bool] = []
+    async with session_factory() as session:
+        media_id = await _seed_media(session, public_dir, "sample.mp4", MediaType.VIDEO)
+        monkeypatch.setattr(video, "detect_objects", _detector_checking_session(session, calls))
+        detection_ids = await video.analyze_video(media_id, session, frame_stride=1, max_frames=2, hint_item_ids=[1])
+
+    assert calls and not any(calls)
+    assert len(detection_ids) == len(calls)
+    async with session_factory() as session:
+        detections = (await session.execute(select(AIDetection).order_by(AIDetection.id))).scalars().all()
+        objects = (await session.execute(select(AIDetectionObject))).scalars().all()
+        media = await session.get(Media, media_id)
+    assert media.latest_detection_id == detection_ids[-1]
+    assert [d.raw["progress"]["current"] for d in detections] == list(range(1, len(calls) + 1))
+    assert all(d.status == AIDetectionStatus.DONE for d in detections)
+    assert all({"decode", "embed"} <= set(d.raw["timings"]) for d in detections)
+    assert len(objects) == 2 * len(calls)
+
+
+@pytest.mark.anyio
+async def test_analyze_media_records_stage_timings(test_app, monkeypatch):
+    _, session_factory, public_dir, _ = test_app
+    monkeypatch.setattr(detector, "_load_model", lambda: None)
+    detect_before = timings.STAGE_SECONDS.snapshot().get(("detect",), {"count": 0})["count"]
+    async with session_factory() as session:
+        media_id = await _seed_media(session, public_dir, "sample.jpg", MediaType.PHOTO)
+        detection = await pipeline.analyze_media(media_id, session)
+
+    stages = detection.raw["timings"]
+    # Стадии из потока инференса попадают в тот же сборщик, что и чтение из БД.
+    assert {"db_read", "decode", "detect", "embed", "candidates"} <= set(stages)
+    assert all(seconds >= 0 for seconds in stages.values())
+    snapshot = timings.STAGE_SECONDS.snapshot()
+    assert snapshot[("detect",)]["count"] == detect_before + 1
+    assert snapshot[("db_write",)]["count"] >= 1
+
+
+def test_detector_fallback_is_used_by_pipeline(monkeypatch):
+    monkeypatch.setattr(detector, "_load_model", lambda: None)
+    objects, warnings = pipeline._run_inference(ASSETS / "sample.jpg", {}, [], [])
+    assert objects
+    assert any(w.startswith("clip_unavailable") for w in warnings)
+
+
+@pytest.mark.anyio
+async def test_persist_detection_objects_uses_one_insert_per_table(test_app):
+    _, session_factory, public_dir, _ = test_app
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async with session_factory() as session:
+        media_id = await _seed_media(session, public_dir, "sample.jpg", MediaType.PHOTO)
+        detection = AIDetection(media_id=media_id, status=AIDetectionStatus.IN_PROGRESS, raw={})
+        session.add(detection)
+        await session.flush()
+        objects = [
+            (
+                detection.id,
+                {
+                    "label": f"obj{i}",
+                    "confidence": 0.5,
+                    "bbox": {"x1": 0, "y1": 0, "x2": i, "y2": i},
+                    "candidates": [(1, 0.9)],
+                },
+            )
+            for i in range(30)
+        ]
+        sync_engine = session.bind.sync_engine
+        # SQLite не умеет упорядоченный пакетный RETURNING и вставляет объекты построчно;
+        # на Postgres это один INSERT.
+        batched_returning = sync_engine.dialect.name == "postgresql"
+        event.listen(sync_engine, "before_cursor_execute", _record)
+        try:
+            object_ids = await pipeline._persist_detection_objects(session, objects)
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", _record)
+        await session.commit()
+
+    assert len(object_ids) == 30
+    object_inserts = [s for s in statements if s.startswith("INSERT INTO aidetectionobject")]
+    assert len(object_inserts) == (1 if batched_returning else 30)
+    assert len([s for s in statements if s.startswith("INSERT INTO aidetectioncandidate")]) == 1
+    async with session_factory() as session:
+        rows = (await session.execute(select(AIDetectionObject).order_by(AIDetectionObject.id))).scalars().all()
+        candidates = (await session.execute(select(AIDetectionCandidate))).scalars().all()
+    assert [row.label for row in rows] == [f"obj{i}" for i in range(30)]
+    assert {c.detection_object_id for c in candidates} == set(object_ids)
+
+
+@pytest.mark.anyio
+async def test_analyze_media_stores_embeddings_in_binary_column(test_app, monkeypatch):
+    _, session_factory, public_dir, _ = test_app
+    vector = np.linspace(-1, 1, 512, dtype="float32")
+    monkeypatch.setattr(pipeline, "detect_objects", lambda image_array, conf=0.25: [DetectedObject((0, 0, 4, 4), "box", 0.8)])
+    monkeypatch.setattr(pipeline, "image_embedding", lambda image: vector)
+    async with session_factory() as session:
+        media_id = await _seed_media(session, public_dir, "sample.jpg", MediaType.PHOTO)
+        detection = await pipeline.analyze_media(media_id, session)
+
+    assert "embedding" not in detection.raw["objects"][0]
+    assert detection.raw["objects"][0]["has_embedding"] is True
+    assert detection.raw["embedding_ref"] == {"storage": "aidetectionobject.embedding", "dtype": "float16", "dim": 512}
+    async with session_factory() as session:
+        obj = (
+            await session.execute(select(AIDetectionObject).options(undefer(AIDetectionObject.embedding)))
+        ).scalar_one()
+    assert len(obj.embedding) == 512 * 2
+    assert np.allclose(decode_embedding(obj.embedding), vector, atol=1e-3)
+
+
+@pytest.mark.anyio
+async def test_analysis_maintains_latest_detection_pointer(test_app, monkeypatch):
+    app, session_factory, public_dir, _ = test_app
+    monkeypatch.setattr(pipeline, "detect_objects", lambda image_array, conf=0.25: [DetectedObject((0, 0, 4, 4), "box", 0.8)])
+    async with session_factory() as session:
+        media_id = await _seed_media(session, public_dir, "sample.jpg", MediaType.PHOTO)
+        first = await pipeline.analyze_media(media_id, session)
+        second = await pipeline.analyze_media(media_id, session)
+        # Более старая детекция не должна перетирать указатель.
+        await pipeline.set_latest_detection(session, media_id, first.id)
+        await session.commit()
+
+    async with session_factory() as session:
+        media = await session.get(Media, media_id)
+    assert media.latest_detection_id == second.id
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        card = (await client.get(f"/api/v1/media/{media_id}")).json()
+        recent = (await client.get("/api/v1/media/recent")).json()
+        await client.post(f"/api/v1/items/1/media/{media_id}")
+        item_media = (await client.get("/api/v1/items/1/media")).json()
+    assert card["analysis"]["id"] == second.id
+    assert [obj["label"] for obj in card["analysis"]["objects"]] == ["box"]
+    assert recent[0]["analysis"]["id"] == second.id
+    assert item_media[0]["detection"]["id"] == second.id
+
+
+@pytest.mark.anyio
+async def test_reanalysis_reuses_cached_inference_and_rematches_candidates(test_app, monkeypatch):
+    _, session_factory, public_dir, _ = test_app
+    vector = np.linspace(-1, 1, 16, dtype="float32")
+    detect_calls: list[int] = []
+
+    def _detect(image_array, conf=0.25):
+        detect_calls.append(1)
+        return [DetectedObject((0, 0, 4, 4), "box", 0.8)]
+
+    monkeypatch.setattr(pipeline, "detect_objects", _detect)
+    monkeypatch.setattr(pipeline, "image_embedding", lambda image: vector)
+    async with session_factory() as session:
+        media_id = await _seed_media(session, public_dir, "sample.jpg", MediaType.PHOTO)
+        media = await session.get(Media, media_id)
+        media.file_hash = "abc"
+        session.add(Item(id=2, workspace_id=1, owner_user_id=1, title="Lamp"))
+        await session.commit()
+
+        first = await pipeline.analyze_media(media_id, session)
+        second = await pipeline.analyze_media(media_id, session, hint_item_ids=[2])
+
+    assert detect_calls == [1]
+    assert first.raw["inference_cache"] == "miss"
+    assert second.raw["inference_cache"] == "hit"
+    assert second.raw["objects"] == first.raw["objects"]
+    async with session_factory() as session:
+        objects = (
+            await session.execute(
+                select(AIDetectionObject)
+                .options(undefer(AIDetectionObject.embedding))
+                .where(AIDetectionObject.detection_id == second.id)
+            )
+        ).scalars().all()
+        candidates = (
+            await session.execute(
+                select(AIDetectionCandidate).where(AIDetectionCandidate.detection_object_id == objects[0].id)
+            )
+        ).scalars().all()
+    # Кандидаты посчитаны заново с учётом новых подсказок, эмбеддинг восстановлен из кэша.
+    assert [c.item_id for c in candidates] == [2]
+    assert np.allclose(decode_embedding(objects[0].embedding), vector, atol=1e-3)
+
+
+@pytest.mark.anyio
+async def test_failed_result_write_marks_detection_failed(test_app, monkeypatch):
+    _, session_factory, public_dir, _ = test_app
+    monkeypatch.setattr(pipeline, "detect_objects", lambda image_array, conf=0.25: [DetectedObject((0, 0, 4, 4), "box", 0.8)])
+
+    async def _broken_persist(db, rows):
+        raise RuntimeError("constraint violated")
+
+    monkeypatch.setattr(pipeline, "_persist_detection_objects", _broken_persist)
+    async with session_factory() as session:
+        media_id = await _seed_media(session, public_dir, "sample.jpg", MediaType.PHOTO)
+        with pytest.raises(RuntimeError):
+            await pipeline.analyze_media(media_id, session)
+
+    async with session_factory() as session:
+        detection = (await session.execute(select(AIDetection))).scalar_one()
+        media = await session.get(Media, media_id)
+    # Строка фазы 1 не зависает в IN_PROGRESS: указатель ведёт на явную ошибку.
+    assert detection.status == AIDetectionStatus.FAILED
+    assert "constraint violated" in detection.raw["error"]
+    assert detection.raw["objects"] == []
+    assert detection.completed_at is not None
+    assert media.latest_detection_id == detection.id
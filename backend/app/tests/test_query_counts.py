@@ -0,0 +1,72 @@
+"""Число SQL-запросов горячих списков не зависит от количества строк.
+
+Каждый эндпоинт вызывается на маленьком и на большем наборе данных с одним и
+тем же ожидаемым числом запросов: N+1 ломает тест, а не латентность в проде.
+"""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+
+from app.benchmarks.seed_workspace import SeedConfig, seed_workspaces
+from app.models.ai import AIDetection
+from app.models.item import Item
+from app.models.location import Location
+from app.models.media import ItemMedia, Media
+
+# (имя, шаблон URL, ожидаемое число запросов)
+ENDPOINTS = [
+    ("list_items", "/api/v1/items/", 2),
+    ("search_items", "/api/v1/items/search?query=seed", 2),
+    ("upload_history", "/api/v1/media/history?limit=200", 4),
+    ("recent_media", "/api/v1/media/recent?limit=200", 4),
+    ("list_item_media", "/api/v1/items/{item_id}/media", 5),
+    ("items_for_location", "/api/v1/locations/{location_id}/items", 2),
+    ("items_for_location_recursive", "/api/v1/locations/{location_id}/items?recursive=true", 3),
+    ("list_detections", "/api/v1/ai/detections?status=pending", 4),
+]
+
+
+async def _seed(session_factory, public_dir, rows: int) -> dict:
+    """Workspace с `rows` предметами и медиа; все предметы в одной локации
+    и находятся поиском `seed`, все медиа у одного предмета."""
+    config = SeedConfig(
+        items=rows,
+        tags=3,
+        tags_per_item=2,
+        media=rows,
+        item_media_share=0,
+        location_depth=2,
+        location_fanout=2,
+        objects_per_detection=2,
+        candidates_per_object=2,
+        failed_uploads=1,
+        seed=rows,
+    )
+    async with session_factory() as session:
+        report = await seed_workspaces(await session.connection(), config, public_dir)
+        workspace_id = report["workspace_ids"][0]
+        item_id = await session.scalar(select(func.min(Item.id)).where(Item.workspace_id == workspace_id))
+        location_id = await session.scalar(select(func.min(Location.id)).where(Location.workspace_id == workspace_id))
+        await session.execute(update(Item).where(Item.workspace_id == workspace_id).values(location_id=location_id, description="seed item"))
+        media_ids = (await session.execute(select(Media.id).where(Media.workspace_id == workspace_id))).scalars().all()
+        session.add_all([ItemMedia(item_id=item_id, media_id=media_id) for media_id in media_ids])
+        await session.execute(
+            update(AIDetection).where(AIDetection.media_id.in_(media_ids)).values(status="pending")
+        )
+        await session.commit()
+    return {"item_id": item_id, "location_id": location_id}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("name,url,expected", ENDPOINTS, ids=[e[0] for e in ENDPOINTS])
+async def test_hot_endpoint_query_count_is_constant(test_app, assert_num_queries, name, url, expected):
+    app, session_factory, public_dir, _ = test_app
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        for rows in (2, 15):
+            ids = await _seed(session_factory, public_dir, rows)
+            with assert_num_queries(expected):
+                resp = await client.get(url.format(**ids))
+            assert resp.status_code == 200
+            assert len(resp.json()) >= rows
@@ -0,0 +1,154 @@
+"""EXPLAIN-регрессия: горячие запросы media/AI/history/локаций не должны уходить в полный скан."""
+
+import re
+from contextlib import contextmanager
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.db.base import Base
+from app.models.ai import AIDetection, AIDetectionObject
+from app.models.enums import AIDetectionStatus, MediaType, UploadStatus
+from app.models.item import Item
+from app.models.location import Location
+from app.models.media import ItemMedia, Media, MediaUploadHistory
+from app.models.user import User, Workspace
+from app.services.ai import pipeline
+
+# В SQLite полный скан выглядит как `SCAN <table>` без `USING ... INDEX`.
+_SQLITE_SEQ_SCAN = re.compile(r"^SCAN (\w+)(?!.*USING)")
+
+
+async def _seed(session) -> None:
+    session.add_all(
+        [
+            User(id=1, email="demo@local", hashed_password="noop"),
+            Workspace(id=1, name="Demo", owner_user_id=1),
+            Location(id=1, workspace_id=1, name="Home", path="Home"),
+            Location(id=2, workspace_id=1, parent_id=1, name="Shelf", path="Home.Shelf"),
+            Location(id=3, workspace_id=1, parent_id=2, name="Box", path="Home.Shelf.Box"),
+            Location(id=4, workspace_id=1, name="Garage", path="Garage"),
+            Item(id=1, workspace_id=1, owner_user_id=1, title="Backpack", location_id=3),
+            Media(id=1, workspace_id=1, owner_user_id=1, media_type=MediaType.PHOTO, path="a.jpg", file_hash="h"),
+            Media(id=2, workspace_id=1, owner_user_id=1, media_type=MediaType.PHOTO, path="b.jpg", file_hash="h"),
+            ItemMedia(item_id=1, media_id=1),
+        ]
+    )
+    await session.flush()
+    detection = AIDetection(media_id=2, status=AIDetectionStatus.PENDING, raw={"objects": []})
+    session.add(detection)
+    await session.flush()
+    session.add_all(
+        [
+            AIDetectionObject(detection_id=detection.id, label="box", confidence=0.9, bbox={}),
+            MediaUploadHistory(
+                media_id=2,
+                workspace_id=1,
+                owner_user_id=1,
+                media_type=MediaType.PHOTO,
+                status=UploadStatus.SUCCESS,
+            ),
+        ]
+    )
+    await pipeline.set_latest_detection(session, 2, detection.id)
+    await session.commit()
+
+
+@contextmanager
+def _capture_selects(sync_engine, statements: list):
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        # Рекурсивные CTE начинаются с WITH; UPDATE — перенос локации переписывает пути потомков.
+        if statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE")):
+            statements.append((statement, parameters))
+
+    event.listen(sync_engine, "before_cursor_execute", _record)
+    try:
+        yield
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _record)
+
+
+async def _seq_scans(session, statements: list) -> set[str]:
+    conn = await session.connection()
+    scanned: set[str] = set()
+    for statement, parameters in statements:
+        plan = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+        for row in plan:
+            match = _SQLITE_SEQ_SCAN.match(row[-1])
+            # Рабочие таблицы рекурсивных CTE всегда читаются сканом — считаем только настоящие таблицы.
+            if match and match.group(1) in Base.metadata.tables:
+                scanned.add(match.group(1))
+    return scanned
+
+
+async def _hash_candidates(app, session):
+    media = await session.get(Media, 2)
+    assert await pipeline._hash_candidates(session, media) == {1: 0.99}
+
+
+async def _list_detections(app, session):
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get("/api/v1/ai/detections", params={"status": "pending"})
+    assert resp.status_code == 200 and len(resp.json()) == 1
+
+
+async def _upload_history(app, session):
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get("/api/v1/media/history")
+        owner_resp = await client.get("/api/v1/media/history", params={"owner_user_id": 1})
+    assert resp.json()[0]["objects"]
+    assert owner_resp.json()[0]["objects"]
+
+
+async def _recent_media(app, session):
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get("/api/v1/media/recent")
+    assert resp.json()[0]["analysis"]["objects"]
+
+
+async def _location_tree(app, session):
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get("/api/v1/locations/tree", params={"workspace_id": 1})
+    home = next(node for node in resp.json() if node["name"] == "Home")
+    assert home["total_item_count"] == 1
+
+
+async def _subtree_items(app, session):
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get("/api/v1/locations/1/items", params={"recursive": "true"})
+    assert [item["title"] for item in resp.json()] == ["Backpack"]
+
+
+async def _move_location(app, session):
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.patch("/api/v1/locations/2", json={"parent_id": 4})
+    assert resp.json()["path"] == "Garage.Shelf"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("scenario", "allowed_scans"),
+    [
+        (_hash_candidates, set()),
+        (_list_detections, set()),
+        (_upload_history, set()),
+        # ORDER BY media.id DESC LIMIT n — обход по rowid, в SQLite он тоже выглядит как SCAN.
+        (_recent_media, {"media"}),
+        (_location_tree, set()),
+        (_subtree_items, set()),
+        (_move_location, set()),
+    ],
+)
+async def test_hot_queries_use_indexes(test_app, scenario, allowed_scans):
+    app, session_factory, _, _ = test_app
+    statements: list = []
+    async with session_factory() as session:
+        await _seed(session)
+        sync_engine = session.bind.sync_engine
+        if sync_engine.dialect.name != "sqlite":
+            pytest.skip("EXPLAIN QUERY PLAN разбирается только для SQLite")
+        with _capture_selects(sync_engine, statements):
+            await scenario(app, session)
+        assert statements
+        assert await _seq_scans(session, statements) <= allowed_scans
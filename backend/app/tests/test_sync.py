@@ -0,0 +1,142 @@
+"""Проверяет дельта-синхронизацию `GET /sync` и журнал изменений."""
+
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.models.ai import AIDetection, AIDetectionObject
+from app.models.enums import AIDetectionStatus
+from app.models.user import User, Workspace
+
+
+@pytest.fixture
+def no_commit_lag(monkeypatch):
+    monkeypatch.setattr(settings, "sync_commit_lag_s", 0.0)
+
+
+async def _seed_workspace(session_factory) -> None:
+    async with session_factory() as session:
+        session.add_all(
+            [
+                User(id=1, email="demo@local", hashed_password="noop"),
+                Workspace(id=1, name="Demo", owner_user_id=1),
+                Workspace(id=2, name="Other", owner_user_id=1),
+            ]
+        )
+        await session.commit()
+
+
+def _sample_bytes() -> bytes:
+    return (Path(__file__).parent / "assets" / "sample.jpg").read_bytes()
+
+
+@pytest.mark.anyio
+async def test_sync_returns_only_changes_since_watermark(test_app, no_commit_lag):
+    app, session_factory, _, _ = test_app
+    await _seed_workspace(session_factory)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        shelf = (await client.post("/api/v1/locations", json={"name": "Shelf", "workspace_id": 1})).json()
+        box = (await client.post("/api/v1/locations", json={"name": "Box", "workspace_id": 1})).json()
+        drill = (
+            await client.post(
+                "/api/v1/items/", json={"title": "Drill", "workspace_id": 1, "location_id": shelf["id"], "tags": ["tools"]}
+            )
+        ).json()
+        saw = (await client.post("/api/v1/items/", json={"title": "Saw", "workspace_id": 1})).json()
+        await client.post("/api/v1/items/", json={"title": "Alien", "workspace_id": 2})
+
+        first = (await client.get("/api/v1/sync", params={"workspace_id": 1})).json()
+        assert {row["id"] for row in first["items"]} == {drill["id"], saw["id"]}
+        assert {row["id"] for row in first["locations"]} == {shelf["id"], box["id"]}
+        assert [row["name"] for row in first["tags"]] == ["tools"]
+        assert first["deleted"] == []
+        assert first["has_more"] is False
+
+        await client.patch(f"/api/v1/items/{saw['id']}", json={"title": "Hand saw"})
+        await client.delete(f"/api/v1/locations/{box['id']}")
+
+        delta = (await client.get("/api/v1/sync", params={"since": first["watermark"], "workspace_id": 1})).json()
+        assert [row["title"] for row in delta["items"]] == ["Hand saw"]
+        assert delta["locations"] == []
+        assert delta["tags"] == []
+        assert delta["deleted"] == [{"entity": "location", "id": box["id"]}]
+        assert delta["watermark"] > first["watermark"]
+
+        idle = (await client.get("/api/v1/sync", params={"since": delta["watermark"], "workspace_id": 1})).json()
+        assert idle["watermark"] == delta["watermark"]
+        assert idle["items"] == [] and idle["deleted"] == []
+
+
+@pytest.mark.anyio
+async def test_sync_tracks_media_detections_and_tombstones(test_app, no_commit_lag):
+    app, session_factory, _, _ = test_app
+    await _seed_workspace(session_factory)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        item = (await client.post("/api/v1/items/", json={"title": "Lamp", "workspace_id": 1})).json()
+        upload = await client.post(
+            "/api/v1/media/upload",
+            files={"file": ("sample.jpg", _sample_bytes(), "image/jpeg")},
+            data={
+                "workspace_id": "1",
+                "owner_user_id": "1",
+                "media_type": "photo",
+                "scope": "public",
+                "item_id": str(item["id"]),
+                "analyze": "false",
+            },
+        )
+        assert upload.status_code == 200
+        media_id = upload.json()["id"]
+        before = (await client.get("/api/v1/sync")).json()["watermark"]
+
+        async with session_factory() as session:
+            detection = AIDetection(media_id=media_id, status=AIDetectionStatus.DONE)
+            session.add(detection)
+            await session.flush()
+            session.add(AIDetectionObject(detection_id=detection.id, label="lamp", confidence=0.9))
+            await session.commit()
+            detection_id = detection.id
+
+        delta = (await client.get("/api/v1/sync", params={"since": before})).json()
+        assert [row["id"] for row in delta["detections"]] == [detection_id]
+        assert [obj["label"] for obj in delta["detections"][0]["objects"]] == ["lamp"]
+
+        removed = await client.delete(f"/api/v1/items/{item['id']}/media/{media_id}", params={"delete_file": "true"})
+        assert removed.status_code == 204
+        gone = (await client.get("/api/v1/sync", params={"since": delta["watermark"]})).json()
+        assert {"entity": "media", "id": media_id} in gone["deleted"]
+        assert {"entity": "detection", "id": detection_id} in gone["deleted"]
+        assert [row["id"] for row in gone["items"]] == [item["id"]]
+
+
+@pytest.mark.anyio
+async def test_sync_pages_and_holds_watermark_for_fresh_changes(test_app, monkeypatch, no_commit_lag, assert_num_queries):
+    app, session_factory, _, _ = test_app
+    await _seed_workspace(session_factory)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        for n in range(5):
+            await client.post("/api/v1/items/", json={"title": f"Item {n}", "workspace_id": 1})
+
+        seen, since, pages = [], 0, 0
+        while True:
+            # Журнал, предметы, их теги — независимо от размера страницы.
+            with assert_num_queries(3):
+                page = (await client.get("/api/v1/sync", params={"since": since, "limit": 2})).json()
+            seen += [row["title"] for row in page["items"]]
+            since, pages = page["watermark"], pages + 1
+            if not page["has_more"]:
+                break
+        assert seen == [f"Item {n}" for n in range(5)]
+        assert pages == 3
+
+        monkeypatch.setattr(settings, "sync_commit_lag_s", 60.0)
+        await client.post("/api/v1/items/", json={"title": "Fresh", "workspace_id": 1})
+        held = (await client.get("/api/v1/sync", params={"since": since})).json()
+        assert [row["title"] for row in held["items"]] == ["Fresh"]
+        assert held["watermark"] == since
+        assert held["has_more"] is False
@@ -0,0 +1,96 @@
+"""Проверяет тайловый режим детектора для крупных и плотных снимков."""
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.ai import detector
+from app.services.ai.detector import DetectedObject
+from app.services.ai.tiling import merge_detections, tile_grid
+
+
+class _SmallObjectModel:
+    """Фейковая модель: видит цветные квадраты, только если кадр не больше 800 px.
+
+    Так моделируется потеря мелких объектов при даунскейле большого кадра до входа YOLO.
+    """
+
+    names = {0: "box"}
+
+    def __init__(self):
+        self.batch_sizes: list[int] = []
+
+    def predict_batch(self, images, conf=0.25):
+        self.batch_sizes.append(len(images))
+        return [self._predict(image) for image in images]
+
+    def _predict(self, image):
+        if max(image.shape[:2]) > 800:
+            return []
+        found = []
+        for value in np.unique(image[..., 0]):
+            if value == 0:
+                continue
+            ys, xs = np.nonzero(image[..., 0] == value)
+            found.append(DetectedObject((float(xs.min()), float(ys.min()), float(xs.max() + 1), float(ys.max() + 1)), "box", 0.9))
+        return found
+
+
+def test_tile_grid_covers_frame_with_overlap_and_respects_budget():
+    windows = tile_grid(2000, 1500, 640, 0.2, 16)
+    assert windows[0][:2] == (0, 0)
+    assert max(w[2] for w in windows) == 2000 and max(w[3] for w in windows) == 1500
+    assert all(w[2] - w[0] == 640 and w[3] - w[1] == 640 for w in windows)
+    # Соседние тайлы перекрываются.
+    xs = sorted({w[0] for w in windows})
+    assert all(b - a < 640 for a, b in zip(xs, xs[1:]))
+
+    capped = tile_grid(8000, 6000, 640, 0.2, 16)
+    assert len(capped) <= 16
+    assert max(w[2] for w in capped) == 8000 and max(w[3] for w in capped) == 6000
+
+
+def test_merge_drops_duplicates_and_cut_boxes_on_tile_edges():
+    full = [DetectedObject((0, 0, 100, 100), "box", 0.5)]
+    tiles = [
+        # Тот же объект, найденный в тайле с лучшим score, — остаётся одна рамка.
+        ((0, 0, 640, 640), [DetectedObject((1, 1, 101, 101), "box", 0.9)]),
+        # Рамка обрезана внутренним краем тайла — отбрасывается.
+        ((500, 0, 1140, 640), [DetectedObject((0, 200, 40, 240), "box", 0.8)]),
+    ]
+    merged = merge_detections(full, tiles, (640, 1140, 3), iou_threshold=0.45)
+    assert len(merged) == 1
+    assert merged[0].score == pytest.approx(0.9)
+
+
+@pytest.mark.parametrize("mode, expect_tiles", [("auto", True), ("off", False)])
+def test_detect_objects_batch_finds_small_objects_on_large_frame(monkeypatch, mode, expect_tiles):
+    image = np.zeros((1500, 2000, 3), dtype=np.uint8)
+    squares = [(100, 100), (620, 300), (1300, 900), (1900, 1400), (900, 610)]
+    for value, (x, y) in enumerate(squares, start=1):
+        image[y : y + 30, x : x + 30] = value
+    model = _SmallObjectModel()
+    monkeypatch.setattr(detector, "_load_model", lambda: model)
+    monkeypatch.setattr(detector, "_fallback_detect", lambda image: [])
+    monkeypatch.setattr(settings, "ai_tiling", mode)
+
+    objects = detector.detect_objects_batch([image])[0]
+
+    if not expect_tiles:
+        assert objects == [] and model.batch_sizes == [1]
+        return
+    # Все тайлы ушли в модель одним батчем после полнокадрового прохода.
+    assert model.batch_sizes == [1, len(tile_grid(2000, 1500, 640, 0.2, 16))]
+    found = sorted((round(o.bbox[0]), round(o.bbox[1])) for o in objects)
+    assert found == sorted(squares)
+
+
+def test_auto_mode_skips_small_sparse_frames(monkeypatch):
+    model = _SmallObjectModel()
+    monkeypatch.setattr(detector, "_load_model", lambda: model)
+    monkeypatch.setattr(detector, "_fallback_detect", lambda image: [])
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+    image[10:40, 10:40] = 1
+    # Кадр меньше `ai_tile_min_side` и объектов мало: только полнокадровый проход.
+    assert detector.detect_objects_batch([image])[0] == []
+    assert model.batch_sizes == [1]